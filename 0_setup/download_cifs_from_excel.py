@@ -6,21 +6,21 @@ from pathlib import Path
 
 import pandas as pd
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
+REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from scripts.utils.rcsb import download_structure
+from utils.rcsb import download_structure
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument('--excel', required=True, help='Path to Excel file (e.g., data.xlsx)')
     p.add_argument('--column', default='entryName', help='Column containing PDB identifiers')
     p.add_argument('--out-dir', default='data/structures/cif', help='Output directory for downloaded .cif files')
     p.add_argument('--overwrite', action='store_true', help='Re-download even if file exists')
     p.add_argument('--sleep', type=float, default=0.0, help='Seconds to sleep between requests')
-    return p.parse_args()
+    return p.parse_args(argv)
 
 
 def extract_pdb_ids(series: pd.Series) -> list[str]:
@@ -36,8 +36,8 @@ def extract_pdb_ids(series: pd.Series) -> list[str]:
     )
 
 
-def main() -> int:
-    args = parse_args()
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
     df = pd.read_excel(args.excel)
     if args.column not in df.columns:
         raise KeyError(f"Column '{args.column}' not found in {args.excel}. Available: {list(df.columns)}")
@@ -6,15 +6,15 @@ from pathlib import Path
 
 import pandas as pd
 
-# Allow `python scripts/...` to import `scripts.utils.*`
-REPO_ROOT = Path(__file__).resolve().parents[2]
+# Allow running as a standalone script without installing as a package.
+REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from scripts.utils.rcsb import download_structure  # noqa: E402
+from utils.rcsb import download_structure  # noqa: E402
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--excel", required=True, help="Path to Excel file (e.g., data.xlsx)")
     p.add_argument("--column", default="entryName", help="Column containing entry names (default: entryName)")
@@ -23,7 +23,7 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--overwrite", action="store_true", help="Re-download even if file exists")
     p.add_argument("--sleep_s", type=float, default=0.0, help="Sleep between requests")
     p.add_argument("--limit", type=int, default=None, help="Optional limit number of IDs")
-    return p.parse_args()
+    return p.parse_args(argv)
 
 
 def extract_pdb_id(entry: str) -> str:
@@ -31,8 +31,8 @@ def extract_pdb_id(entry: str) -> str:
     return entry.split("_")[0].strip()
 
 
-def main() -> None:
-    args = parse_args()
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
     df = pd.read_excel(args.excel)
     if args.column not in df.columns:
         raise ValueError(f"Column '{args.column}' not found. Columns: {list(df.columns)}")
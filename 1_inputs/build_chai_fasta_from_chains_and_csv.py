@@ -2,33 +2,32 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import pandas as pd
-from Bio import PDB
-from Bio.PDB.Polypeptide import PPBuilder
 
+# Allow running as a standalone script without installing as a package.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
 
-def parse_args() -> argparse.Namespace:
+from utils.atom_site import read_atom_site  # noqa: E402
+from utils.coords import peptide_sequence  # noqa: E402
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--chains-dir", required=True)
     p.add_argument("--csv", required=True)
     p.add_argument("--out-dir", default="data/chai_requests")
     p.add_argument("--ligand-type", default="Allosteric")
     p.add_argument("--include-empty", action="store_true")
-    return p.parse_args()
+    return p.parse_args(argv)
 
 
 def pdb_to_sequence(pdb_path: Path) -> str:
-    parser = PDB.PDBParser(QUIET=True)
-    structure = parser.get_structure("protein", str(pdb_path))
-    ppb = PPBuilder()
-    seq = ""
-    for model in structure:
-        for chain in model:
-            for pep in ppb.build_peptides(chain):
-                seq += str(pep.get_sequence())
-    return seq
+    return peptide_sequence(read_atom_site(pdb_path))
 
 
 def infer_pdb_id_from_filename(name: str) -> str:
@@ -48,8 +47,8 @@ def extract_ligands(row: pd.Series, ligand_type: str) -> list[str]:
     return out
 
 
-def main() -> int:
-    args = parse_args()
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
     chains_dir = Path(args.chains_dir)
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -8,7 +8,7 @@ from pathlib import Path
 import pandas as pd
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--chains-dir", required=True)
     p.add_argument("--csv", required=True)
@@ -16,7 +16,7 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--ligand-type", default="Allosteric")
     p.add_argument("--include-empty", action="store_true")
     p.add_argument("--use-smiles-col", default="")
-    return p.parse_args()
+    return p.parse_args(argv)
 
 
 def infer_pdb_id_from_filename(name: str) -> str:
@@ -42,8 +42,8 @@ def extract_entries(row: pd.Series, ligand_type: str, smiles_col: str) -> list[s
     return out
 
 
-def main() -> int:
-    args = parse_args()
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
     chains_dir = Path(args.chains_dir)
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
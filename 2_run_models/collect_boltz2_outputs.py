@@ -18,13 +18,13 @@ class Candidate:
     score_hint: float | None
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--boltz-root", required=True)
     p.add_argument("--out-dir", required=True)
     p.add_argument("--max-per-target", type=int, default=5)
     p.add_argument("--overwrite", action="store_true")
-    return p.parse_args()
+    return p.parse_args(argv)
 
 
 def infer_pdb_id(path: Path) -> str:
@@ -65,8 +65,8 @@ def choose_top(cands: list[Candidate], k: int) -> list[Candidate]:
     return sorted(cands, key=key)[:k]
 
 
-def main() -> int:
-    args = parse_args()
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
     root = Path(args.boltz_root)
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
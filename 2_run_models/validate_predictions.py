@@ -8,16 +8,16 @@ from pathlib import Path
 ALLOWED_EXTS = {".cif", ".mmcif", ".pdb"}
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--pred-root", required=True)
     p.add_argument("--out-csv", required=True)
     p.add_argument("--min-bytes", type=int, default=5000)
-    return p.parse_args()
+    return p.parse_args(argv)
 
 
-def main() -> int:
-    args = parse_args()
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
     pred_root = Path(args.pred_root)
 
     rows = []
@@ -7,7 +7,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from ost.mol.alg.scoring_base import MMCIFPrep
+from postprocess_common import run_ost_batch  # also puts the repo root and 4_score on sys.path
+from ost_utils import ResidueIndex, heavy_atoms
+from utils.batch import add_batch_args, build_tasks, is_batch
 
 
 @dataclass(frozen=True)
@@ -18,50 +20,81 @@ class ResID:
     resname: str
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
-    p.add_argument("--ref-cif", required=True)
-    p.add_argument("--ligand-json", required=True)
+    p.add_argument("--ref-cif", default="")
+    p.add_argument("--ligand-json", default="")
     p.add_argument("--radius", type=float, default=4.0)
-    p.add_argument("--out-json", required=True)
-    return p.parse_args()
+    p.add_argument("--out-json", default="")
+    p.add_argument("--ligand-dir", default="", help="Batch mode: ligand JSON is <ligand-dir>/<stem>.json")
+    p.add_argument("--out-dir", default="", help="Batch mode: write <stem>.json here")
+    add_batch_args(p, default_pattern="*.cif")
+    return p.parse_args(argv)
 
 
-def load_ligand_sels(lig_json: Path) -> list[str]:
-    data = json.loads(lig_json.read_text())
-    return [x["ost_residue_sel"] for x in data["ligands"]]
+def load_ligands(lig_json: Path) -> list[dict]:
+    return json.loads(lig_json.read_text())["ligands"]
 
 
-def unique_residues(view) -> list[ResID]:
+def unique_residues(residues) -> list[ResID]:
     out: dict[tuple[str, int, str], ResID] = {}
-    for res in view.GetResidues():
+    for res in residues:
         num = res.GetNumber()
         key = (res.GetChain().GetName(), int(num.GetNum()), str(num.GetInsCode() or ""))
         out[key] = ResID(chain=key[0], resnum=key[1], ins=key[2], resname=res.GetName())
     return list(out.values())
 
 
-def main() -> int:
-    args = parse_args()
-    ref_cif = Path(args.ref_cif)
-    lig_json = Path(args.ligand_json)
-    lig_sels = load_ligand_sels(lig_json)
+def build_one(ref_cif: str, ligand_json: str, out_json: str, radius: float) -> Path:
+    ref_cif = Path(ref_cif)
+    lig_json = Path(ligand_json)
+
+    from ost.mol.alg.scoring_base import MMCIFPrep
 
     ent, _ = MMCIFPrep(str(ref_cif), extract_nonpoly=False)
-    prot = ent.Select("protein and ele != H")
-    near_atoms = prot.Select(f"within {args.radius} of ({' or '.join(lig_sels)})")
-    bs_res = unique_residues(near_atoms)
+    index = ResidueIndex(ent)
+    ligs = index.lookup(load_ligands(lig_json))
+    if not ligs:
+        raise RuntimeError(f"None of the ligands in {lig_json} are in {ref_cif}")
+
+    near = index.residues_within([a for r in ligs for a in heavy_atoms(r)], radius)
+    bs_res = unique_residues(near)
 
     out: dict[str, Any] = {
         "ref_cif": str(ref_cif),
         "ligand_json": str(lig_json),
-        "radius": float(args.radius),
+        "radius": float(radius),
         "binding_site_residues": [{"chain": r.chain, "resnum": r.resnum, "ins": r.ins, "resname": r.resname} for r in bs_res],
     }
 
-    out_path = Path(args.out_json)
+    out_path = Path(out_json)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(out, indent=2))
+    return out_path
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    if is_batch(args):
+        if args.in_dir and not (args.ligand_dir and args.out_dir):
+            raise SystemExit("--in-dir requires --ligand-dir and --out-dir")
+        lig_dir, out_dir = Path(args.ligand_dir), Path(args.out_dir)
+        tasks = build_tasks(
+            args,
+            ["ref_cif", "ligand_json", "out_json"],
+            lambda f: {
+                "ref_cif": str(f),
+                "ligand_json": str(lig_dir / f"{f.stem}.json"),
+                "out_json": str(out_dir / f"{f.stem}.json"),
+            },
+            extra={"radius": float(args.radius)},
+        )
+        return run_ost_batch(build_one, tasks, args, key_col="ref_cif")
+
+    if not (args.ref_cif and args.ligand_json and args.out_json):
+        raise SystemExit("--ref-cif, --ligand-json and --out-json are required (or use --manifest / --in-dir)")
+    out_path = build_one(args.ref_cif, args.ligand_json, args.out_json, args.radius)
     print(f"Wrote -> {out_path}")
     return 0
 
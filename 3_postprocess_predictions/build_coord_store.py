@@ -0,0 +1,62 @@
+# 3_postprocess_predictions/build_coord_store.py
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import postprocess_common  # noqa: F401 - puts the repo root and 4_score on sys.path
+from ost_utils import OST_PRELOAD, atom_table
+from utils.atom_site import read_atom_site
+from utils.batch import worker_context
+from utils.coord_store import CoordStore, ingest
+
+STRUCT_EXTS = {".cif", ".mmcif", ".pdb"}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Parse structures once into a memory-mapped coordinate store")
+    p.add_argument("--store", required=True, help="Store directory (created if missing)")
+    p.add_argument("--in-dir", action="append", required=True, help="Folder to scan (repeatable: models and references)")
+    p.add_argument("--pattern", default="**/*", help="Glob under each --in-dir (recursive by default)")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--prune", action="store_true", help="Drop stored files that are no longer matched")
+    p.add_argument("--parser", choices=["numpy", "ost"], default="numpy", help="utils.atom_site reader or OST LoadEntity")
+    return p.parse_args(argv)
+
+
+def is_structure(f: Path) -> bool:
+    return f.is_file() and Path(f.name.lower().removesuffix(".gz")).suffix in STRUCT_EXTS
+
+
+def parse_structure_ost(path: str) -> dict:
+    from ost import io
+
+    return atom_table(io.LoadEntity(path, format="auto"))
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    paths = sorted(f for d in args.in_dir for f in Path(d).glob(args.pattern) if is_structure(f))
+    use_ost = args.parser == "ost"
+    report = ingest(
+        paths,
+        args.store,
+        parse_structure_ost if use_ost else read_atom_site,
+        workers=args.workers,
+        prune=args.prune,
+        mp_context=worker_context(OST_PRELOAD if use_ost else ()) if args.workers > 1 else None,
+    )
+    for path, err in report.failed:
+        print(f"[WARN] {path}: {err}")
+
+    store = CoordStore(args.store)
+    mode = "rewrote" if report.rewritten else "appended to"
+    print(
+        f"[ok] {mode} {args.store}: files={len(store)} atoms={int(store.offsets[-1])} added={report.added} "
+        f"updated={report.updated} removed={report.removed} unchanged={report.unchanged} failed={len(report.failed)}"
+    )
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,37 +4,59 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from ost import io
-from ost.mol.alg.scoring_base import MMCIFPrep
+from postprocess_common import run_ost_batch  # also puts the repo root and 4_score on sys.path
+from ost_utils import load_complex_mmcif
+from utils.batch import add_batch_args, build_tasks, is_batch
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
-    p.add_argument("--in-cif", required=True)
-    p.add_argument("--out-dir", required=True)
+    p.add_argument("--in-cif", default="")
+    p.add_argument("--out-dir", default="")
     p.add_argument("--write-receptor", action="store_true")
     p.add_argument("--write-ligands", action="store_true")
-    return p.parse_args()
+    add_batch_args(p, default_pattern="*.cif")
+    return p.parse_args(argv)
 
 
-def main() -> int:
-    args = parse_args()
-    in_cif = Path(args.in_cif)
-    out_dir = Path(args.out_dir)
+def extract_one(in_cif: str, out_dir: str, write_receptor: bool = False, write_ligands: bool = False) -> None:
+    from ost import io
+
+    in_cif = Path(in_cif)
+    out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    ent, ligs = MMCIFPrep(str(in_cif), extract_nonpoly=True)
+    cx = load_complex_mmcif(in_cif, extract_nonpoly=True)
 
-    if args.write_receptor:
-        rec = ent.Select("polymer")
+    if write_receptor:
+        rec = cx.ent.Select("polymer")
         io.SaveMMCIF(rec, str(out_dir / f"{in_cif.stem}_receptor.cif"))
 
-    if args.write_ligands:
-        for i, lig in enumerate(ligs):
-            lv = lig.Select("ele != H")
-            io.SaveMMCIF(lv, str(out_dir / f"{in_cif.stem}_lig_{i:02d}_{lig.GetName()}.cif"))
+    if write_ligands:
+        for lig in cx.catalog:
+            io.SaveMMCIF(lig.heavy, str(out_dir / f"{in_cif.stem}_lig_{lig.index:02d}_{lig.resname}.cif"))
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    flags = {"write_receptor": args.write_receptor, "write_ligands": args.write_ligands}
+
+    if not args.out_dir and not args.manifest:
+        raise SystemExit("--out-dir is required unless the manifest provides out_dir")
+
+    if is_batch(args):
+        tasks = build_tasks(
+            args,
+            ["in_cif", "out_dir"],
+            lambda f: {"in_cif": str(f), "out_dir": args.out_dir},
+            extra=flags,
+        )
+        return run_ost_batch(extract_one, tasks, args, key_col="in_cif")
 
-    print(f"Done -> {out_dir}")
+    if not args.in_cif:
+        raise SystemExit("--in-cif is required (or use --manifest / --in-dir)")
+    extract_one(args.in_cif, args.out_dir, **flags)
+    print(f"Done -> {args.out_dir}")
     return 0
 
 
@@ -0,0 +1,179 @@
+# 3_postprocess_predictions/find_duplicate_models.py
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+import postprocess_common  # noqa: F401 - puts the repo root on sys.path
+from utils.atom_site import read_atom_site
+from utils.coord_store import CoordStore
+from utils.geometry import apply_transform, centroid, kabsch, rmsd
+
+STRUCT_EXTS = {".cif", ".mmcif", ".pdb"}
+WATER_RESNAMES = {"HOH", "WAT", "DOD"}
+DUP_FIELDS = ["target", "model", "representative", "status", "ca_rmsd", "lig_centroid_dist", "lig_rmsd", "fingerprint"]
+
+
+@dataclass(frozen=True)
+class ModelPrint:
+    name: str
+    fingerprint: str
+    ca: np.ndarray
+    lig: np.ndarray
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    d = sub.add_parser("detect")
+    d.add_argument("--pred-root", required=True)
+    d.add_argument("--out-csv", required=True)
+    d.add_argument("--quantum", type=float, default=0.01, help="Coordinate grid (A) used for the exact hash")
+    d.add_argument("--ca-tol", type=float, default=0.1, help="Max superposed CA RMSD (A) for a near duplicate")
+    d.add_argument("--lig-tol", type=float, default=0.1, help="Max ligand centroid shift / RMSD (A) for a near duplicate")
+    d.add_argument("--store", default="", help="Coordinate store (build_coord_store.py); current files are read from it")
+
+    e = sub.add_parser("expand")
+    e.add_argument("--dup-csv", required=True)
+    e.add_argument("--results-csv", required=True)
+    e.add_argument("--out-csv", required=True)
+    e.add_argument("--target-col", default="target")
+    e.add_argument("--model-col", default="model")
+    return p.parse_args(argv)
+
+
+def table_arrays(table: dict[str, np.ndarray]) -> tuple[np.ndarray, list[str], np.ndarray, np.ndarray]:
+    """Coordinates, element:name labels, protein CA and ligand (non-water HETATM) coordinates."""
+    water = np.isin(np.char.upper(table["resname"]), [w.encode() for w in WATER_RESNAMES])
+    is_lig = table["hetatm"] & ~water
+    coords = np.asarray(table["xyz"], dtype=np.float64)
+    labels = [f"{e}:{n}" for e, n in zip(np.char.decode(table["element"]), np.char.decode(table["name"]))]
+    ca = coords[(table["name"] == b"CA") & ~is_lig]
+    return coords, labels, ca, coords[is_lig]
+
+
+def fingerprint_model(path: Path, quantum: float, store: Optional[CoordStore] = None) -> ModelPrint:
+    if store is not None and store.is_current(path):
+        coords, labels, ca, lig = table_arrays(store.table(path))
+    else:
+        coords, labels, ca, lig = table_arrays(read_atom_site(path))
+    h = hashlib.sha1()
+    h.update("|".join(labels).encode())
+    h.update(np.rint(coords / quantum).astype(np.int64).tobytes())
+    return ModelPrint(name=path.name, fingerprint=h.hexdigest(), ca=ca, lig=lig)
+
+
+def compare_near(mp: ModelPrint, rep: ModelPrint) -> tuple[float, float, float] | None:
+    if len(mp.ca) == 0 or mp.ca.shape != rep.ca.shape or mp.lig.shape != rep.lig.shape:
+        return None
+    rot, trans = kabsch(mp.ca, rep.ca)
+    ca_rmsd = rmsd(apply_transform(mp.ca, rot, trans), rep.ca)
+    if len(mp.lig) == 0:
+        return ca_rmsd, 0.0, 0.0
+    lig = apply_transform(mp.lig, rot, trans)
+    return ca_rmsd, float(np.linalg.norm(centroid(lig) - centroid(rep.lig))), rmsd(lig, rep.lig)
+
+
+def detect_target(target_dir: Path, args: argparse.Namespace, store: Optional[CoordStore] = None) -> list[dict]:
+    models = sorted(f for f in target_dir.iterdir() if f.is_file() and f.suffix.lower() in STRUCT_EXTS)
+    reps: list[ModelPrint] = []
+    rows = []
+    for f in models:
+        mp = fingerprint_model(f, args.quantum, store)
+        row = {"target": target_dir.name, "model": f.name, "representative": f.name, "status": "unique",
+               "ca_rmsd": "", "lig_centroid_dist": "", "lig_rmsd": "", "fingerprint": mp.fingerprint}
+        for rep in reps:
+            if rep.fingerprint == mp.fingerprint:
+                row.update(representative=rep.name, status="exact", ca_rmsd=0.0, lig_centroid_dist=0.0, lig_rmsd=0.0)
+                break
+            near = compare_near(mp, rep)
+            if near is None:
+                continue
+            ca_rmsd, lig_dist, lig_rmsd = near
+            if ca_rmsd <= args.ca_tol and lig_dist <= args.lig_tol and lig_rmsd <= args.lig_tol:
+                row.update(representative=rep.name, status="near", ca_rmsd=ca_rmsd,
+                           lig_centroid_dist=lig_dist, lig_rmsd=lig_rmsd)
+                break
+        if row["status"] == "unique":
+            reps.append(mp)
+        rows.append(row)
+    return rows
+
+
+def run_detect(args: argparse.Namespace) -> int:
+    pred_root = Path(args.pred_root)
+    store = CoordStore(args.store) if args.store else None
+    rows = []
+    for target_dir in sorted(p for p in pred_root.iterdir() if p.is_dir()):
+        try:
+            rows.extend(detect_target(target_dir, args, store))
+        except Exception as e:
+            print(f"[WARN] {target_dir.name}: {e}")
+
+    out = Path(args.out_csv)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=DUP_FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+
+    n_exact = sum(r["status"] == "exact" for r in rows)
+    n_near = sum(r["status"] == "near" for r in rows)
+    print(f"Models={len(rows)} exact_dups={n_exact} near_dups={n_near} to_score={len(rows) - n_exact - n_near}")
+    print(f"Wrote -> {out}")
+    return 0
+
+
+def run_expand(args: argparse.Namespace) -> int:
+    with open(args.dup_csv, newline="") as f:
+        dups = [r for r in csv.DictReader(f) if r["status"] != "unique"]
+    with open(args.results_csv, newline="") as f:
+        reader = csv.DictReader(f)
+        fields = list(reader.fieldnames or [])
+        results = list(reader)
+
+    by_key: dict[tuple[str, str], list[dict]] = {}
+    for r in results:
+        by_key.setdefault((r[args.target_col], r[args.model_col]), []).append(r)
+
+    copied, missing = 0, 0
+    for d in dups:
+        src = by_key.get((d["target"], d["representative"]))
+        if not src:
+            missing += 1
+            continue
+        for r in src:
+            results.append({**r, args.model_col: d["model"], "duplicate_of": d["representative"]})
+            copied += 1
+
+    if "duplicate_of" not in fields:
+        fields.append("duplicate_of")
+
+    out = Path(args.out_csv)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fields, restval="")
+        w.writeheader()
+        w.writerows(results)
+
+    print(f"Copied {copied} rows from representatives (missing representatives: {missing})")
+    print(f"Wrote -> {out}")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.cmd == "detect":
+        return run_detect(args)
+    return run_expand(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,23 +4,47 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from ost import io
+from postprocess_common import run_ost_batch  # also puts the repo root and 4_score on sys.path
+from utils.batch import add_batch_args, build_tasks, is_batch
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
-    p.add_argument("--in-struct", required=True)
-    p.add_argument("--out-cif", required=True)
-    return p.parse_args()
+    p.add_argument("--in-struct", default="")
+    p.add_argument("--out-cif", default="")
+    p.add_argument("--out-dir", default="", help="Batch mode: write <stem>.cif here")
+    add_batch_args(p, default_pattern="*.cif")
+    return p.parse_args(argv)
 
 
-def main() -> int:
-    args = parse_args()
-    ent = io.LoadEntity(str(args.in_struct), format="auto")
+def normalize_one(in_struct: str, out_cif: str) -> Path:
+    from ost import io
+
+    ent = io.LoadEntity(str(in_struct), format="auto")
     v = ent.Select("ele != H")
-    out = Path(args.out_cif)
+    out = Path(out_cif)
     out.parent.mkdir(parents=True, exist_ok=True)
     io.SaveMMCIF(v, str(out))
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    if is_batch(args):
+        if args.in_dir and not args.out_dir:
+            raise SystemExit("--in-dir requires --out-dir")
+        out_dir = Path(args.out_dir)
+        tasks = build_tasks(
+            args,
+            ["in_struct", "out_cif"],
+            lambda f: {"in_struct": str(f), "out_cif": str(out_dir / f"{f.stem}.cif")},
+        )
+        return run_ost_batch(normalize_one, tasks, args, key_col="in_struct")
+
+    if not (args.in_struct and args.out_cif):
+        raise SystemExit("--in-struct and --out-cif are required (or use --manifest / --in-dir)")
+    out = normalize_one(args.in_struct, args.out_cif)
     print(f"Saved -> {out}")
     return 0
 
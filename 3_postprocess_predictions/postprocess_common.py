@@ -0,0 +1,26 @@
+# 3_postprocess_predictions/postprocess_common.py
+"""Set-up shared by the postprocess scripts.
+
+Importing this module puts the repo root (for ``utils``) and ``4_score`` (for
+``ost_utils``) on ``sys.path``, so a script can run standalone without installing
+anything. :func:`run_ost_batch` is the batch entry point of the OST-based scripts.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for _p in (REPO_ROOT, REPO_ROOT / "4_score"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from ost_utils import OST_PRELOAD, warm_compound_lib  # noqa: E402
+from utils.batch import run_batch_cli  # noqa: E402
+
+
+def run_ost_batch(fn: Callable[..., Any], tasks: list[dict[str, Any]], args: argparse.Namespace, *, key_col: str) -> int:
+    """:func:`utils.batch.run_batch_cli` with workers forked from an OST-preloaded forkserver."""
+    return run_batch_cli(fn, tasks, args, key_col=key_col, initializer=warm_compound_lib, preload=OST_PRELOAD)
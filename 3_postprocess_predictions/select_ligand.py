@@ -7,7 +7,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from ost.mol.alg.scoring_base import MMCIFPrep
+from postprocess_common import run_ost_batch  # also puts the repo root and 4_score on sys.path
+from ost_utils import LigandEntry, load_complex_mmcif
+from utils.batch import add_batch_args, build_tasks, is_batch
 
 
 @dataclass(frozen=True)
@@ -18,44 +20,31 @@ class LigandPick:
     resname: str
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
-    p.add_argument("--ref-cif", required=True)
-    p.add_argument("--out-json", required=True)
+    p.add_argument("--ref-cif", default="")
+    p.add_argument("--out-json", default="")
+    p.add_argument("--out-dir", default="", help="Batch mode: write <stem>.json here")
     p.add_argument("--allow-multiple", action="store_true")
     p.add_argument("--exclude-resnames", default="HOH,WAT,DOD")
-    return p.parse_args()
+    add_batch_args(p, default_pattern="*.cif")
+    return p.parse_args(argv)
 
 
-def residue_to_pick(res) -> LigandPick:
-    num = res.GetNumber()
-    return LigandPick(
-        chain=res.GetChain().GetName(),
-        resnum=int(num.GetNum()),
-        ins_code=str(num.GetInsCode() or ""),
-        resname=str(res.GetName()),
-    )
+def entry_to_pick(e: LigandEntry) -> LigandPick:
+    return LigandPick(chain=e.chain, resnum=e.resnum, ins_code=e.ins, resname=str(e.resname))
 
 
-def main() -> int:
-    args = parse_args()
-    exclude = {x.strip().upper() for x in args.exclude_resnames.split(",") if x.strip()}
-
-    ent, ligs = MMCIFPrep(str(args.ref_cif), extract_nonpoly=True)
-    picks = [residue_to_pick(r) for r in ligs if r.GetName().upper() not in exclude]
-
-    if not picks:
+def select_one(ref_cif: str, out_json: str, allow_multiple: bool = False, exclude: frozenset[str] = frozenset()) -> Path:
+    cx = load_complex_mmcif(ref_cif, extract_nonpoly=True, exclude_resnames=exclude)
+    if not len(cx.catalog):
         raise RuntimeError("No ligands found after exclusions.")
 
-    if not args.allow_multiple:
-        def atom_count(p: LigandPick) -> int:
-            sel = ent.Select(f"cname={p.chain} and rnum={p.resnum}")
-            return sel.GetAtomCount()
-
-        picks = [max(picks, key=atom_count)]
+    entries = list(cx.catalog) if allow_multiple else [cx.catalog.largest()]
+    picks = [entry_to_pick(e) for e in entries]
 
     out: dict[str, Any] = {
-        "ref_cif": str(Path(args.ref_cif)),
+        "ref_cif": str(Path(ref_cif)),
         "ligands": [
             {
                 "chain": p.chain,
@@ -68,9 +57,32 @@ def main() -> int:
         ],
     }
 
-    out_path = Path(args.out_json)
+    out_path = Path(out_json)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(out, indent=2))
+    return out_path
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    exclude = frozenset(x.strip().upper() for x in args.exclude_resnames.split(",") if x.strip())
+    opts = {"allow_multiple": args.allow_multiple, "exclude": exclude}
+
+    if is_batch(args):
+        if args.in_dir and not args.out_dir:
+            raise SystemExit("--in-dir requires --out-dir")
+        out_dir = Path(args.out_dir)
+        tasks = build_tasks(
+            args,
+            ["ref_cif", "out_json"],
+            lambda f: {"ref_cif": str(f), "out_json": str(out_dir / f"{f.stem}.json")},
+            extra=opts,
+        )
+        return run_ost_batch(select_one, tasks, args, key_col="ref_cif")
+
+    if not (args.ref_cif and args.out_json):
+        raise SystemExit("--ref-cif and --out-json are required (or use --manifest / --in-dir)")
+    out_path = select_one(args.ref_cif, args.out_json, **opts)
     print(f"Wrote -> {out_path}")
     return 0
 
@@ -0,0 +1,15 @@
+# 4_score/ost_preload.py
+# Imported once by the batch forkserver (ost_utils.OST_PRELOAD, utils.batch.worker_context):
+# pulls in the OST modules the postprocess/scoring scripts use and loads the compound
+# library, so every forked worker starts with them already in shared memory.
+from __future__ import annotations
+
+from ost import io  # noqa: F401
+from ost.mol.alg import qsscore, superpose  # noqa: F401
+from ost.mol.alg.ligand_scoring_lddtpli import LDDTPLIScorer  # noqa: F401
+from ost.mol.alg.ligand_scoring_scrmsd import SCRMSDScorer  # noqa: F401
+from ost.mol.alg.scoring_base import MMCIFPrep  # noqa: F401
+
+from ost_utils import warm_compound_lib
+
+warm_compound_lib()
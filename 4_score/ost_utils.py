@@ -1,46 +1,309 @@
 # 4_score/ost_utils.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Optional, Union
 
-import ost
-from ost.mol.alg.scoring_base import MMCIFPrep
+# OST is imported inside the functions that need it so importing this module (and the
+# scripts that use it) stays cheap, e.g. for --help or when dispatched in-process.
+if TYPE_CHECKING:
+    import ost
+
+# Modules the batch forkserver imports once (see ost_preload.py) before forking workers.
+OST_PRELOAD = ("ost_utils", "ost_preload")
+
+ResKey = tuple[str, int, str]
+HYDROGENS = {"H", "D"}
+
+
+def res_key_of(res) -> ResKey:
+    """(chain, resnum, ins) of an OST residue, matching ``utils.coords.res_key``."""
+    num = res.GetNumber()
+    return res.GetChain().GetName(), int(num.GetNum()), str(num.GetInsCode() or "").strip("\0 ")
+
+
+def _entity_handle(ent):
+    from ost import mol
+
+    return ent.handle if isinstance(ent, mol.EntityView) else ent
+
+
+def view_from_atoms(ent, atoms: Iterable):
+    """View of ``ent`` holding exactly ``atoms`` (handles), without a query string."""
+    from ost import mol
+
+    view = _entity_handle(ent).CreateEmptyView()
+    for a in atoms:
+        view.AddAtom(a.handle if isinstance(a, mol.AtomView) else a)
+    return view
+
+
+def heavy_atoms(res) -> list:
+    return [a for a in res.atoms if a.GetElement().upper() not in HYDROGENS]
+
+
+class ResidueIndex:
+    """(chain, resnum, ins) -> residue handle of one entity, built once.
+
+    Replaces ``cname=A and rnum=12 or ...`` selections: residues are looked up by key
+    and views are assembled from their atom handles, so nothing is parsed or evaluated
+    against the whole entity.
+    """
+
+    __slots__ = ("ent", "residues")
+
+    def __init__(self, ent) -> None:
+        self.ent = _entity_handle(ent)
+        self.residues: dict[ResKey, Any] = {res_key_of(r): r for r in self.ent.residues}
+
+    def __len__(self) -> int:
+        return len(self.residues)
+
+    def __contains__(self, key: ResKey) -> bool:
+        return key in self.residues
+
+    def lookup(self, residues: Iterable[Union[ResKey, Mapping]]) -> list:
+        """Handles of the given keys or residue dicts (pocket / ligand JSON entries); missing ones are skipped."""
+        from utils.coords import res_key
+
+        out = []
+        for r in residues:
+            hit = self.residues.get(r if isinstance(r, tuple) else res_key(r))
+            if hit is not None:
+                out.append(hit)
+        return out
+
+    def view(
+        self,
+        residues: Iterable[Union[ResKey, Mapping]],
+        atom_names: Optional[Iterable[str]] = None,
+        heavy_only: bool = True,
+    ):
+        """View of the given residues, restricted to ``atom_names`` (e.g. ``["CA"]``) if set."""
+        names = set(atom_names) if atom_names is not None else None
+        atoms = []
+        for res in self.lookup(residues):
+            for a in heavy_atoms(res) if heavy_only else res.atoms:
+                if names is None or a.GetName() in names:
+                    atoms.append(a)
+        return view_from_atoms(self.ent, atoms)
+
+    def residues_within(self, centers: Iterable, radius: float, protein_only: bool = True) -> list:
+        """Distinct residues with a heavy atom within ``radius`` of any of the ``centers`` atoms, in entity order."""
+        hits: set[ResKey] = set()
+        for c in centers:
+            for a in self.ent.FindWithin(c.GetPos(), radius):
+                if a.GetElement().upper() in HYDROGENS:
+                    continue
+                res = a.GetResidue()
+                if protein_only and not res.IsPeptideLinking():
+                    continue
+                hits.add(res_key_of(res))
+        return [r for k, r in self.residues.items() if k in hits]
+
+
+class LigandEntry:
+    """One ligand residue with its heavy-atom view and derived properties computed once."""
+
+    __slots__ = ("index", "residue", "heavy", "n_heavy", "centroid", "chain", "resnum", "ins", "resname")
+
+    def __init__(self, index: int, residue) -> None:
+        num = residue.GetNumber()
+        self.index = index
+        self.residue = residue
+        self.heavy = view_from_atoms(residue.GetEntity(), heavy_atoms(residue))
+        self.n_heavy = self.heavy.GetAtomCount()
+        c = self.heavy.GetCenterOfAtoms() if self.n_heavy else None
+        self.centroid = (c[0], c[1], c[2]) if c is not None else None
+        self.chain = residue.GetChain().GetName()
+        self.resnum = int(num.GetNum())
+        self.ins = str(num.GetInsCode() or "")
+        self.resname = residue.GetName()
+
+    def to_id(self) -> dict[str, Any]:
+        return {
+            "chain": self.chain,
+            "resnum": self.resnum,
+            "ins": self.ins,
+            "resname": self.resname,
+            "n_atoms": self.n_heavy,
+        }
+
+
+class LigandCatalog:
+    """Scorable ligands of one complex: excluded resnames and H-only residues are dropped.
+
+    Build it once per loaded complex and hand ``views`` to every scorer instead of
+    re-selecting heavy atoms per scorer.
+    """
+
+    __slots__ = ("entries", "views")
+
+    def __init__(self, ligs: Iterable, exclude_resnames: Iterable[str] = ()) -> None:
+        exclude = {x.upper() for x in exclude_resnames}
+        entries = []
+        for i, r in enumerate(ligs):
+            if r.GetName().upper() in exclude:
+                continue
+            e = LigandEntry(i, r)
+            if e.n_heavy == 0:
+                continue
+            entries.append(e)
+        self.entries: list[LigandEntry] = entries
+        self.views = [e.heavy for e in entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[LigandEntry]:
+        return iter(self.entries)
+
+    def __getitem__(self, i: int) -> LigandEntry:
+        return self.entries[i]
+
+    @property
+    def residues(self) -> list:
+        return [e.residue for e in self.entries]
+
+    def largest(self) -> LigandEntry:
+        if not self.entries:
+            raise RuntimeError("No ligands found after exclusions.")
+        return max(self.entries, key=lambda e: e.n_heavy)
 
 
 @dataclass(frozen=True)
 class LoadedComplex:
     ent: ost.mol.EntityHandle
     ligands: list
+    catalog: LigandCatalog
+
+
+_COMPOUND_LIB_LOADED = False
+
+
+def warm_compound_lib() -> None:
+    """Load the default compound library once per process (batch pool initializer).
 
+    A no-op in workers forked from a forkserver that ran ``ost_preload``: they inherit
+    the loaded library along with this flag. Without a forkserver it loads as before.
+    """
+    global _COMPOUND_LIB_LOADED
+    if _COMPOUND_LIB_LOADED:
+        return
+    from ost import conop
+
+    conop.GetDefaultLib()
+    _COMPOUND_LIB_LOADED = True
+
+
+def load_complex_mmcif(
+    path: str | Path,
+    extract_nonpoly: bool = True,
+    exclude_resnames: Iterable[str] = (),
+) -> LoadedComplex:
+    from ost.mol.alg.scoring_base import MMCIFPrep
 
-def load_complex_mmcif(path: str | Path, extract_nonpoly: bool = True) -> LoadedComplex:
     ent, ligs = MMCIFPrep(str(path), extract_nonpoly=extract_nonpoly)
-    return LoadedComplex(ent=ent, ligands=list(ligs))
+    ligs = list(ligs)
+    return LoadedComplex(ent=ent, ligands=ligs, catalog=LigandCatalog(ligs, exclude_resnames))
+
+
+def atom_table(ent) -> dict[str, Any]:
+    """Heavy-atom table (``utils.coords`` layout) of an OST entity or view."""
+    from utils.coords import make_table
+
+    cols: dict[str, list] = {k: [] for k in ("xyz", "chain", "resnum", "ins", "resname", "name", "element", "hetatm")}
+    for res in ent.residues:
+        num = res.GetNumber()
+        chain, resnum, resname = res.GetChain().GetName(), int(num.GetNum()), res.GetName()
+        ins = str(num.GetInsCode() or "").strip("\0 ")
+        for a in res.atoms:
+            element = a.GetElement().upper()
+            if element in {"H", "D"}:
+                continue
+            p = a.GetPos()
+            cols["xyz"].append((p[0], p[1], p[2]))
+            cols["chain"].append(chain)
+            cols["resnum"].append(resnum)
+            cols["ins"].append(ins)
+            cols["resname"].append(resname)
+            cols["name"].append(a.GetName())
+            cols["element"].append(element)
+            cols["hetatm"].append(a.is_hetatom)
+    return make_table(**cols)
 
 
 def ligand_residue_to_id(res) -> dict[str, Any]:
-    num = res.GetNumber()
-    return {
-        "chain": res.GetChain().GetName(),
-        "resnum": int(num.GetNum()),
-        "ins": str(num.GetInsCode() or ""),
-        "resname": res.GetName(),
-        "n_atoms": res.Select("ele != H").GetAtomCount(),
-    }
+    return LigandEntry(0, res).to_id()
 
 
 def filter_ligands(ligs: list, exclude_resnames: set[str]) -> list:
-    out = []
-    for r in ligs:
-        if r.GetName().upper() in exclude_resnames:
-            continue
-        if r.Select("ele != H").GetAtomCount() == 0:
-            continue
-        out.append(r)
-    return out
+    return LigandCatalog(ligs, exclude_resnames).residues
 
 
 def pick_largest_ligand(ligs: list):
-    return max(ligs, key=lambda r: r.Select("ele != H").GetAtomCount())
+    return LigandCatalog(ligs).largest().residue
+
+
+def polymer_chains(ent) -> list[str]:
+    """Names of the chains holding peptide- or nucleotide-linking residues."""
+    return [
+        ch.GetName()
+        for ch in ent.chains
+        if any(r.IsPeptideLinking() or r.IsNucleotideLinking() for r in ch.residues)
+    ]
+
+
+# QS recorded for monomer vs monomer pairs: neither side has an interface, so the
+# comparison is trivially perfect (the value the evalspreadsheets hold for them).
+TRIVIAL_QS = 1.0
+
+
+def qs_is_trivial(n_ref_chains: int, n_mdl_chains: int) -> bool:
+    return n_ref_chains <= 1 and n_mdl_chains <= 1
+
+
+def ca_table(ent) -> dict[str, Any]:
+    """Atom table of the CA atoms only (enough for ``utils.res_map``)."""
+    index = ResidueIndex(ent)
+    return atom_table(index.view(index.residues, ["CA"]))
+
+
+def _ligand_atoms(cx: LoadedComplex) -> list:
+    return [a for e in cx.catalog for a in e.heavy.atoms]
+
+
+def crop_pair(
+    mdl: LoadedComplex,
+    trg: LoadedComplex,
+    radius: float,
+    keep: Iterable[Union[ResKey, Mapping]] = (),
+    mapping: Optional[Mapping[ResKey, ResKey]] = None,
+) -> tuple[LoadedComplex, LoadedComplex]:
+    """Copies of a model/reference pair whose entities hold only the residues near the ligands.
+
+    Reference residues within ``radius`` of a reference ligand, plus ``keep`` (e.g. the
+    pocket residues used for superposition), are kept together with their model
+    counterparts from ``mapping`` (reference key -> model key; identical keys if None).
+    Model residues near a model ligand are kept too (with their reference counterparts),
+    so contacts of a misplaced ligand still count. Ligands are untouched.
+    """
+    from ost import mol
+    from utils.coords import res_key
+
+    ref_idx, mdl_idx = ResidueIndex(trg.ent), ResidueIndex(mdl.ent)
+    to_mdl = dict(mapping) if mapping is not None else {k: k for k in ref_idx.residues}
+    to_ref = {m: r for r, m in to_mdl.items()}
+
+    ref_keys = {res_key_of(r) for r in ref_idx.residues_within(_ligand_atoms(trg), radius, protein_only=False)}
+    ref_keys.update(k if isinstance(k, tuple) else res_key(k) for k in keep)
+    mdl_keys = {res_key_of(r) for r in mdl_idx.residues_within(_ligand_atoms(mdl), radius, protein_only=False)}
+    mdl_keys.update(to_mdl[k] for k in ref_keys if k in to_mdl)
+    ref_keys.update(to_ref[k] for k in mdl_keys if k in to_ref)
+
+    def cropped(cx: LoadedComplex, index: ResidueIndex, keys: set[ResKey]) -> LoadedComplex:
+        ordered = [k for k in index.residues if k in keys]
+        return replace(cx, ent=mol.CreateEntityFromView(index.view(ordered, heavy_only=False), True))
+
+    return cropped(mdl, mdl_idx, mdl_keys), cropped(trg, ref_idx, ref_keys)
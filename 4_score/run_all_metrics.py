@@ -4,92 +4,366 @@ from __future__ import annotations
 import argparse
 import csv
 import json
+import sys
+import time
+from collections import Counter
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Callable, Iterable, Optional
 
-from ost import io
-from ost.mol.alg import qsscore, superpose
-from ost.mol.alg.ligand_scoring_lddtpli import LDDTPLIScorer
-from ost.mol.alg.ligand_scoring_scrmsd import SCRMSDScorer
+# Allow running as a standalone script without installing as a package.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for _p in (REPO_ROOT, REPO_ROOT / "4_score"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
 
-from ost_utils import filter_ligands, load_complex_mmcif
+from ost_utils import (  # noqa: E402
+    OST_PRELOAD,
+    TRIVIAL_QS,
+    LoadedComplex,
+    atom_table,
+    ca_table,
+    crop_pair,
+    load_complex_mmcif,
+    polymer_chains,
+    qs_is_trivial,
+    warm_compound_lib,
+)
+from utils.batch import add_batch_args, build_tasks, is_batch, run_batch_cli  # noqa: E402
+from utils.coords import atom_index, paired_atoms  # noqa: E402
+from utils.geometry import superposed_rmsd  # noqa: E402
+from utils.limits import run_limited  # noqa: E402
+from utils.res_map import add_residue_map_args, residue_map  # noqa: E402
+from utils.schedule import estimate_costs, longest_first, pair_features, read_timings, simulated_makespan  # noqa: E402
+from utils.shared_ref import SharedHandle, SharedRefs, attach  # noqa: E402
 
+# SCRMSD superposes on reference residues within 4 A of the ligand and lDDT-PLI looks
+# 6 A out with thresholds up to 4 A; a crop must keep everything those can reach.
+MIN_CROP_RADIUS = 10.0
 
-def parse_args() -> argparse.Namespace:
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
-    p.add_argument("--pred-cif", required=True)
-    p.add_argument("--ref-cif", required=True)
-    p.add_argument("--out-csv", required=True)
+    p.add_argument("--pred-cif", default="")
+    p.add_argument("--ref-cif", default="")
+    p.add_argument("--out-csv", default="")
     p.add_argument("--exclude-resnames", default="HOH,WAT,DOD")
     p.add_argument("--substructure-match", action="store_true")
     p.add_argument("--pocket-json", default="")
     p.add_argument("--binding-site-json", default="")
-    return p.parse_args()
+    p.add_argument("--ref-dir", default="", help="Batch mode: reference is <ref-dir>/<target>.cif")
+    p.add_argument("--pocket-dir", default="", help="Batch mode: pocket JSON is <pocket-dir>/<target>.json")
+    p.add_argument("--binding-site-dir", default="", help="Batch mode: binding-site JSON is <binding-site-dir>/<target>.json")
+    p.add_argument("--out-dir", default="", help="Batch mode: write <out-dir>/<target>/<model>.csv")
+    p.add_argument(
+        "--crop-radius",
+        type=float,
+        default=0.0,
+        help=f"Score ligands on residues within this many A of the ligands (0 = whole entities; >= {MIN_CROP_RADIUS:g} advised)",
+    )
+    p.add_argument("--crop-compare", action="store_true", help="With --crop-radius, also score whole entities and report both")
+    p.add_argument("--always-qs", action="store_true", help="Run QSScorer even for monomer vs monomer pairs")
+    p.add_argument(
+        "--metric-timeout",
+        type=float,
+        default=0.0,
+        help="Wall-clock limit in s per metric (SCRMSD, lDDT-PLI, QS); a pair over it is recorded as timeout (0 = none)",
+    )
+    p.add_argument("--metric-mem-mb", type=float, default=0.0, help="Memory a metric may add on top of the loaded pair, in MB (0 = none)")
+    p.add_argument(
+        "--timing-log",
+        action="append",
+        default=[],
+        help="Batch mode: earlier status CSV whose times feed the cost model (repeatable; the existing --status-csv is always read)",
+    )
+    add_residue_map_args(p)
+    add_batch_args(p, default_pattern="*/*.cif")
+    return p.parse_args(argv)
 
 
-def ca_sel(res: dict) -> str:
-    return f"cname={res['chain']} and rnum={int(res['resnum'])} and aname=CA"
+def ca_rmsd(pred: dict, ref: dict, residues: list[dict], mapping: Optional[dict] = None) -> float | str:
+    """Superposed CA RMSD over the listed (reference) residues present in both atom tables ("" if < 3)."""
+    rows_p, rows_r = paired_atoms(atom_index(pred), atom_index(ref), residues, mapping)
+    if len(rows_p) < 3:
+        return ""
+    return superposed_rmsd(pred["xyz"][rows_p], ref["xyz"][rows_r])
 
 
-def ca_rmsd(pred_ent, ref_ent, residues: list[dict]) -> float:
-    sel_expr = " or ".join([ca_sel(r) for r in residues])
-    pv = pred_ent.Select(sel_expr)
-    rv = ref_ent.Select(sel_expr)
-    sp = superpose.SuperposeSVD(pv, rv)
-    return float(sp.rmsd)
+def load_ref_table(ref_cif: str, exclude: frozenset[str] = frozenset()) -> dict:
+    return atom_table(load_complex_mmcif(ref_cif, extract_nonpoly=True, exclude_resnames=exclude).ent)
 
 
-def main() -> int:
-    args = parse_args()
-    exclude = {x.strip().upper() for x in args.exclude_resnames.split(",") if x.strip()}
+def ligand_metrics(
+    mdl: LoadedComplex, trg: LoadedComplex, substructure_match: bool = False
+) -> dict[str, Callable[[], float]]:
+    """BiSyRMSD and lDDT-PLI of the first assigned ligand pair, one callable per metric."""
 
-    mdl = load_complex_mmcif(args.pred_cif, extract_nonpoly=True)
-    trg = load_complex_mmcif(args.ref_cif, extract_nonpoly=True)
+    def bisyrmsd() -> float:
+        from ost.mol.alg.ligand_scoring_scrmsd import SCRMSDScorer
 
-    mdl_ligs = filter_ligands(mdl.ligands, exclude)
-    trg_ligs = filter_ligands(trg.ligands, exclude)
+        scr = SCRMSDScorer(
+            mdl.ent,
+            trg.ent,
+            mdl.catalog.views,
+            trg.catalog.views,
+            substructure_match=bool(substructure_match),
+        )
+        trg_i, mdl_i = scr.assignment[0]
+        return float(scr.score_matrix[trg_i, mdl_i])
 
-    scr = SCRMSDScorer(
-        mdl.ent,
-        trg.ent,
-        [r.Select("ele != H") for r in mdl_ligs],
-        [r.Select("ele != H") for r in trg_ligs],
-        substructure_match=bool(args.substructure_match),
-    )
-    trg_i, mdl_i = scr.assignment[0]
-    bisyrmsd = float(scr.score_matrix[trg_i, mdl_i])
-
-    pli = LDDTPLIScorer(
-        mdl.ent,
-        trg.ent,
-        [r.Select("ele != H") for r in mdl_ligs],
-        [r.Select("ele != H") for r in trg_ligs],
-        substructure_match=bool(args.substructure_match),
-    )
-    trg_i2, mdl_i2 = pli.assignment[0]
-    lddt_pli = float(pli.score_matrix[trg_i2, mdl_i2])
+    def lddt_pli() -> float:
+        from ost.mol.alg.ligand_scoring_lddtpli import LDDTPLIScorer
+
+        pli = LDDTPLIScorer(
+            mdl.ent,
+            trg.ent,
+            mdl.catalog.views,
+            trg.catalog.views,
+            substructure_match=bool(substructure_match),
+        )
+        trg_i, mdl_i = pli.assignment[0]
+        return float(pli.score_matrix[trg_i, mdl_i])
+
+    return {"BiSyRMSD": bisyrmsd, "LDDT_PLI": lddt_pli}
+
+
+def run_metrics(
+    metrics: dict[str, Callable[[], object]],
+    timeout: float = 0.0,
+    mem_mb: float = 0.0,
+    over: Optional[dict[str, str]] = None,
+) -> dict:
+    """Each metric in a forked child under the limits (inline without limits).
+
+    A metric over a limit is left blank and recorded in ``over`` as ``name -> timeout|memory``;
+    an exception inside a metric still fails the pair.
+    """
+    row: dict = {}
+    for name, fn in metrics.items():
+        res = run_limited(fn, timeout, mem_mb)
+        if res.status == "error":
+            raise RuntimeError(f"{name}: {res.message}")
+        row[name] = res.value if res.status == "ok" else ""
+        if res.status != "ok" and over is not None:
+            over[name] = res.status
+    return row
+
+
+def load_residues(path: str, key: str) -> list[dict]:
+    return json.loads(Path(path).read_text()).get(key, []) if path else []
+
+
+def score_pair(
+    pred_cif: str,
+    ref_cif: str,
+    out_csv: str,
+    exclude: frozenset[str] = frozenset(),
+    substructure_match: bool = False,
+    pocket_json: str = "",
+    binding_site_json: str = "",
+    ref_shared: Optional[SharedHandle] = None,
+    residue_map_dir: str = "",
+    engine: str = "",
+    same_numbering: bool = False,
+    crop_radius: float = 0.0,
+    crop_compare: bool = False,
+    always_qs: bool = False,
+    metric_timeout: float = 0.0,
+    metric_mem_mb: float = 0.0,
+) -> Path:
+    """Score one pair and write its CSV row.
+
+    Raises ``TimeoutError`` (``MemoryError``) after writing the row if a metric hit
+    ``metric_timeout`` (``metric_mem_mb``); its column is then blank.
+    """
+    from ost import io
+    from ost.mol.alg import qsscore
 
-    mdl_q = qsscore.QSEntity(io.LoadEntity(str(args.pred_cif), format="auto"))
-    ref_q = qsscore.QSEntity(io.LoadEntity(str(args.ref_cif), format="auto"))
-    qsres = qsscore.QSScorer(ref_q, mdl_q).Score()
-    qs_global = getattr(qsres, "qsματο_global", getattr(qsres, "qs_global", ""))
+    limits = {"timeout": metric_timeout, "mem_mb": metric_mem_mb}
+    over: dict[str, str] = {}
+    mdl = load_complex_mmcif(pred_cif, extract_nonpoly=True, exclude_resnames=exclude)
+    trg = load_complex_mmcif(ref_cif, extract_nonpoly=True, exclude_resnames=exclude)
+    pocket = load_residues(pocket_json, "pocket_residues")
+    bs = load_residues(binding_site_json, "binding_site_residues")
 
-    row = {"BiSyRMSD": bisyrmsd, "LDDT_PLI": lddt_pli, "QS_global": qs_global}
+    # Batch workers get the reference table from shared memory instead of rebuilding it
+    ref_tab = attach(ref_shared) if ref_shared is not None else None
+    mapping = None
+    if not same_numbering and (crop_radius > 0 or pocket_json or binding_site_json):
+        ref_seq = ref_tab if ref_tab is not None else ca_table(trg.ent)
+        mapping = residue_map(ref_seq, ca_table(mdl.ent), residue_map_dir, engine, Path(ref_cif).stem).pairs
 
-    if args.pocket_json:
-        pocket = json.loads(Path(args.pocket_json).read_text()).get("pocket_residues", [])
-        row["pocket_CA_RMSD"] = ca_rmsd(mdl.ent, trg.ent, pocket) if pocket else ""
+    full = (mdl, trg)
+    t0 = time.perf_counter()
+    if crop_radius > 0:
+        # Pocket / binding-site residues stay in so the CA superpositions are unchanged
+        mdl, trg = crop_pair(mdl, trg, crop_radius, keep=[*pocket, *bs], mapping=mapping)
+    row: dict = run_metrics(ligand_metrics(mdl, trg, substructure_match), **limits, over=over)
+    t_ligand = time.perf_counter() - t0
 
-    if args.binding_site_json:
-        bs = json.loads(Path(args.binding_site_json).read_text()).get("binding_site_residues", [])
-        row["binding_site_CA_RMSD"] = ca_rmsd(mdl.ent, trg.ent, bs) if bs else ""
+    # Monomer vs monomer (from the chain inventory of the loaded entities) needs no QSScorer
+    if not always_qs and qs_is_trivial(len(polymer_chains(full[1].ent)), len(polymer_chains(full[0].ent))):
+        row.update(QS_global=TRIVIAL_QS, QS_skipped=1)
+    else:
 
-    out_csv = Path(args.out_csv)
-    out_csv.parent.mkdir(parents=True, exist_ok=True)
-    with out_csv.open("w", newline="") as f:
+        def qs_global() -> object:
+            mdl_q = qsscore.QSEntity(io.LoadEntity(str(pred_cif), format="auto"))
+            ref_q = qsscore.QSEntity(io.LoadEntity(str(ref_cif), format="auto"))
+            return getattr(qsscore.QSScorer(ref_q, mdl_q).Score(), "qs_global", "")
+
+        row.update(run_metrics({"QS_global": qs_global}, **limits, over=over), QS_skipped=0)
+
+    if pocket_json or binding_site_json:
+        pred_tab = atom_table(mdl.ent)
+        if ref_tab is None:
+            ref_tab = atom_table(trg.ent)
+
+    if pocket_json:
+        row["pocket_CA_RMSD"] = ca_rmsd(pred_tab, ref_tab, pocket, mapping) if pocket else ""
+
+    if binding_site_json:
+        row["binding_site_CA_RMSD"] = ca_rmsd(pred_tab, ref_tab, bs, mapping) if bs else ""
+
+    if crop_radius > 0:
+        row.update(
+            crop_radius_A=crop_radius,
+            crop_ref_residues=trg.ent.GetResidueCount(),
+            crop_pred_residues=mdl.ent.GetResidueCount(),
+            ligand_s=round(t_ligand, 3),
+        )
+        if crop_compare:
+            # Full-entity numbers next to the cropped ones, to check they agree
+            t0 = time.perf_counter()
+            full_over: dict[str, str] = {}
+            scores = run_metrics(ligand_metrics(*full, substructure_match), **limits, over=full_over)
+            row.update({f"{k}_full": v for k, v in scores.items()})
+            over.update({f"{k}_full": v for k, v in full_over.items()})
+            row["ligand_full_s"] = round(time.perf_counter() - t0, 3)
+
+    if metric_timeout or metric_mem_mb:
+        row["limit_hit"] = ";".join(f"{k}={v}" for k, v in over.items())
+
+    out = Path(out_csv)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", newline="") as f:
         w = csv.DictWriter(f, fieldnames=list(row.keys()))
         w.writeheader()
         w.writerow(row)
+    if "timeout" in over.values():
+        raise TimeoutError(f"{row['limit_hit']} (limit {metric_timeout:g} s); partial row -> {out}")
+    if over:
+        raise MemoryError(f"{row['limit_hit']} (limit {metric_mem_mb:g} MB); partial row -> {out}")
+    return out
+
+
+def count_qs_skipped(out_csvs: Iterable[str]) -> int:
+    n = 0
+    for path in out_csvs:
+        if Path(path).exists():
+            with open(path, newline="") as f:
+                n += sum(r.get("QS_skipped") == "1" for r in csv.DictReader(f))
+    return n
+
+
+def pair_from_path(f: Path, args: argparse.Namespace) -> dict[str, str]:
+    """Batch task for <in-dir>/<target>/<model>.cif."""
+    target = f.parent.name
+    task = {
+        "pred_cif": str(f),
+        "ref_cif": str(Path(args.ref_dir) / f"{target}.cif"),
+        "out_csv": str(Path(args.out_dir) / target / f"{f.stem}.csv"),
+    }
+    if args.pocket_dir:
+        task["pocket_json"] = str(Path(args.pocket_dir) / f"{target}.json")
+    if args.binding_site_dir:
+        task["binding_site_json"] = str(Path(args.binding_site_dir) / f"{target}.json")
+    return task
+
+
+def schedule(tasks: list[dict], args: argparse.Namespace, exclude: frozenset[str], grouped: bool) -> list[dict]:
+    """Tasks longest-first by estimated cost (grouped by reference when refs are shared)."""
+    history = read_timings([args.status_csv, *args.timing_log])
+    ref_cache: dict[str, tuple[int, int]] = {}
+    features = [pair_features(t["pred_cif"], t["ref_cif"], ref_cache, exclude) for t in tasks]
+    costs = estimate_costs([t["pred_cif"] for t in tasks], features, history)
+    cost_of = {id(t): c for t, c in zip(tasks, costs)}
+    ordered = longest_first(tasks, costs, group=(lambda t: t["ref_cif"]) if grouped else None)
+    seen = sum(t["pred_cif"] in history for t in tasks)
+    if history:
+        total = sum(costs)
+        makespan = simulated_makespan((cost_of[id(t)] for t in ordered), args.workers)
+        print(
+            f"[ok] {len(tasks)} pairs longest-first ({seen} timed before): est. {total:.0f} s of work, "
+            f"~{makespan:.0f} s on {args.workers} workers (bound {total / args.workers:.0f} s)"
+        )
+    else:
+        print(f"[ok] {len(tasks)} pairs longest-first by size and ligand (no timing log yet)")
+    return ordered
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    exclude = frozenset(x.strip().upper() for x in args.exclude_resnames.split(",") if x.strip())
+    if 0 < args.crop_radius < MIN_CROP_RADIUS:
+        print(f"[WARN] --crop-radius {args.crop_radius:g} is below {MIN_CROP_RADIUS:g} A; ligand scores may differ from whole entities")
+    opts = {
+        "exclude": exclude,
+        "substructure_match": args.substructure_match,
+        "residue_map_dir": args.residue_map_dir,
+        "engine": args.engine,
+        "same_numbering": args.same_numbering,
+        "crop_radius": args.crop_radius,
+        "crop_compare": args.crop_compare,
+        "always_qs": args.always_qs,
+        "metric_timeout": args.metric_timeout,
+        "metric_mem_mb": args.metric_mem_mb,
+    }
+
+    if is_batch(args):
+        if args.in_dir and not (args.ref_dir and args.out_dir):
+            raise SystemExit("--in-dir requires --ref-dir and --out-dir")
+        tasks = build_tasks(
+            args,
+            ["pred_cif", "ref_cif", "out_csv"],
+            lambda f: pair_from_path(f, args),
+            extra=opts,
+            optional=["pocket_json", "binding_site_json"],
+        )
+        refs = None
+        if args.workers > 1 and any(t.get("pocket_json") or t.get("binding_site_json") for t in tasks):
+            # One shared reference table per target, freed once that target's models are scored
+            refs = SharedRefs(lambda ref: load_ref_table(ref, exclude), Counter(t["ref_cif"] for t in tasks))
+        if args.workers > 1:
+            tasks = schedule(tasks, args, exclude, grouped=refs is not None)
+        with refs or nullcontext():
+            rc = run_batch_cli(
+                score_pair,
+                tasks,
+                args,
+                key_col="pred_cif",
+                initializer=warm_compound_lib,
+                preload=OST_PRELOAD,
+                prepare=(lambda t: {"ref_shared": refs.acquire(t["ref_cif"])}) if refs else None,
+                finish=(lambda t: refs.release(t["ref_cif"])) if refs else None,
+                chunksize=1,
+            )
+        print(f"QS skipped (monomer vs monomer): {count_qs_skipped(t['out_csv'] for t in tasks)}/{len(tasks)}")
+        return rc
 
+    if not (args.pred_cif and args.ref_cif and args.out_csv):
+        raise SystemExit("--pred-cif, --ref-cif and --out-csv are required (or use --manifest / --in-dir)")
+    try:
+        out_csv = score_pair(
+            args.pred_cif,
+            args.ref_cif,
+            args.out_csv,
+            pocket_json=args.pocket_json,
+            binding_site_json=args.binding_site_json,
+            **opts,
+        )
+    except (TimeoutError, MemoryError) as e:
+        print(f"[WARN] {e}")
+        return 2
     print(f"Wrote -> {out_csv}")
     return 0
 
@@ -4,28 +4,60 @@ from __future__ import annotations
 import argparse
 import csv
 import json
+import sys
 from pathlib import Path
 
-from ost import io
-from ost.mol.alg import superpose
+# Allow running as a standalone script without installing as a package.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for _p in (REPO_ROOT, REPO_ROOT / "4_score"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
 
+from ost_utils import atom_table  # noqa: E402
+from utils.coords import atom_index, paired_atoms  # noqa: E402
+from utils.geometry import superposed_rmsd  # noqa: E402
+from utils.res_map import add_residue_map_args, residue_map  # noqa: E402
 
-def parse_args() -> argparse.Namespace:
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--pred-cif", required=True)
     p.add_argument("--ref-cif", required=True)
     p.add_argument("--binding-site-json", required=True)
     p.add_argument("--out-csv", required=True)
-    return p.parse_args()
+    add_residue_map_args(p)
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    from ost import io
+
+    pred = atom_table(io.LoadEntity(str(args.pred_cif), format="auto"))
+    ref = atom_table(io.LoadEntity(str(args.ref_cif), format="auto"))
+
+    bs = json.loads(Path(args.binding_site_json).read_text()).get("binding_site_residues", [])
+    if not bs:
+        raise RuntimeError("Binding-site residue set is empty.")
 
+    mapping = None
+    if not args.same_numbering:
+        mapping = residue_map(ref, pred, args.residue_map_dir, args.engine, Path(args.ref_cif).stem).pairs
+    rows_p, rows_r = paired_atoms(atom_index(pred), atom_index(ref), bs, mapping)
+    if len(rows_p) < 3:
+        raise RuntimeError(f"Only {len(rows_p)} of {len(bs)} binding-site CA atoms found in both structures.")
+    rmsd = superposed_rmsd(pred["xyz"][rows_p], ref["xyz"][rows_r])
 
-def res_sel(res: dict) -> str:
-    return f"cname={res['chain']} and rnum={int(res['resnum'])} and aname=CA"
+    out_csv = Path(args.out_csv)
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["binding_site_CA_RMSD", "n_atoms"])
+        w.writeheader()
+        w.writerow({"binding_site_CA_RMSD": rmsd, "n_atoms": len(rows_p)})
 
+    print(f"Wrote -> {out_csv}")
+    return 0
 
-def main() -> int:
-    args = parse_args()
-    pred = io.LoadEntity(str(args.pred_cif), format="auto")
-    ref = io.LoadEntity(str(args.ref_cif), format="auto")
 
-    bs = json.loads(Path(args.bindi
+if __name__ == "__main__":
+    raise SystemExit(main())
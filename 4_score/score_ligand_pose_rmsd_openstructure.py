@@ -3,38 +3,42 @@ from __future__ import annotations
 
 import argparse
 import csv
+import sys
 from pathlib import Path
 
-from ost.mol.alg.ligand_scoring_scrmsd import SCRMSDScorer
+# Allow running as a standalone script without installing as a package.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for _p in (REPO_ROOT, REPO_ROOT / "4_score"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
 
-from ost_utils import filter_ligands, load_complex_mmcif
+from ost_utils import load_complex_mmcif  # noqa: E402
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--pred-cif", required=True)
     p.add_argument("--ref-cif", required=True)
     p.add_argument("--out-csv", required=True)
     p.add_argument("--substructure-match", action="store_true")
     p.add_argument("--exclude-resnames", default="HOH,WAT,DOD")
-    return p.parse_args()
+    return p.parse_args(argv)
 
 
-def main() -> int:
-    args = parse_args()
-    exclude = {x.strip().upper() for x in args.exclude_resnames.split(",") if x.strip()}
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    from ost.mol.alg.ligand_scoring_scrmsd import SCRMSDScorer
 
-    mdl = load_complex_mmcif(args.pred_cif, extract_nonpoly=True)
-    trg = load_complex_mmcif(args.ref_cif, extract_nonpoly=True)
+    exclude = {x.strip().upper() for x in args.exclude_resnames.split(",") if x.strip()}
 
-    mdl_ligs = filter_ligands(mdl.ligands, exclude)
-    trg_ligs = filter_ligands(trg.ligands, exclude)
+    mdl = load_complex_mmcif(args.pred_cif, extract_nonpoly=True, exclude_resnames=exclude)
+    trg = load_complex_mmcif(args.ref_cif, extract_nonpoly=True, exclude_resnames=exclude)
 
     sc = SCRMSDScorer(
         mdl.ent,
         trg.ent,
-        [r.Select("ele != H") for r in mdl_ligs],
-        [r.Select("ele != H") for r in trg_ligs],
+        mdl.catalog.views,
+        trg.catalog.views,
         substructure_match=bool(args.substructure_match),
     )
 
@@ -44,8 +48,8 @@ def main() -> int:
             {
                 "target_idx": trg_i,
                 "model_idx": mdl_i,
-                "target_resname": trg_ligs[trg_i].GetName(),
-                "model_resname": mdl_ligs[mdl_i].GetName(),
+                "target_resname": trg.catalog[trg_i].resname,
+                "model_resname": mdl.catalog[mdl_i].resname,
                 "BiSyRMSD": float(sc.score_matrix[trg_i, mdl_i]),
             }
         )
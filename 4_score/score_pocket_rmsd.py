@@ -4,46 +4,62 @@ from __future__ import annotations
 import argparse
 import csv
 import json
+import sys
 from pathlib import Path
 
-from ost import io
-from ost.mol.alg import superpose
+# Allow running as a standalone script without installing as a package.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for _p in (REPO_ROOT, REPO_ROOT / "4_score"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from ost_utils import atom_table  # noqa: E402
+from utils.coords import atom_index, paired_atoms  # noqa: E402
+from utils.geometry import superposed_rmsd  # noqa: E402
+from utils.res_map import add_residue_map_args, residue_map  # noqa: E402
 
 POCKET_RADIUS_A = 8.0
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--pred-cif", required=True)
     p.add_argument("--ref-cif", required=True)
     p.add_argument("--pocket-json", required=True)
     p.add_argument("--out-csv", required=True)
-    return p.parse_args()
-
+    add_residue_map_args(p)
+    return p.parse_args(argv)
 
-def res_sel(res: dict) -> str:
-    return f"cname={res['chain']} and rnum={int(res['resnum'])} and aname=CA"
 
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    from ost import io
 
-def main() -> int:
-    args = parse_args()
-    pred = io.LoadEntity(str(args.pred_cif), format="auto")
-    ref = io.LoadEntity(str(args.ref_cif), format="auto")
+    pred = atom_table(io.LoadEntity(str(args.pred_cif), format="auto"))
+    ref = atom_table(io.LoadEntity(str(args.ref_cif), format="auto"))
 
     pocket = json.loads(Path(args.pocket_json).read_text()).get("pocket_residues", [])
     if not pocket:
         raise RuntimeError("Pocket residue set is empty.")
 
-    sel_expr = " or ".join([res_sel(r) for r in pocket])
-    pred_view = pred.Select(sel_expr)
-    ref_view = ref.Select(sel_expr)
-
-    sp = superpose.SuperposeSVD(pred_view, ref_view)
-    rmsd = float(sp.rmsd)
+    mapping = None
+    if not args.same_numbering:
+        mapping = residue_map(ref, pred, args.residue_map_dir, args.engine, Path(args.ref_cif).stem).pairs
+    rows_p, rows_r = paired_atoms(atom_index(pred), atom_index(ref), pocket, mapping)
+    if len(rows_p) < 3:
+        raise RuntimeError(f"Only {len(rows_p)} of {len(pocket)} pocket CA atoms found in both structures.")
+    rmsd = superposed_rmsd(pred["xyz"][rows_p], ref["xyz"][rows_r])
 
     out_csv = Path(args.out_csv)
     out_csv.parent.mkdir(parents=True, exist_ok=True)
     with out_csv.open("w", newline="") as f:
         w = csv.DictWriter(f, fieldnames=["pocket_CA_RMSD", "n_atoms", "pocket_radius_A"])
         w.writeheader()
-        w.writerow({"pocket_CA_RMS
+        w.writerow({"pocket_CA_RMSD": rmsd, "n_atoms": len(rows_p), "pocket_radius_A": POCKET_RADIUS_A})
+
+    print(f"Wrote -> {out_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,40 +3,67 @@ from __future__ import annotations
 
 import argparse
 import csv
+import sys
 from pathlib import Path
 
-from ost import io
-from ost.mol.alg import qsscore
+# Allow running as a standalone script without installing as a package.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for _p in (REPO_ROOT, REPO_ROOT / "4_score"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
 
+from ost_utils import TRIVIAL_QS, qs_is_trivial  # noqa: E402
+from utils.atom_site import read_atom_site  # noqa: E402
+from utils.coords import polymer_chains  # noqa: E402
 
-def parse_args() -> argparse.Namespace:
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--pred-cif", required=True)
     p.add_argument("--ref-cif", required=True)
     p.add_argument("--out-csv", required=True)
     p.add_argument("--contact-d", type=float, default=12.0)
-    return p.parse_args()
+    p.add_argument("--always-score", action="store_true", help="Run QSScorer even for monomer vs monomer pairs")
+    return p.parse_args(argv)
+
 
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
 
-def main() -> int:
-    args = parse_args()
+    # Chain inventory from the NumPy reader: a monomer pair never loads OST
+    n_ref = len(polymer_chains(read_atom_site(args.ref_cif)))
+    n_mdl = len(polymer_chains(read_atom_site(args.pred_cif)))
+    if not args.always_score and qs_is_trivial(n_ref, n_mdl):
+        row = {
+            "QS_global": TRIVIAL_QS,
+            "QS_best": TRIVIAL_QS,
+            "ICS": "",
+            "IPS": "",
+            "n_contacts_ref": 0,
+            "n_contacts_mdl": 0,
+            "QS_skipped": 1,
+        }
+    else:
+        from ost import io
+        from ost.mol.alg import qsscore
 
-    mdl = io.LoadEntity(str(args.pred_cif), format="auto")
-    ref = io.LoadEntity(str(args.ref_cif), format="auto")
+        mdl = io.LoadEntity(str(args.pred_cif), format="auto")
+        ref = io.LoadEntity(str(args.ref_cif), format="auto")
 
-    mdl_q = qsscore.QSEntity(mdl, contact_d=float(args.contact_d))
-    ref_q = qsscore.QSEntity(ref, contact_d=float(args.contact_d))
+        mdl_q = qsscore.QSEntity(mdl, contact_d=float(args.contact_d))
+        ref_q = qsscore.QSEntity(ref, contact_d=float(args.contact_d))
 
-    res = qsscore.QSScorer(ref_q, mdl_q).Score()
+        res = qsscore.QSScorer(ref_q, mdl_q).Score()
 
-    row = {
-        "QS_global": getattr(res, "qs_global", ""),
-        "QS_best": getattr(res, "qs_best", ""),
-        "ICS": getattr(res, "ics", ""),
-        "IPS": getattr(res, "ips", ""),
-        "n_contacts_ref": getattr(res, "n_contacts_ref", ""),
-        "n_contacts_mdl": getattr(res, "n_contacts_mdl", ""),
-    }
+        row = {
+            "QS_global": getattr(res, "qs_global", ""),
+            "QS_best": getattr(res, "qs_best", ""),
+            "ICS": getattr(res, "ics", ""),
+            "IPS": getattr(res, "ips", ""),
+            "n_contacts_ref": getattr(res, "n_contacts_ref", ""),
+            "n_contacts_mdl": getattr(res, "n_contacts_mdl", ""),
+            "QS_skipped": 0,
+        }
 
     out_csv = Path(args.out_csv)
     out_csv.parent.mkdir(parents=True, exist_ok=True)
@@ -45,6 +72,8 @@ def main() -> int:
         w.writeheader()
         w.writerow(row)
 
+    if row["QS_skipped"]:
+        print(f"[skip] QS: monomer vs monomer ({n_ref} / {n_mdl} polymer chains), recorded QS_global={TRIVIAL_QS}")
     print(f"Wrote -> {out_csv}")
     return 0
 
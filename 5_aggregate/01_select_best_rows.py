@@ -3,43 +3,78 @@
 Replaces notebook cells like:
 - AF3 allo: group by Complex_Seed prefix and keep min RMSD
 - Protenix allo: compute max across columns, keep per-protein result
+- Per-model score tables (id, model_idx, pose_rmsd, ...): oracle / top-1 / mean /
+  success-rate views for several metrics at once (best_of_n)
 """
 
 from __future__ import annotations
 
 import argparse
-from pathlib import Path
-
 import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Allow running as a standalone script without installing as a package.
-ROOT = Path(__file__).resolve().parents[2]
+ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+# pandas and the pandas-based utils are imported where used, so --help stays fast
+if TYPE_CHECKING:
+    import pandas as pd
 
-import pandas as pd
 
-from scripts.utils.csv_ops import best_row_per_group, write_csv
-from scripts.utils.ids import extract_prefix
+def af3_best_frame(df: pd.DataFrame, seed_col: str = "Complex_Seed", rmsd_col: str = "RMSD") -> pd.DataFrame:
+    from utils.csv_ops import best_row_per_group
+    from utils.ids import extract_prefix_series
 
-
-def af3_best_by_complex_seed(in_csv: str, out_csv: str, seed_col: str = "Complex_Seed", rmsd_col: str = "RMSD") -> None:
-    df = pd.read_csv(in_csv)
-    df["group_code"] = df[seed_col].astype(str).apply(lambda x: extract_prefix(x, 5)).str.upper()
+    df = df.copy()
+    df["group_code"] = extract_prefix_series(df[seed_col].astype(str), 5).str.upper()
     best = best_row_per_group(df, "group_code", rmsd_col, keep="min")
-    write_csv(best.drop(columns=["group_code"], errors="ignore"), out_csv)
+    return best.drop(columns=["group_code"], errors="ignore")
 
 
-def protenix_rowwise_max_to_rmsd(in_csv: str, out_csv: str, id_col: str = "Protein ID") -> None:
-    df = pd.read_csv(in_csv)
+def protenix_max_frame(df: pd.DataFrame, id_col: str = "Protein ID") -> pd.DataFrame:
+    import pandas as pd
+
+    df = df.copy()
     rmsd_cols = [c for c in df.columns if c != id_col]
     df["RMSD"] = df[rmsd_cols].apply(pd.to_numeric, errors="coerce").max(axis=1)
-    out = df[[id_col, "RMSD"]].copy()
-    write_csv(out, out_csv)
+    return df[[id_col, "RMSD"]].copy()
+
+
+def af3_best_by_complex_seed(in_csv: str, out_csv: str, seed_col: str = "Complex_Seed", rmsd_col: str = "RMSD") -> None:
+    from utils.master_store import read_table, write_table
 
+    write_table(af3_best_frame(read_table(in_csv), seed_col, rmsd_col), out_csv)
 
-def main() -> None:
+
+def protenix_rowwise_max_to_rmsd(in_csv: str, out_csv: str, id_col: str = "Protein ID") -> None:
+    from utils.master_store import read_table, write_table
+
+    write_table(protenix_max_frame(read_table(in_csv), id_col), out_csv)
+
+
+def best_of_n_table(
+    in_csv: str,
+    out_csv: str,
+    metrics: str = "",
+    group_col: str = "id",
+    rank_col: str = "model_idx",
+    rank_direction: str = "min",
+    summary_csv: str = "",
+) -> None:
+    from utils.best_of_n import DEFAULT_METRICS, best_of_n, parse_metric_specs, summarize_best_of_n
+    from utils.master_store import read_table, write_table
+
+    specs = parse_metric_specs(metrics) if metrics else DEFAULT_METRICS
+    per_target = best_of_n(read_table(in_csv), specs, group_col=group_col, rank_col=rank_col, rank_direction=rank_direction)
+    write_table(per_target, out_csv)
+    if summary_csv:
+        write_table(summarize_best_of_n(per_target, specs), summary_csv)
+
+
+def main(argv: list[str] | None = None) -> None:
     ap = argparse.ArgumentParser()
     sub = ap.add_subparsers(dest="mode", required=True)
 
@@ -54,7 +89,16 @@ def main() -> None:
     p2.add_argument("--out_csv", required=True)
     p2.add_argument("--id_col", default="Protein ID")
 
-    args = ap.parse_args()
+    p3 = sub.add_parser("best_of_n", help="Oracle/top-1/mean/success views of a per-model score table")
+    p3.add_argument("--in_csv", required=True)
+    p3.add_argument("--out_csv", required=True)
+    p3.add_argument("--metrics", default="", help='e.g. "pose_rmsd:min:2,qs_score:max" (default: pipeline metrics)')
+    p3.add_argument("--group_col", default="id")
+    p3.add_argument("--rank_col", default="model_idx", help="Column that ranks models for top-1")
+    p3.add_argument("--rank_direction", choices=["min", "max"], default="min")
+    p3.add_argument("--summary_csv", default="", help="Optional per-metric summary across targets")
+
+    args = ap.parse_args(argv)
 
     Path(args.out_csv).parent.mkdir(parents=True, exist_ok=True)
 
@@ -62,6 +106,16 @@ def main() -> None:
         af3_best_by_complex_seed(args.in_csv, args.out_csv, args.seed_col, args.rmsd_col)
     elif args.mode == "protenix_max":
         protenix_rowwise_max_to_rmsd(args.in_csv, args.out_csv, args.id_col)
+    elif args.mode == "best_of_n":
+        best_of_n_table(
+            args.in_csv,
+            args.out_csv,
+            args.metrics,
+            args.group_col,
+            args.rank_col,
+            args.rank_direction,
+            args.summary_csv,
+        )
 
 
 if __name__ == "__main__":
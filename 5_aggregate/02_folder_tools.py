@@ -3,6 +3,8 @@
 Replaces notebook cells:
 - filter each CSV to leftmost col + RMSD
 - combine CSVs with a Source column from filename
+- stream-merge thousands of per-pair result CSVs (utils.stream_merge)
+- load evalspreadsheets/ into one canonical table (utils.evalsheets)
 """
 
 from __future__ import annotations
@@ -10,22 +12,27 @@ from __future__ import annotations
 import argparse
 import glob
 import os
-from pathlib import Path
-
 import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
 # Allow running as a standalone script without installing as a package.
-ROOT = Path(__file__).resolve().parents[2]
+ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from utils.stream_merge import CHUNK_FILES, stream_merge, write_malformed
 
-import pandas as pd
-
-from scripts.utils.csv_ops import write_csv
+# pandas and the pandas-based utils are imported where used, so --help stays fast
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def filter_to_leftmost_and_rmsd(folder: str, pattern: str = "*.csv", rmsd_col: str = "RMSD") -> None:
+    import pandas as pd
+
+    from utils.csv_ops import write_csv
+
     for file_path in glob.glob(os.path.join(folder, pattern)):
         df = pd.read_csv(file_path)
         leftmost = df.columns[0]
@@ -38,21 +45,40 @@ def filter_to_leftmost_and_rmsd(folder: str, pattern: str = "*.csv", rmsd_col: s
         print(f"[ok] wrote {out_path}")
 
 
-def combine_csvs_with_source(folder: str, out_csv: str, pattern: str = "*.csv") -> None:
+def combine_frames(
+    folder: Optional[str], pattern: str = "*.csv", extra: Optional[dict[str, pd.DataFrame]] = None
+) -> pd.DataFrame:
+    """Concatenate the folder's CSVs (plus ``extra`` tables keyed by source name) in name order.
+
+    With no ``folder`` only the ``extra`` tables are combined; nothing is globbed.
+    """
+    import pandas as pd
+
+    from utils.master_store import read_table
+
+    named: dict = {}
+    if folder:
+        named = {os.path.splitext(os.path.basename(p))[0]: p for p in glob.glob(os.path.join(folder, pattern))}
+    named.update(extra or {})
     dfs = []
-    for file_path in glob.glob(os.path.join(folder, pattern)):
-        df = pd.read_csv(file_path)
-        name = os.path.splitext(os.path.basename(file_path))[0]
+    for name in sorted(named):
+        src = named[name]
+        df = src.copy() if isinstance(src, pd.DataFrame) else read_table(src)
         df.insert(0, "Source", name)
         dfs.append(df)
     if not dfs:
-        raise SystemExit(f"No CSVs matched {pattern} in {folder}")
-    combined = pd.concat(dfs, ignore_index=True)
-    write_csv(combined, out_csv)
+        raise SystemExit(f"No CSVs matched {pattern} in {folder}" if folder else "No tables to combine")
+    return pd.concat(dfs, ignore_index=True)
+
+
+def combine_csvs_with_source(folder: str, out_csv: str, pattern: str = "*.csv") -> None:
+    from utils.master_store import write_table
+
+    write_table(combine_frames(folder, pattern), out_csv)
     print(f"[ok] wrote {out_csv}")
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     ap = argparse.ArgumentParser()
     sub = ap.add_subparsers(dest="cmd", required=True)
 
@@ -66,7 +92,48 @@ def main() -> None:
     p2.add_argument("--pattern", default="*.csv")
     p2.add_argument("--out_csv", required=True)
 
-    args = ap.parse_args()
+    p3 = sub.add_parser("evalsheets", help="Harmonize evalspreadsheets/{main,allo}/*ligand.csv into one table")
+    p3.add_argument("--root", default="evalspreadsheets")
+    p3.add_argument("--out_csv", required=True)
+    p3.add_argument("--no_cache", action="store_true", help="Skip the Parquet snapshot under <root>/.cache")
+
+    p4 = sub.add_parser("merge", help="Stream-merge per-pair result CSVs under a folder (recursive)")
+    p4.add_argument("--folder", required=True)
+    p4.add_argument("--pattern", default="*.csv")
+    p4.add_argument("--out", required=True, help="Output .parquet (typed) or .csv")
+    p4.add_argument("--key_regex", default=None,
+                    help=r"Named groups become key columns, e.g. '(?P<Source>[^/]+)/(?P<target>[^/]+)/(?P<model>[^/]+)\.csv'")
+    p4.add_argument("--workers", type=int, default=16)
+    p4.add_argument("--chunk_files", type=int, default=CHUNK_FILES)
+    p4.add_argument("--malformed_csv", default="")
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "merge":
+        report = stream_merge(
+            args.folder,
+            args.out,
+            pattern=args.pattern,
+            key_regex=args.key_regex,
+            workers=args.workers,
+            chunk_files=args.chunk_files,
+            progress=True,
+        )
+        if args.malformed_csv:
+            write_malformed(report, args.malformed_csv)
+        for path, err in report.malformed[:20]:
+            print(f"[skip] {path}: {err}")
+        print(f"[ok] wrote {args.out}: {report.summary()}")
+        return
+
+    if args.cmd == "evalsheets":
+        from utils.evalsheets import load_evalsheets
+        from utils.master_store import write_table
+
+        df = load_evalsheets(args.root, cache_dir=False if args.no_cache else None)
+        write_table(df, args.out_csv)
+        print(f"[ok] wrote {args.out_csv} ({len(df)} rows)")
+        return
 
     Path(args.folder).mkdir(parents=True, exist_ok=True)
 
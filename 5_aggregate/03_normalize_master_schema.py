@@ -1,10 +1,3 @@
-import sys
-
-# Allow running as a standalone script without installing as a package.
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
-
 """Normalize a combined spreadsheet into the canonical master schema.
 
 Replaces notebook cell 7.
@@ -24,47 +17,65 @@ This script will:
 from __future__ import annotations
 
 import argparse
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-from scripts.utils.csv_ops import write_csv
-from scripts.utils.ids import normalize_pdb_id, parse_source_and_dataset
+# pandas and the pandas-based utils are imported where used, so --help stays fast
+if TYPE_CHECKING:
+    import pandas as pd
 
 
-def main() -> None:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--in_csv", required=True)
-    ap.add_argument("--out_csv", required=True)
-    ap.add_argument("--pdb_col", default="PDB_ID")
-    ap.add_argument("--source_col", default="Source")
-    ap.add_argument("--dataset_col", default="dataset")
-    ap.add_argument("--rmsd_col", default="RMSD")
-    args = ap.parse_args()
+def normalize_master_schema(
+    df: pd.DataFrame,
+    pdb_col: str = "PDB_ID",
+    source_col: str = "Source",
+    dataset_col: str = "dataset",
+    rmsd_col: str = "RMSD",
+) -> pd.DataFrame:
+    from utils.ids import normalize_pdb_id_series, parse_source_and_dataset_series
 
-    df = pd.read_csv(args.in_csv)
+    df = df.copy()
 
     # Ensure columns exist
-    for c in [args.pdb_col, args.source_col, args.rmsd_col]:
+    for c in [pdb_col, source_col, rmsd_col]:
         if c not in df.columns:
             raise SystemExit(f"Missing required column: {c}")
 
     # Normalize PDB_ID
-    df[args.pdb_col] = df[args.pdb_col].apply(normalize_pdb_id)
+    df[pdb_col] = normalize_pdb_id_series(df[pdb_col])
 
     # Normalize Source/dataset
-    if args.dataset_col not in df.columns:
-        df[args.dataset_col] = ""
+    if dataset_col not in df.columns:
+        df[dataset_col] = ""
 
-    parsed = df[args.source_col].apply(parse_source_and_dataset)
-    df["Source"] = parsed.apply(lambda x: x.source)
+    df["Source"], inferred_dataset = parse_source_and_dataset_series(df[source_col])
     # Only overwrite dataset if empty
-    inferred_dataset = parsed.apply(lambda x: x.dataset)
-    df["dataset"] = df[args.dataset_col].where(df[args.dataset_col].astype(str).str.strip() != "", inferred_dataset)
+    df["dataset"] = df[dataset_col].where(df[dataset_col].astype(str).str.strip() != "", inferred_dataset)
 
-    out = df[["Source", "dataset", args.pdb_col, args.rmsd_col]].copy()
-    out = out.rename(columns={args.pdb_col: "PDB_ID", args.rmsd_col: "RMSD"})
+    out = df[["Source", "dataset", pdb_col, rmsd_col]].copy()
+    return out.rename(columns={pdb_col: "PDB_ID", rmsd_col: "RMSD"})
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--in_csv", required=True)
+    ap.add_argument("--out_csv", required=True)
+    ap.add_argument("--pdb_col", default="PDB_ID")
+    ap.add_argument("--source_col", default="Source")
+    ap.add_argument("--dataset_col", default="dataset")
+    ap.add_argument("--rmsd_col", default="RMSD")
+    args = ap.parse_args(argv)
+    from utils.master_store import read_table, write_table
 
-    write_csv(out, args.out_csv)
+    df = read_table(args.in_csv)
+    out = normalize_master_schema(df, args.pdb_col, args.source_col, args.dataset_col, args.rmsd_col)
+    write_table(out, args.out_csv)
     print(f"[ok] wrote {args.out_csv}")
 
 
@@ -1,10 +1,3 @@
-import sys
-
-# Allow running as a standalone script without installing as a package.
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
-
 """Update a master spreadsheet with model-level metrics and/or ligand RMSD measurements.
 
 This consolidates many notebook cells (8-28, 31-37) into a single configurable tool.
@@ -14,6 +7,8 @@ Supported update modes:
    keeping best (lowest) rmsd per group.
 2) update_ligand_rmsd: updates existing rows' RMSD/ligand_rmsd from a ligand RMSD CSV,
    keeping best (lowest) per group.
+3) apply_runs: applies a list of the two modes above (one per row of a runs CSV) in a
+   single invocation, matching rows on a normalized (Source, dataset, PDB_ID) key.
 
 You control how IDs are extracted via --id_mode.
 """
@@ -21,12 +16,18 @@ You control how IDs are extracted via --id_mode.
 from __future__ import annotations
 
 import argparse
-from typing import Literal, Optional
-
-import pandas as pd
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, Optional
 
-from scripts.utils.csv_ops import best_row_per_group, write_csv
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
+# pandas and the pandas-based utils are imported where used, so --help stays fast
+if TYPE_CHECKING:
+    import pandas as pd
 
 IdMode = Literal[
     "pdb_id_first4",
@@ -57,6 +58,30 @@ def _make_id(series: pd.Series, mode: IdMode, chain: Optional[pd.Series] = None)
     raise ValueError(f"Unknown id_mode: {mode}")
 
 
+# Normalized (Source, dataset, PDB_ID) key columns; kept on the master while applying many runs
+_KEY_COLS = ["_source_key", "_dataset_key", "_pdb_key"]
+_METRIC_COLS = ["model_rmsd", "model_tm_score", "model_plddt", "RMSD", "ligand_rmsd"]
+
+
+def _attach_keys(master: pd.DataFrame) -> pd.DataFrame:
+    master = master.copy()
+    master[_KEY_COLS[0]] = master["Source"].astype(str).str.lower()
+    master[_KEY_COLS[1]] = master["dataset"].astype(str).str.lower()
+    master[_KEY_COLS[2]] = master["PDB_ID"].astype(str).str.upper()
+    return master
+
+
+def _detach_keys(master: pd.DataFrame) -> pd.DataFrame:
+    return master.drop(columns=_KEY_COLS, errors="ignore")
+
+
+def _key_mask(master: pd.DataFrame, source: str, dataset: str, pdb_keys: pd.Index) -> pd.Series:
+    """Rows of (source, dataset) whose normalized PDB_ID is in pdb_keys."""
+    mask = (master[_KEY_COLS[0]] == source.lower()) & (master[_KEY_COLS[1]] == dataset.lower())
+    mask[mask] = pdb_keys.get_indexer(master.loc[mask, _KEY_COLS[2]]) >= 0
+    return mask
+
+
 def upsert_model_metrics(
     master: pd.DataFrame,
     run_df: pd.DataFrame,
@@ -70,11 +95,17 @@ def upsert_model_metrics(
     plddt_col: Optional[str],
     group_keep: Literal["min", "max"] = "min",
 ) -> pd.DataFrame:
-    # Build PDB_ID
+    import pandas as pd
+
+    from utils.csv_ops import best_row_per_group
+
+    keyed = _KEY_COLS[0] in master.columns
+    if not keyed:
+        master = _attach_keys(master)
+
+    # Build PDB_ID and choose best per PDB_ID
     run_df = run_df.copy()
     run_df["PDB_ID"] = _make_id(run_df[id_col], id_mode)
-
-    # Choose best per PDB_ID
     best = best_row_per_group(run_df, "PDB_ID", rmsd_col, keep=group_keep)
 
     # Standardize output cols
@@ -88,27 +119,21 @@ def upsert_model_metrics(
         best_out["model_tm_score"] = best[tm_col]
     if plddt_col and plddt_col in best.columns:
         best_out["model_plddt"] = best[plddt_col]
+    best_out[_KEY_COLS[0]] = source.lower()
+    best_out[_KEY_COLS[1]] = dataset.lower()
+    best_out[_KEY_COLS[2]] = best_out["PDB_ID"].astype(str).str.upper()
 
     # Ensure required columns exist in master
-    for col in ["model_rmsd", "model_tm_score", "model_plddt", "RMSD", "ligand_rmsd"]:
-        if col not in master.columns:
-            master[col] = pd.NA
+    missing = [c for c in _METRIC_COLS if c not in master.columns]
+    if missing:
+        master = master.reindex(columns=[c for c in master.columns if c not in _KEY_COLS] + missing + _KEY_COLS)
+        master[missing] = pd.NA
 
     # Drop existing rows for these PDB_IDs to avoid duplicates, then append
-    mask = (
-        (master["Source"].astype(str).str.lower() == source.lower())
-        & (master["dataset"].astype(str).str.lower() == dataset.lower())
-        & (master["PDB_ID"].astype(str).str.upper().isin(best_out["PDB_ID"].astype(str).str.upper()))
-    )
-    master2 = master.loc[~mask].copy()
-
-    # Align columns
-    for col in master2.columns:
-        if col not in best_out.columns:
-            best_out[col] = pd.NA
-    best_out = best_out[master2.columns]
-
-    return pd.concat([master2, best_out], ignore_index=True)
+    mask = _key_mask(master, source, dataset, pd.Index(best_out[_KEY_COLS[2]].unique()))
+    master2 = master.loc[~mask]
+    out = pd.concat([master2, best_out.reindex(columns=master2.columns)], ignore_index=True)
+    return out if keyed else _detach_keys(out)
 
 
 def update_ligand_rmsd(
@@ -122,29 +147,62 @@ def update_ligand_rmsd(
     rmsd_col: str,
     target_col: str = "RMSD",
 ) -> pd.DataFrame:
+    import pandas as pd
+
+    from utils.csv_ops import best_row_per_group
+
+    keyed = _KEY_COLS[0] in master.columns
+    master2 = master.copy() if keyed else _attach_keys(master)
+
     ligand_df = ligand_df.copy()
     ligand_df["PDB_ID"] = _make_id(ligand_df[id_col], id_mode)
     best = best_row_per_group(ligand_df, "PDB_ID", rmsd_col, keep="min")
-    update_map = dict(zip(best["PDB_ID"].astype(str).str.upper(), best[rmsd_col]))
+    update = pd.Series(best[rmsd_col].to_numpy(), index=best["PDB_ID"].astype(str).str.upper())
+    update = update[~update.index.duplicated(keep="last")]
+
+    if target_col not in master2.columns:
+        master2.insert(len(master2.columns) - len(_KEY_COLS), target_col, pd.NA)
+
+    hit = _key_mask(master2, source, dataset, update.index)
+    master2.loc[hit, target_col] = master2.loc[hit, _KEY_COLS[2]].map(update).to_numpy()
+    return master2 if keyed else _detach_keys(master2)
 
-    if target_col not in master.columns:
-        master[target_col] = pd.NA
 
-    mask = (
-        (master["Source"].astype(str).str.lower() == source.lower())
-        & (master["dataset"].astype(str).str.lower() == dataset.lower())
-    )
+RUN_FIELDS = ["cmd", "run_csv", "source", "dataset", "id_col", "id_mode", "rmsd_col"]
 
-    def _upd(row):
-        key = str(row["PDB_ID"]).upper()
-        return update_map.get(key, row[target_col])
 
-    master2 = master.copy()
-    master2.loc[mask, target_col] = master2.loc[mask].apply(_upd, axis=1)
-    return master2
+def apply_runs(master: pd.DataFrame, runs: list[dict]) -> pd.DataFrame:
+    """Apply many upsert/ligand-update runs in order, keeping the key columns indexed throughout.
 
+    Each run is a dict with RUN_FIELDS plus optional tm_col, plddt_col and target_col.
+    """
+    from utils.master_store import read_table
 
-def main() -> None:
+    master = _attach_keys(master)
+    frames: dict[str, pd.DataFrame] = {}
+    for run in runs:
+        path = str(run["run_csv"])
+        if path not in frames:
+            frames[path] = read_table(path)
+        common = dict(
+            source=run["source"],
+            dataset=run["dataset"],
+            id_col=run["id_col"],
+            id_mode=run["id_mode"],
+            rmsd_col=run["rmsd_col"],
+        )
+        if run["cmd"] == "upsert_model_metrics":
+            master = upsert_model_metrics(
+                master, frames[path], tm_col=run.get("tm_col") or None, plddt_col=run.get("plddt_col") or None, **common
+            )
+        elif run["cmd"] == "update_ligand_rmsd":
+            master = update_ligand_rmsd(master, frames[path], target_col=run.get("target_col") or "RMSD", **common)
+        else:
+            raise ValueError(f"Unknown run cmd: {run['cmd']}")
+    return _detach_keys(master)
+
+
+def main(argv: list[str] | None = None) -> None:
     ap = argparse.ArgumentParser()
     sub = ap.add_subparsers(dest="cmd", required=True)
 
@@ -171,12 +229,30 @@ def main() -> None:
     p2.add_argument("--rmsd_col", required=True)
     p2.add_argument("--target_col", default="RMSD")
 
-    args = ap.parse_args()
+    p3 = sub.add_parser("apply_runs", help="Apply every run listed in a runs CSV in one pass")
+    p3.add_argument("--master_csv", required=True)
+    p3.add_argument("--runs_csv", required=True, help=f"Columns: {', '.join(RUN_FIELDS)}[, tm_col, plddt_col, target_col]")
+    p3.add_argument("--out_csv", required=True)
+
+    args = ap.parse_args(argv)
+    import pandas as pd
+
+    from utils.master_store import read_table, write_table
+
+    master = read_table(args.master_csv)
 
-    master = pd.read_csv(args.master_csv)
+    if args.cmd == "apply_runs":
+        runs = pd.read_csv(args.runs_csv, dtype=str, keep_default_na=False).to_dict("records")
+        missing = [c for c in RUN_FIELDS if runs and c not in runs[0]]
+        if missing:
+            raise SystemExit(f"runs CSV is missing columns: {missing}")
+        updated = apply_runs(master, runs)
+        write_table(updated, args.out_csv)
+        print(f"[ok] applied {len(runs)} runs, wrote {args.out_csv}")
+        return
 
     if args.cmd == "upsert_model_metrics":
-        run_df = pd.read_csv(args.run_csv)
+        run_df = read_table(args.run_csv)
         updated = upsert_model_metrics(
             master,
             run_df,
@@ -188,10 +264,10 @@ def main() -> None:
             tm_col=args.tm_col,
             plddt_col=args.plddt_col,
         )
-        write_csv(updated, args.out_csv)
+        write_table(updated, args.out_csv)
         print(f"[ok] wrote {args.out_csv}")
     else:
-        ligand_df = pd.read_csv(args.ligand_csv)
+        ligand_df = read_table(args.ligand_csv)
         updated = update_ligand_rmsd(
             master,
             ligand_df,
@@ -202,7 +278,7 @@ def main() -> None:
             rmsd_col=args.rmsd_col,
             target_col=args.target_col,
         )
-        write_csv(updated, args.out_csv)
+        write_table(updated, args.out_csv)
         print(f"[ok] wrote {args.out_csv}")
 
 
@@ -1,10 +1,3 @@
-import sys
-
-# Allow running as a standalone script without installing as a package.
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
-
 """Finalize a master results table.
 
 Replaces the last notebook steps:
@@ -16,13 +9,49 @@ Replaces the last notebook steps:
 from __future__ import annotations
 
 import argparse
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-import pandas as pd
+# pandas and the pandas-based utils are imported where used, so --help stays fast
+if TYPE_CHECKING:
+    import pandas as pd
+
+FINAL_RENAME = {
+    "RMSD": "ligand_rmsd",
+    "model_rmsd": "rmsd",
+    "model_tm_score": "tm_score",
+    "model_plddt": "plddt",
+}
+
+
+def finalize_master(
+    df: pd.DataFrame,
+    *,
+    dropna: bool = False,
+    exclude_source: Optional[str] = None,
+    exclude_dataset: Optional[str] = None,
+    rename_to_final: bool = False,
+) -> pd.DataFrame:
+    if rename_to_final:
+        df = df.rename(columns={k: v for k, v in FINAL_RENAME.items() if k in df.columns})
+
+    if exclude_source and exclude_dataset:
+        df = df[~((df["Source"].astype(str).str.lower() == exclude_source.lower()) &
+                  (df["dataset"].astype(str).str.lower() == exclude_dataset.lower()))]
+
+    if dropna:
+        df = df.dropna()
 
-from scripts.utils.csv_ops import write_csv
+    return df
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--in_csv", required=True)
     ap.add_argument("--out_csv", required=True)
@@ -30,27 +59,17 @@ def main() -> None:
     ap.add_argument("--exclude_source", default=None)
     ap.add_argument("--exclude_dataset", default=None)
     ap.add_argument("--rename_to_final", action="store_true")
-    args = ap.parse_args()
-
-    df = pd.read_csv(args.in_csv)
-
-    if args.rename_to_final:
-        rename_map = {
-            "RMSD": "ligand_rmsd",
-            "model_rmsd": "rmsd",
-            "model_tm_score": "tm_score",
-            "model_plddt": "plddt",
-        }
-        df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
-
-    if args.exclude_source and args.exclude_dataset:
-        df = df[~((df["Source"].astype(str).str.lower() == args.exclude_source.lower()) &
-                  (df["dataset"].astype(str).str.lower() == args.exclude_dataset.lower()))]
-
-    if args.dropna:
-        df = df.dropna()
-
-    write_csv(df, args.out_csv)
+    args = ap.parse_args(argv)
+    from utils.master_store import read_table, write_table
+
+    df = finalize_master(
+        read_table(args.in_csv),
+        dropna=args.dropna,
+        exclude_source=args.exclude_source,
+        exclude_dataset=args.exclude_dataset,
+        rename_to_final=args.rename_to_final,
+    )
+    write_table(df, args.out_csv)
     print(f"[ok] wrote {args.out_csv} (rows={len(df)})")
 
 
@@ -0,0 +1,213 @@
+"""Run a whole aggregation (steps 01-05) in one process from a YAML/TOML config.
+
+Each step reads a named in-memory table (or a file path) and stores its result under a
+new name, so the chain that used to need ~25 CLI calls and as many intermediate CSVs
+runs without re-importing pandas or re-parsing files. The final table is identical to
+the one produced by chaining the individual scripts.
+
+Config layout (YAML shown; TOML uses ``[[steps]]`` tables with the same keys)::
+
+    steps:
+      - {op: af3_best_by_complex_seed, input: af3/alloresults.csv, output: af3allo_best}
+      - {op: combine, folder: spread, pattern: "*.csv", tables: [af3allo_best], output: combined}
+      - {op: normalize, input: combined, output: master}
+      - {op: upsert_model_metrics, input: master, output: master, run_csv: chai/chaimain.csv,
+         source: chai, dataset: main, id_col: pdb_id, id_mode: pdb_id_first4,
+         rmsd_col: rmsd, tm_col: tm_score, plddt_col: mean_plddt}
+      - {op: finalize, input: master, output: final, rename_to_final: true}
+      - {op: write, input: final, path: cleanmaster.csv}
+
+``combine`` adds each name in ``tables`` as an extra source, as if it had been written
+into ``folder`` as ``<name>.csv``. Use --materialize-dir to dump every step's output for
+debugging.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+HERE = Path(__file__).resolve().parent
+if str(HERE) not in sys.path:
+    sys.path.insert(0, str(HERE))
+
+# 01-05 import pandas where it is used, so loading them (and --help) stays fast
+if TYPE_CHECKING:
+    import pandas as pd
+
+select_best = importlib.import_module("01_select_best_rows")
+folder_tools = importlib.import_module("02_folder_tools")
+normalize = importlib.import_module("03_normalize_master_schema")
+update_runs = importlib.import_module("04_update_master_from_runs")
+finalize = importlib.import_module("05_finalize_master")
+
+
+def load_config(path: str | Path) -> dict[str, Any]:
+    path = Path(path)
+    if path.suffix.lower() == ".toml":
+        import tomllib
+
+        with path.open("rb") as fh:
+            cfg = tomllib.load(fh)
+    else:
+        import yaml
+
+        cfg = yaml.safe_load(path.read_text()) or {}
+    if not isinstance(cfg.get("steps"), list) or not cfg["steps"]:
+        raise SystemExit(f"{path}: config needs a non-empty 'steps' list")
+    return cfg
+
+
+class Aggregation:
+    """Named in-memory tables plus a cache of files already read from disk."""
+
+    def __init__(self, materialize_dir: str | None = None, materialize_ext: str = "csv") -> None:
+        self.tables: dict[str, pd.DataFrame] = {}
+        self._files: dict[str, pd.DataFrame] = {}
+        self.materialize_dir = Path(materialize_dir) if materialize_dir else None
+        self.materialize_ext = materialize_ext
+
+    def get(self, ref: str) -> pd.DataFrame:
+        if ref in self.tables:
+            return self.tables[ref]
+        return self.read(ref)
+
+    def read(self, path: str) -> pd.DataFrame:
+        if path not in self._files:
+            if not Path(path).exists():
+                raise SystemExit(f"Unknown table or missing file: {path}")
+            from utils.master_store import read_table
+
+            self._files[path] = read_table(path)
+        return self._files[path]
+
+    def put(self, name: str, df: pd.DataFrame, step_no: int) -> None:
+        self.tables[name] = df
+        if self.materialize_dir is not None:
+            out = self.materialize_dir / f"{step_no:02d}_{name}.{self.materialize_ext}"
+            out.parent.mkdir(parents=True, exist_ok=True)
+            from utils.master_store import write_table
+
+            write_table(df, out)
+
+
+def _af3_best(agg: Aggregation, step: dict) -> pd.DataFrame:
+    return select_best.af3_best_frame(
+        agg.get(step["input"]),
+        seed_col=step.get("seed_col", "Complex_Seed"),
+        rmsd_col=step.get("rmsd_col", "RMSD"),
+    )
+
+
+def _protenix_max(agg: Aggregation, step: dict) -> pd.DataFrame:
+    return select_best.protenix_max_frame(agg.get(step["input"]), id_col=step.get("id_col", "Protein ID"))
+
+
+def _combine(agg: Aggregation, step: dict) -> pd.DataFrame:
+    if not (step.get("folder") or step.get("tables")):
+        raise SystemExit(f"combine step {step.get('output', '')!r}: needs 'folder', 'tables' or both")
+    extra = {name: agg.tables[name] for name in step.get("tables", [])}
+    return folder_tools.combine_frames(step.get("folder"), step.get("pattern", "*.csv"), extra=extra)
+
+
+def _normalize(agg: Aggregation, step: dict) -> pd.DataFrame:
+    return normalize.normalize_master_schema(
+        agg.get(step["input"]),
+        pdb_col=step.get("pdb_col", "PDB_ID"),
+        source_col=step.get("source_col", "Source"),
+        dataset_col=step.get("dataset_col", "dataset"),
+        rmsd_col=step.get("rmsd_col", "RMSD"),
+    )
+
+
+def _upsert(agg: Aggregation, step: dict) -> pd.DataFrame:
+    return update_runs.upsert_model_metrics(
+        agg.get(step["input"]),
+        agg.read(step["run_csv"]),
+        source=step["source"],
+        dataset=step["dataset"],
+        id_col=step["id_col"],
+        id_mode=step["id_mode"],
+        rmsd_col=step["rmsd_col"],
+        tm_col=step.get("tm_col"),
+        plddt_col=step.get("plddt_col"),
+    )
+
+
+def _ligand_rmsd(agg: Aggregation, step: dict) -> pd.DataFrame:
+    return update_runs.update_ligand_rmsd(
+        agg.get(step["input"]),
+        agg.read(step["ligand_csv"]),
+        source=step["source"],
+        dataset=step["dataset"],
+        id_col=step["id_col"],
+        id_mode=step["id_mode"],
+        rmsd_col=step["rmsd_col"],
+        target_col=step.get("target_col", "RMSD"),
+    )
+
+
+def _finalize(agg: Aggregation, step: dict) -> pd.DataFrame:
+    return finalize.finalize_master(
+        agg.get(step["input"]),
+        dropna=bool(step.get("dropna", False)),
+        exclude_source=step.get("exclude_source"),
+        exclude_dataset=step.get("exclude_dataset"),
+        rename_to_final=bool(step.get("rename_to_final", False)),
+    )
+
+
+OPS: dict[str, Callable[[Aggregation, dict], pd.DataFrame]] = {
+    "af3_best_by_complex_seed": _af3_best,
+    "protenix_rowwise_max_to_rmsd": _protenix_max,
+    "combine": _combine,
+    "normalize": _normalize,
+    "upsert_model_metrics": _upsert,
+    "update_ligand_rmsd": _ligand_rmsd,
+    "finalize": _finalize,
+}
+
+
+def run_steps(steps: list[dict], agg: Aggregation) -> Aggregation:
+    from utils.master_store import write_table
+
+    for i, step in enumerate(steps, start=1):
+        op = step.get("op")
+        t0 = time.perf_counter()
+        if op == "write":
+            write_table(agg.get(step["input"]), step["path"])
+            print(f"[ok] step {i:02d} write {step['input']} -> {step['path']}")
+            continue
+        if op not in OPS:
+            raise SystemExit(f"step {i}: unknown op {op!r} (expected one of {', '.join([*OPS, 'write'])})")
+        if "output" not in step:
+            raise SystemExit(f"step {i} ({op}): missing 'output'")
+        df = OPS[op](agg, step)
+        agg.put(step["output"], df, i)
+        print(f"[ok] step {i:02d} {op} -> {step['output']} ({len(df)} rows, {time.perf_counter() - t0:.2f}s)")
+    return agg
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", required=True, help="YAML (.yaml/.yml) or TOML (.toml) step list")
+    ap.add_argument("--materialize-dir", default=None, help="Debug: write every step's output here")
+    ap.add_argument("--materialize-format", choices=["csv", "parquet"], default="csv")
+    args = ap.parse_args(argv)
+
+    cfg = load_config(args.config)
+    t0 = time.perf_counter()
+    run_steps(cfg["steps"], Aggregation(args.materialize_dir, args.materialize_format))
+    print(f"[ok] {len(cfg['steps'])} steps in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# 6_analysis/bootstrap_ci.py
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# pandas, NumPy and the utils built on them are imported where used, so --help stays fast
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    p.add_argument("--master", required=True, help="Finalized master (.csv or Parquet store)")
+    p.add_argument("--out-csv", required=True, help="Per model x dataset CIs")
+    p.add_argument("--pairs-csv", default="", help="Paired model-vs-model comparisons within each dataset")
+    p.add_argument("--metric", default="ligand_rmsd")
+    p.add_argument("--threshold", type=float, default=2.0, help="Success if metric < threshold")
+    p.add_argument("--stats", default="rate,median", help="Comma list from rate, median, mean (utils.bootstrap.STATS)")
+    p.add_argument("--reps", type=int, default=10_000)
+    p.add_argument("--alpha", type=float, default=0.05)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workers", type=int, default=0, help="0 = all cores")
+    return p.parse_args(argv)
+
+
+def per_target(master: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """PDB_ID x (Source, dataset) matrix of the metric (first row per target wins)."""
+    import pandas as pd
+
+    df = master[["Source", "dataset", "PDB_ID", metric]].copy()
+    df[metric] = pd.to_numeric(df[metric], errors="coerce")
+    df = df.drop_duplicates(["Source", "dataset", "PDB_ID"], keep="first")
+    return df.pivot(index="PDB_ID", columns=["dataset", "Source"], values=metric)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    import pandas as pd
+
+    from utils.bootstrap import bootstrap_ci, paired_compare
+    from utils.master_store import read_table, write_table
+
+    stats = [s.strip() for s in args.stats.split(",") if s.strip()]
+    opts = dict(threshold=args.threshold, reps=args.reps, alpha=args.alpha, seed=args.seed)
+
+    master = read_table(args.master)
+    if args.metric not in master.columns:
+        raise SystemExit(f"Missing metric column: {args.metric}")
+    wide = per_target(master, args.metric)
+
+    t0 = time.perf_counter()
+    rows, pairs = [], []
+    with ProcessPoolExecutor(max_workers=args.workers or None) as pool:
+        for dataset, source in sorted(wide.columns):
+            values = wide[(dataset, source)].dropna().to_numpy()
+            res = bootstrap_ci(values, stats, pool=pool, **opts)
+            row = {"Source": source, "dataset": dataset, "n": len(values)}
+            for s, ci in res.items():
+                row.update({s: ci.estimate, f"{s}_lo": ci.lo, f"{s}_hi": ci.hi})
+            rows.append(row)
+
+        if args.pairs_csv:
+            for dataset in sorted({d for d, _ in wide.columns}):
+                sources = sorted(s for d, s in wide.columns if d == dataset)
+                for a, b in combinations(sources, 2):
+                    both = wide[[(dataset, a), (dataset, b)]].dropna()
+                    if both.empty:
+                        continue
+                    res = paired_compare(both.iloc[:, 0].to_numpy(), both.iloc[:, 1].to_numpy(), stats, pool=pool, **opts)
+                    row = {"dataset": dataset, "model_a": a, "model_b": b, "n_paired": len(both)}
+                    for s, r in res.items():
+                        row.update({
+                            f"{s}_a": r.a.estimate,
+                            f"{s}_b": r.b.estimate,
+                            f"{s}_diff": r.diff.estimate,
+                            f"{s}_diff_lo": r.diff.lo,
+                            f"{s}_diff_hi": r.diff.hi,
+                            f"{s}_p_perm": r.p_value,
+                        })
+                    pairs.append(row)
+
+    write_table(pd.DataFrame(rows), args.out_csv)
+    print(f"Wrote -> {args.out_csv}")
+    if args.pairs_csv:
+        write_table(pd.DataFrame(pairs), args.pairs_csv)
+        print(f"Wrote -> {args.pairs_csv}")
+    print(f"[ok] {args.reps} replicates, {len(rows)} groups, {len(pairs)} pairs in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
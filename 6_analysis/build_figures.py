@@ -0,0 +1,214 @@
+# 6_analysis/build_figures.py
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# pandas and the pandas-based utils are imported where used, so --help stays fast
+if TYPE_CHECKING:
+    import pandas as pd
+
+MODEL_NAMES = {
+    "af3": "AF3",
+    "boltz": "Boltz-2",
+    "chai": "Chai-1",
+    "dynamicbind": "DynamicBind",
+    "protenix": "Protenix",
+}
+DATASET_NAMES = {"main": "orthosteric", "allo": "allosteric"}
+
+DEFAULT_STYLE: dict[str, Any] = {
+    "dpi": 200,
+    "figsize": [8.0, 3.6],
+    "bins": 40,
+    "max_rmsd": 20.0,
+    "threshold": 2.0,
+    "color": "#1f9bcf",
+    "threshold_color": "#d62728",
+    "metric": "ligand_rmsd",
+    "protein_metric": "rmsd",
+}
+
+CACHE_NAME = ".figure_cache.json"
+# Bump when the drawing code changes so every figure is redrawn once.
+RENDER_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FigureJob:
+    name: str
+    kind: str  # "model" (one Source x dataset) or "overview" (all Sources of one dataset)
+    dataset: str
+    data: pd.DataFrame
+    style: dict
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    p.add_argument("--master", required=True, help="Finalized master (.csv or Parquet store)")
+    p.add_argument("--out-dir", default="Figures/generated")
+    p.add_argument("--style", default="", help="JSON/YAML file overriding DEFAULT_STYLE keys")
+    p.add_argument("--workers", type=int, default=0, help="0 = all cores")
+    p.add_argument("--force", action="store_true", help="Redraw even if inputs are unchanged")
+    return p.parse_args(argv)
+
+
+def load_style(path: str) -> dict[str, Any]:
+    style = dict(DEFAULT_STYLE)
+    if path:
+        text = Path(path).read_text()
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+
+            style.update(yaml.safe_load(text) or {})
+        else:
+            style.update(json.loads(text))
+    return style
+
+
+def build_jobs(master: pd.DataFrame, style: dict[str, Any]) -> list[FigureJob]:
+    cols = [c for c in ["Source", "dataset", "PDB_ID", style["metric"], style["protein_metric"]] if c in master.columns]
+    df = master[cols].copy()
+    df["Source"] = df["Source"].astype(str).str.lower()
+    df["dataset"] = df["dataset"].astype(str).str.lower()
+    df = df.sort_values(["dataset", "Source", "PDB_ID"], kind="stable").reset_index(drop=True)
+
+    jobs = []
+    for (dataset, source), part in df.groupby(["dataset", "Source"], sort=True):
+        name = f"{MODEL_NAMES.get(source, source)}_{DATASET_NAMES.get(dataset, dataset)}_{style['metric']}"
+        jobs.append(FigureJob(name, "model", dataset, part.reset_index(drop=True), style))
+    for dataset, part in df.groupby("dataset", sort=True):
+        name = f"{DATASET_NAMES.get(dataset, dataset)}_{style['metric']}_overview"
+        jobs.append(FigureJob(name, "overview", dataset, part.reset_index(drop=True), style))
+    return jobs
+
+
+def job_hash(job: FigureJob) -> str:
+    """Hash of everything the picture depends on: data slice, style, kind and code version."""
+    import pandas as pd
+
+    h = hashlib.sha256()
+    h.update(json.dumps({"v": RENDER_VERSION, "kind": job.kind, "style": job.style}, sort_keys=True).encode())
+    h.update(pd.util.hash_pandas_object(job.data, index=False).to_numpy().tobytes())
+    h.update(",".join(job.data.columns).encode())
+    return h.hexdigest()
+
+
+def _init_agg() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def render(job: FigureJob, out_path: str) -> str:
+    _init_agg()
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import pandas as pd
+
+    st = job.style
+    metric = st["metric"]
+    fig, axes = plt.subplots(1, 2, figsize=st["figsize"])
+
+    if job.kind == "model":
+        vals = pd.to_numeric(job.data[metric], errors="coerce").dropna().to_numpy()
+        model = MODEL_NAMES.get(str(job.data["Source"].iloc[0]), str(job.data["Source"].iloc[0]))
+        title = f"{model} — {DATASET_NAMES.get(job.dataset, job.dataset)}"
+
+        ax = axes[0]
+        ax.hist(np.clip(vals, 0, st["max_rmsd"]), bins=st["bins"], range=(0, st["max_rmsd"]), color=st["color"])
+        ax.axvline(st["threshold"], color=st["threshold_color"], ls="--", lw=1)
+        rate = float(np.mean(vals < st["threshold"])) if len(vals) else float("nan")
+        ax.set_title(f"{title}\n{metric} < {st['threshold']:g} Å: {rate:.1%} (n={len(vals)})", fontsize=9)
+        ax.set_xlabel(f"{metric} (Å)")
+        ax.set_ylabel("targets")
+
+        ax = axes[1]
+        pm = st["protein_metric"]
+        if pm in job.data.columns:
+            xy = job.data[[pm, metric]].apply(pd.to_numeric, errors="coerce").dropna()
+            ax.scatter(xy[pm], xy[metric], s=6, alpha=0.6, color=st["color"])
+            ax.axhline(st["threshold"], color=st["threshold_color"], ls="--", lw=1)
+            ax.set_xlabel(f"{pm} (Å)")
+            ax.set_ylabel(f"{metric} (Å)")
+        else:
+            ax.axis("off")
+    else:
+        for source, part in job.data.groupby("Source", sort=True):
+            vals = np.sort(pd.to_numeric(part[metric], errors="coerce").dropna().to_numpy())
+            if not len(vals):
+                continue
+            label = MODEL_NAMES.get(source, source)
+            axes[0].step(vals, np.arange(1, len(vals) + 1) / len(vals), where="post", label=label)
+            axes[1].bar(label, float(np.mean(vals < st["threshold"])))
+        axes[0].axvline(st["threshold"], color=st["threshold_color"], ls="--", lw=1)
+        axes[0].set_xlim(0, st["max_rmsd"])
+        axes[0].set_xlabel(f"{metric} (Å)")
+        axes[0].set_ylabel("fraction of targets")
+        axes[0].legend(fontsize=7)
+        axes[0].set_title(DATASET_NAMES.get(job.dataset, job.dataset), fontsize=9)
+        axes[1].set_ylabel(f"{metric} < {st['threshold']:g} Å")
+        axes[1].set_ylim(0, 1)
+        axes[1].tick_params(axis="x", labelrotation=30)
+
+    fig.tight_layout()
+    out = Path(out_path)
+    tmp = out.with_suffix(".tmp.png")
+    fig.savefig(tmp, dpi=st["dpi"])
+    plt.close(fig)
+    tmp.replace(out)
+    return str(out)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    from utils.master_store import read_table
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache_path = out_dir / CACHE_NAME
+    cache: dict[str, str] = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+
+    t0 = time.perf_counter()
+    jobs = build_jobs(read_table(args.master), load_style(args.style))
+    hashes = {job.name: job_hash(job) for job in jobs}
+    stale = [
+        job for job in jobs
+        if args.force or cache.get(job.name) != hashes[job.name] or not (out_dir / f"{job.name}.png").exists()
+    ]
+
+    failed = 0
+    if stale:
+        with ProcessPoolExecutor(max_workers=args.workers or None, initializer=_init_agg) as pool:
+            futures = {pool.submit(render, job, str(out_dir / f"{job.name}.png")): job for job in stale}
+            for fut, job in futures.items():
+                try:
+                    print(f"Wrote -> {fut.result()}")
+                    cache[job.name] = hashes[job.name]
+                except Exception as e:  # keep going; the figure stays stale and is retried next run
+                    failed += 1
+                    cache.pop(job.name, None)
+                    print(f"[fail] {job.name}: {type(e).__name__}: {e}")
+
+    cache_path.write_text(json.dumps(cache, indent=2, sort_keys=True))
+    print(
+        f"[ok] {len(jobs)} figures: {len(stale) - failed} drawn, {len(jobs) - len(stale)} unchanged, "
+        f"{failed} failed in {time.perf_counter() - t0:.1f}s"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
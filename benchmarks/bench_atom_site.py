@@ -0,0 +1,109 @@
+# benchmarks/bench_atom_site.py
+"""Time utils.atom_site against OST and Biopython on the largest structures in a folder.
+
+    python benchmarks/bench_atom_site.py --in-dir data/refs --largest 5 --out-csv bench_atom_site.csv
+
+Readers whose package is not installed are skipped. Times are the best of
+``--repeat`` runs of a full parse (file read included).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from utils.atom_site import read_atom_site, structure_format  # noqa: E402
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    p.add_argument("--in-dir", required=True)
+    p.add_argument("--pattern", default="**/*.cif")
+    p.add_argument("--largest", type=int, default=5, help="Benchmark the N largest matching files")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out-csv", default="")
+    return p.parse_args(argv)
+
+
+def numpy_reader(path: Path) -> int:
+    return len(read_atom_site(path, heavy_only=False)["xyz"])
+
+
+def ost_reader(path: Path) -> int:
+    from ost import io
+
+    return io.LoadEntity(str(path), format="auto").GetAtomCount()
+
+
+def biopython_reader(path: Path) -> int:
+    from Bio.PDB import MMCIFParser, PDBParser
+
+    parser = PDBParser(QUIET=True) if structure_format(path) == "pdb" else MMCIFParser(QUIET=True)
+    return sum(1 for _ in parser.get_structure("s", str(path))[0].get_atoms())
+
+
+def available_readers() -> dict[str, Callable[[Path], int]]:
+    readers = {"numpy": numpy_reader}
+    for name, module, fn in (("ost", "ost", ost_reader), ("biopython", "Bio", biopython_reader)):
+        try:
+            __import__(module)
+        except ImportError:
+            print(f"[skip] {name}: {module} is not installed")
+            continue
+        readers[name] = fn
+    return readers
+
+
+def best_time(fn: Callable[[Path], int], path: Path, repeat: int) -> tuple[float, int]:
+    best, n = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return best, n
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    files = sorted(Path(args.in_dir).glob(args.pattern), key=lambda f: f.stat().st_size, reverse=True)[: args.largest]
+    if not files:
+        raise SystemExit(f"No files match {args.pattern} under {args.in_dir}")
+    readers = available_readers()
+
+    rows = []
+    for f in files:
+        row = {"file": f.name, "size_mb": round(f.stat().st_size / 1e6, 2)}
+        for name, fn in readers.items():
+            try:
+                seconds, n_atoms = best_time(fn, f, args.repeat)
+            except Exception as e:
+                print(f"[WARN] {name} {f.name}: {e}")
+                continue
+            row[f"{name}_s"] = round(seconds, 4)
+            row[f"{name}_atoms"] = n_atoms
+        rows.append(row)
+        times = "  ".join(f"{k[:-2]}={v:.4f}s" for k, v in row.items() if k.endswith("_s"))
+        print(f"{f.name} ({row['size_mb']} MB): {times}")
+
+    if args.out_csv:
+        fields = ["file", "size_mb"] + [f"{n}_{s}" for n in readers for s in ("s", "atoms")]
+        out = Path(args.out_csv)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", newline="") as fh:
+            w = csv.DictWriter(fh, fieldnames=fields, restval="")
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+# benchmarks/bench_residue_views.py
+"""Compare OST query-string selections with ost_utils.ResidueIndex views.
+
+    python benchmarks/bench_residue_views.py --ref-cif ref/1ABC.cif --pocket-json pocket/1ABC.json \\
+        --ligand-json ligand/1ABC.json
+
+Times the old paths (a ``cname=.. and rnum=.. and aname=CA or ...`` string over the
+pocket residues, and ``within R of (<ligand selections>)``) against an index built
+once per entity, and checks that both select the same atoms. Needs OpenStructure.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parents[1]
+for _p in (ROOT, ROOT / "4_score"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from ost_utils import ResidueIndex, heavy_atoms, res_key_of  # noqa: E402
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    p.add_argument("--ref-cif", required=True)
+    p.add_argument("--pocket-json", required=True, help="build_pocket_residue_set.py output")
+    p.add_argument("--ligand-json", required=True, help="select_ligand.py output")
+    p.add_argument("--radius", type=float, default=8.0)
+    p.add_argument("--repeat", type=int, default=20)
+    return p.parse_args(argv)
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def atom_keys(view) -> set[tuple]:
+    return {(*res_key_of(a.GetResidue()), a.GetName()) for a in view.atoms}
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    from ost import io
+
+    ent = io.LoadEntity(args.ref_cif, format="auto")
+    pocket = json.loads(Path(args.pocket_json).read_text())["pocket_residues"]
+    ligands = json.loads(Path(args.ligand_json).read_text())["ligands"]
+
+    def query_ca():
+        sel = " or ".join(f"cname={r['chain']} and rnum={int(r['resnum'])} and aname=CA" for r in pocket)
+        return ent.Select(sel)
+
+    def query_within():
+        lig_sel = " or ".join(x["ost_residue_sel"] for x in ligands)
+        return ent.Select("protein and ele != H").Select(f"within {args.radius} of ({lig_sel})")
+
+    t_index, index = best_time(lambda: ResidueIndex(ent), args.repeat)
+
+    def index_within():
+        ligs = index.lookup(ligands)
+        return index.residues_within([a for r in ligs for a in heavy_atoms(r)], args.radius)
+
+    t_q1, v_q1 = best_time(query_ca, args.repeat)
+    t_i1, v_i1 = best_time(lambda: index.view(pocket, ["CA"]), args.repeat)
+    t_q2, v_q2 = best_time(query_within, args.repeat)
+    t_i2, v_i2 = best_time(index_within, args.repeat)
+
+    print(f"{len(pocket)} pocket residues, {len(ligands)} ligand(s); ResidueIndex build {t_index * 1e3:.2f} ms (once per entity)")
+    for name, t_query, t_idx, same in (
+        ("pocket CA view", t_q1, t_i1, atom_keys(v_q1) == atom_keys(v_i1)),
+        ("residues within radius", t_q2, t_i2, {res_key_of(r) for r in v_q2.residues} == {res_key_of(r) for r in v_i2}),
+    ):
+        print(f"{name:<24} query {t_query * 1e3:8.2f} ms   index {t_idx * 1e3:8.2f} ms   x{t_query / max(t_idx, 1e-9):.1f}   same={same}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
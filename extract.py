@@ -1,21 +1,35 @@
-from pymol import cmd
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+import argparse
+import csv
 import numpy as np
 import os
-from rdkit import Chem
-from rdkit.Chem import AllChem, rdFMCS
+import sqlite3
+import time
+import traceback
+
+# PyMOL and RDKit are imported inside the functions that use them, so --help and
+# loading this module through the fullanalysis CLI stay fast
+from utils.batch import TaskStatus, write_status_csv
 
 PRED_CIF = "./pred.cif"
 REF_CIF  = "./ref.cif"
 CUTOFF = 5.0
 DISTANCE_CUTOFF = 20.0
 MIN_MATCH_ATOMS = 5
+# MCS results depend only on the two ligand graphs, so they are memoized across runs
+MCS_CACHE_DB = os.environ.get("MCS_CACHE_DB", ".mcs_cache.sqlite")
+
+# Ligands and proteins stay in memory; only the matched pair is ever written to disk
+Ligand = namedtuple("Ligand", ["sdf", "centroid", "mol"])
+MatchedPair = namedtuple("MatchedPair", ["ref_prot_pdb", "pred_prot_pdb", "ref_lig", "pred_lig"])
 
-def extract_ligands(obj_name, out_prefix):
-    sel_all = f"{obj_name}_ligands"
-    cmd.select(sel_all, f"{obj_name} and organic within {CUTOFF} of {obj_name} and polymer")
+def extract_ligands(obj_name):
+    from pymol import cmd
+    from rdkit import Chem
+
+    sel_all = f"{obj_name} and organic within {CUTOFF} of {obj_name} and polymer"
     atoms = cmd.get_model(sel_all).atom
-    if not atoms: 
+    if not atoms:
         return []
 
     res_groups = defaultdict(list)
@@ -23,85 +37,183 @@ def extract_ligands(obj_name, out_prefix):
         res_id = (a.resn, a.resi, a.chain)
         res_groups[res_id].append(a)
 
-    ligand_files = []
-    centroids = []
-
-    for i, ((resn, resi, chain), atom_list) in enumerate(res_groups.items()):
-        sel = f"{obj_name}_lig_{i}"
-        cmd.select(sel, f"{obj_name} and resn {resn} and resi {resi} and chain {chain}")
-        out_sdf = f"{out_prefix}_lig_{i}.sdf"
-        cmd.save(out_sdf, sel)
-        cmd.delete(sel)
+    ligands = []
 
-        mol = Chem.MolFromMolFile(out_sdf, sanitize=False)
+    for resn, resi, chain in res_groups:
+        sdf = cmd.get_str("sdf", f"{obj_name} and resn {resn} and resi {resi} and chain {chain}")
+        mol = Chem.MolFromMolBlock(sdf, sanitize=False)
         if mol is None or not mol.GetNumConformers():
             continue
-        conf = mol.GetConformer()
-        coords = np.array([list(conf.GetAtomPosition(j)) for j in range(mol.GetNumAtoms())])
-        centroid = coords.mean(axis=0)
-        ligand_files.append(out_sdf)
-        centroids.append(centroid)
+        centroid = mol.GetConformer().GetPositions().mean(axis=0)
+        ligands.append(Ligand(sdf, centroid, mol))
+
+    return ligands
+
+class McsCache:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS mcs (key_a TEXT, key_b TEXT, n_match INTEGER, PRIMARY KEY (key_a, key_b))"
+        )
+
+    def get(self, key):
+        row = self.conn.execute("SELECT n_match FROM mcs WHERE key_a = ? AND key_b = ?", key).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, key, n_match):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO mcs VALUES (?, ?, ?)", (*key, n_match))
 
-    cmd.delete(sel_all)
-    return list(zip(ligand_files, centroids))
+def mcs_key(mol1, mol2):
+    from rdkit import Chem
+
+    try:
+        smi = sorted([Chem.MolToSmiles(mol1), Chem.MolToSmiles(mol2)])
+    except Exception:
+        return None
+    return tuple(smi)
+
+def mcs_match_size(mol1, mol2):
+    # None when the search timed out or failed: unknown, not "no match"
+    from rdkit import Chem
+    from rdkit.Chem import rdFMCS
 
-def is_valid_match(mol1, mol2):
     try:
         mcs = rdFMCS.FindMCS([mol1, mol2], timeout=5,
                              ringMatchesRingOnly=False,
                              matchValences=False,
                              completeRingsOnly=False)
-        if mcs.canceled or mcs.numAtoms == 0:
-            return False
+        if mcs.canceled:
+            return None
+        if mcs.numAtoms == 0:
+            return 0
         patt = Chem.MolFromSmarts(mcs.smartsString)
         match1 = mol1.GetSubstructMatch(patt)
         match2 = mol2.GetSubstructMatch(patt)
         if not match1 or not match2 or len(match1) != len(match2):
+            return 0
+        return len(match1)
+    except Exception:
+        return None
+
+def is_valid_match(mol1, mol2, cache=None):
+    key = mcs_key(mol1, mol2) if cache is not None else None
+    n_match = cache.get(key) if key is not None else None
+    if n_match is None:
+        n_match = mcs_match_size(mol1, mol2)
+        # Only completed searches are cached; a timeout may succeed on a later run
+        if n_match is None:
             return False
-        return len(match1) >= MIN_MATCH_ATOMS
-    except:
-        return False
-
-def find_best_match(ref_ligs, pred_ligs):
-    best_dist = float("inf")
-    best_pair = (None, None)
-
-    for ref_file, ref_centroid in ref_ligs:
-        mol1 = Chem.MolFromMolFile(ref_file, sanitize=False)
-        for pred_file, pred_centroid in pred_ligs:
-            mol2 = Chem.MolFromMolFile(pred_file, sanitize=False)
-            dist = np.linalg.norm(np.array(ref_centroid) - np.array(pred_centroid))
-            if dist > DISTANCE_CUTOFF:
-                continue
-            if not is_valid_match(mol1, mol2):
-                continue
-            if dist < best_dist:
-                best_dist = dist
-                best_pair = (ref_file, pred_file)
-
-    return best_pair
-
-def main():
-    if not os.path.exists(REF_CIF) or not os.path.exists(PRED_CIF):
-        cmd.quit()
-
-    cmd.load(REF_CIF, "ref")
-    cmd.load(PRED_CIF, "pred")
+        if key is not None:
+            cache.put(key, n_match)
+    return n_match >= MIN_MATCH_ATOMS
+
+def find_best_match(ref_ligs, pred_ligs, cache=None):
+    ref_c = np.array([lig.centroid for lig in ref_ligs])
+    pred_c = np.array([lig.centroid for lig in pred_ligs])
+    dist = np.linalg.norm(ref_c[:, None, :] - pred_c[None, :, :], axis=-1)
+
+    # Closest pairs first: the first chemically valid pair is the best one
+    order = np.argsort(dist, axis=None, kind="stable")
+    for i, j in zip(*np.unravel_index(order, dist.shape)):
+        if dist[i, j] > DISTANCE_CUTOFF:
+            break
+        if is_valid_match(ref_ligs[i].mol, pred_ligs[j].mol, cache):
+            return ref_ligs[i], pred_ligs[j]
+
+    return None, None
+
+def extract_pair(ref_cif, pred_cif, cache=None):
+    if not os.path.exists(ref_cif) or not os.path.exists(pred_cif):
+        return None
+    from pymol import cmd
+
+    cmd.delete("all")
+    cmd.load(ref_cif, "ref")
+    cmd.load(pred_cif, "pred")
     cmd.align("pred and polymer", "ref and polymer")
 
-    ref_ligs = extract_ligands("ref", "ref")
-    pred_ligs = extract_ligands("pred", "pred")
+    ref_ligs = extract_ligands("ref")
+    pred_ligs = extract_ligands("pred")
 
     if not ref_ligs or not pred_ligs:
-        cmd.quit()
-
-    ref_file, pred_file = find_best_match(ref_ligs, pred_ligs)
-    if ref_file and pred_file:
-        os.rename(ref_file, "ref1_lig.sdf")
-        os.rename(pred_file, "pred1_lig.sdf")
-        cmd.save("ref1_prot.pdb", "ref and polymer")
-        cmd.save("pred1_prot.pdb", "pred and polymer")
-
-    cmd.quit()
-
-main()
\ No newline at end of file
+        return None
+
+    ref_lig, pred_lig = find_best_match(ref_ligs, pred_ligs, cache)
+    if ref_lig is None or pred_lig is None:
+        return None
+
+    return MatchedPair(
+        cmd.get_str("pdb", "ref and polymer"),
+        cmd.get_str("pdb", "pred and polymer"),
+        ref_lig,
+        pred_lig,
+    )
+
+def write_pair(pair, ref_prefix="ref1", pred_prefix="pred1"):
+    for path, text in [
+        (f"{ref_prefix}_lig.sdf", pair.ref_lig.sdf),
+        (f"{pred_prefix}_lig.sdf", pair.pred_lig.sdf),
+        (f"{ref_prefix}_prot.pdb", pair.ref_prot_pdb),
+        (f"{pred_prefix}_prot.pdb", pair.pred_prot_pdb),
+    ]:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+def run_pairs(jobs, cache=None):
+    """Extract and write every job's pair in this session; one failure does not stop the rest."""
+    statuses = []
+    for job in jobs:
+        t0 = time.perf_counter()
+        try:
+            pair = extract_pair(job["ref_cif"], job["pred_cif"], cache)
+            if pair is None:
+                status, msg = "no_match", "no matched ligand pair"
+            else:
+                write_pair(pair, job["ref_prefix"], job["pred_prefix"])
+                status, msg = "ok", ""
+        except Exception as e:
+            traceback.print_exc()
+            status, msg = "error", f"{type(e).__name__}: {e}".replace("\n", " ")
+        statuses.append(TaskStatus(job["pred_cif"], status, time.perf_counter() - t0, msg))
+    return statuses
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--ref-cif", default=REF_CIF)
+    p.add_argument("--pred-cif", default=PRED_CIF)
+    p.add_argument("--ref-prefix", default="ref1")
+    p.add_argument("--pred-prefix", default="pred1")
+    p.add_argument("--pairs-csv", default="",
+                   help="CSV with ref_cif,pred_cif,ref_prefix,pred_prefix; all pairs run in one PyMOL session")
+    p.add_argument("--status-csv", default="extract_status.csv",
+                   help="With --pairs-csv: per-pair status (ok, no_match, error) keyed by pred_cif")
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = McsCache(MCS_CACHE_DB)
+
+    if not args.pairs_csv:
+        pair = extract_pair(args.ref_cif, args.pred_cif, cache)
+        if pair is None:
+            print(f"no matched ligand pair: {args.ref_cif} / {args.pred_cif}")
+            return 0
+        write_pair(pair, args.ref_prefix, args.pred_prefix)
+        return 0
+
+    with open(args.pairs_csv, newline="") as f:
+        jobs = list(csv.DictReader(f))
+    statuses = run_pairs(jobs, cache)
+    write_status_csv(statuses, args.status_csv)
+    n = {k: sum(s.status == k for s in statuses) for k in ("ok", "no_match", "error")}
+    print(f"Done. ok={n['ok']} no_match={n['no_match']} failed={n['error']} status -> {args.status_csv}")
+    return 0 if n["error"] == 0 else 2
+
+if __name__ == "__main__":
+    rc = main()
+    from pymol import cmd
+
+    cmd.quit(rc)
+    raise SystemExit(rc)
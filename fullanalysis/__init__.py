@@ -0,0 +1,17 @@
+"""Importable entry points for the benchmarking pipeline.
+
+    import fullanalysis
+    fullanalysis.run("finalize-master", ["--in_csv", "master.csv", "--out_csv", "final.csv"])
+    finalize = fullanalysis.load("finalize-master").finalize_master  # DataFrame -> DataFrame
+
+Importing the package is cheap; heavy dependencies (pandas, OpenStructure, RDKit,
+Biopython) are imported by a stage only when it is loaded or run.
+"""
+
+from __future__ import annotations
+
+__version__ = "0.1.0"
+
+from .stages import COMMANDS, Command, load, run  # noqa: E402
+
+__all__ = ["COMMANDS", "Command", "load", "run", "__version__"]
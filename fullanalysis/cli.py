@@ -0,0 +1,47 @@
+"""``fullanalysis <command> [args...]``: one entry point for every pipeline stage."""
+
+from __future__ import annotations
+
+import sys
+
+from . import __version__
+from .stages import COMMANDS, run
+
+
+def usage() -> str:
+    lines = ["usage: fullanalysis <command> [args...]", "", "commands:"]
+    group = None
+    for cmd in COMMANDS.values():
+        if cmd.group != group:
+            group = cmd.group
+            lines.append(f"  {group}")
+        lines.append(f"    {cmd.name:<26}{cmd.help}")
+    lines += ["", "Run `fullanalysis <command> --help` for a command's options."]
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in {"-h", "--help", "help"}:
+        print(usage())
+        return 0
+    if argv[0] == "--version":
+        print(__version__)
+        return 0
+
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"fullanalysis: unknown command {name!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    sys.argv = [f"fullanalysis {name}", *rest]  # so argparse usage lines name the subcommand
+    try:
+        return run(name, rest)
+    except SystemExit as e:  # argparse errors and scripts that exit with a message
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
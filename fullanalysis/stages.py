@@ -0,0 +1,89 @@
+"""Registry of pipeline stage scripts and in-process dispatch.
+
+The stage folders (``0_setup`` ... ``6_analysis``) start with a digit and are not
+packages, so each script is imported by its file stem after putting its folder (and
+the repo root, for ``utils``) on ``sys.path`` -- the same way ``06_run_aggregation``
+imports ``01``-``05``. Nothing here imports pandas, OST or RDKit; a script's own
+imports are only paid when that command is run or loaded.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@dataclass(frozen=True)
+class Command:
+    name: str
+    script: str  # path relative to the repo root
+    help: str
+
+    @property
+    def group(self) -> str:
+        return self.script.split("/")[0] if "/" in self.script else "pipeline"
+
+
+COMMANDS: dict[str, Command] = {
+    c.name: c
+    for c in [
+        Command("download-structures", "0_setup/download_structures_from_excel.py", "Download PDB/CIF files listed in an Excel sheet"),
+        Command("download-cifs", "0_setup/download_cifs_from_excel.py", "Download CIF files listed in an Excel sheet"),
+        Command("download-pdbs", "0_setup/download_pdbs_from_excel.py", "Download PDB files listed in an Excel sheet"),
+        Command("build-chai-fasta", "1_inputs/build_chai_fasta_from_chains_and_csv.py", "Chai-1 FASTA inputs from chains + ligand CSV"),
+        Command("build-boltz-yaml", "1_inputs/build_boltz_yaml_from_chains_and_csv.py", "Boltz-2 YAML inputs from chains + ligand CSV"),
+        Command("build-dynamicbind-inputs", "1_inputs/build_dynamicbind_inputs_from_chains_and_csv.py", "DynamicBind inputs from chains + ligand CSV"),
+        Command("collect-af3", "2_run_models/collect_af3_outputs.py", "Collect AlphaFold 3 models into <out>/<PDB>/model_*.cif"),
+        Command("collect-boltz2", "2_run_models/collect_boltz2_outputs.py", "Collect Boltz-2 models"),
+        Command("collect-chai1", "2_run_models/collect_chai1_outputs.py", "Collect Chai-1 models"),
+        Command("collect-dynamicbind", "2_run_models/collect_dynamicbind_outputs.py", "Collect DynamicBind models"),
+        Command("validate-predictions", "2_run_models/validate_predictions.py", "Check every target folder has non-trivial model files"),
+        Command("normalize-structures", "3_postprocess_predictions/normalize_structures.py", "Strip hydrogens and rewrite as mmCIF"),
+        Command("select-ligand", "3_postprocess_predictions/select_ligand.py", "Pick the scored ligand(s) of a reference"),
+        Command("build-pocket", "3_postprocess_predictions/build_pocket_residue_set.py", "Pocket residues within a radius of the ligand"),
+        Command("build-binding-site", "3_postprocess_predictions/build_binding_site_residue_set.py", "Binding-site residues within a radius of the ligand"),
+        Command("extract-entities", "3_postprocess_predictions/extract_entities_from_cif.py", "Write receptor / ligand mmCIFs"),
+        Command("build-coord-store", "3_postprocess_predictions/build_coord_store.py", "Parse structures once into a memory-mapped coordinate store"),
+        Command("find-duplicates", "3_postprocess_predictions/find_duplicate_models.py", "Detect (and expand results of) duplicate models"),
+        Command("run-all-metrics", "4_score/run_all_metrics.py", "BiSyRMSD, lDDT-PLI, QS and pocket/site CA RMSD for one pair"),
+        Command("score-ligand-pose", "4_score/score_ligand_pose_rmsd_openstructure.py", "Symmetry-corrected ligand RMSD"),
+        Command("score-lddt-pli", "4_score/score_lddt_pli.py", "lDDT-PLI"),
+        Command("score-qs", "4_score/score_qs_score.py", "QS-score"),
+        Command("score-pocket-rmsd", "4_score/score_pocket_rmsd.py", "Pocket CA RMSD"),
+        Command("score-binding-site-rmsd", "4_score/score_binding_site_rmsd.py", "Binding-site CA RMSD"),
+        Command("select-best", "5_aggregate/01_select_best_rows.py", "Best rows per group / best-of-N tables"),
+        Command("folder-tools", "5_aggregate/02_folder_tools.py", "Combine, merge or load folders of result CSVs"),
+        Command("normalize-master", "5_aggregate/03_normalize_master_schema.py", "Normalize a combined sheet to the master schema"),
+        Command("update-master", "5_aggregate/04_update_master_from_runs.py", "Upsert run metrics / ligand RMSDs into the master"),
+        Command("finalize-master", "5_aggregate/05_finalize_master.py", "Rename, filter and drop incomplete master rows"),
+        Command("aggregate", "5_aggregate/06_run_aggregation.py", "Run a whole aggregation config in one process"),
+        Command("bootstrap-ci", "6_analysis/bootstrap_ci.py", "Bootstrap CIs and paired permutation tests"),
+        Command("build-figures", "6_analysis/build_figures.py", "Redraw changed per-model figures"),
+        Command("extract-pair", "extract.py", "Matched protein/ligand PDB + SDF files per ref/pred pair (PyMOL, RDKit)"),
+        Command("dag", "run_dag.py", "Run stale pipeline tasks from pipeline_dag.yaml"),
+    ]
+}
+
+
+def load(name: str) -> ModuleType:
+    """Import a command's script as a module (e.g. to call its functions directly)."""
+    try:
+        cmd = COMMANDS[name]
+    except KeyError:
+        raise KeyError(f"Unknown command {name!r}") from None
+    path = ROOT / cmd.script
+    for p in (ROOT, path.parent):
+        if str(p) not in sys.path:
+            sys.path.insert(0, str(p))
+    return importlib.import_module(path.stem)
+
+
+def run(name: str, argv: list[str] | None = None) -> int:
+    """Run a command's ``main`` in this process and return its exit code."""
+    rc = load(name).main(list(argv or []))
+    return 0 if rc is None else int(rc)
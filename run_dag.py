@@ -0,0 +1,121 @@
+# run_dag.py
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Allow running as a standalone script without installing as a package.
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from utils.dag import (  # noqa: E402
+    DRY,
+    FAILED,
+    FRESH,
+    NOT_SELECTED,
+    RAN,
+    Stage,
+    build_tasks,
+    expand_targets,
+    run_graph,
+    summarize,
+)
+
+# Global stages (downloads, collectors) can add targets or model files; re-expand until stable.
+MAX_WAVES = 5
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Run stale pipeline tasks from a DAG config (see pipeline_dag.yaml)")
+    p.add_argument("--config", default="pipeline_dag.yaml")
+    p.add_argument("--jobs", type=int, default=0, help="Max concurrent tasks (0 = all cores)")
+    p.add_argument("--only", default="", help="Comma list of stages to run (their upstream tasks still gate them)")
+    p.add_argument("--targets", default="", help="Comma list restricting the targets")
+    p.add_argument("--dry-run", action="store_true", help="Report stale tasks without running them")
+    p.add_argument("--force", action="store_true", help="Treat every selected task as stale")
+    p.add_argument("--report", default="", help="Run report JSON (default: next to the state file)")
+    p.add_argument("--log-dir", default="", help="Write each task's stdout/stderr here")
+    return p.parse_args(argv)
+
+
+def load_config(path: Path) -> dict:
+    text = path.read_text()
+    if path.suffix.lower() == ".toml":
+        import tomllib
+
+        return tomllib.loads(text)
+    import yaml
+
+    return yaml.safe_load(text) or {}
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    cfg_path = Path(args.config)
+    cfg = load_config(cfg_path)
+    variables = {k: str(v) for k, v in (cfg.get("vars") or {}).items()}
+    stages = [Stage.from_dict(s) for s in cfg.get("stages", [])]
+    if not stages:
+        raise SystemExit(f"{cfg_path}: no stages declared")
+
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+    unknown = only - {s.name for s in stages}
+    if unknown:
+        raise SystemExit(f"Unknown stage(s) in --only: {', '.join(sorted(unknown))}")
+    wanted_targets = {t.strip() for t in args.targets.split(",") if t.strip()}
+
+    state_path = Path(cfg.get("state", ".dag_state.json"))
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    report_path = Path(args.report) if args.report else state_path.with_name(state_path.stem + "_report.json")
+    log_dir = Path(args.log_dir) if args.log_dir else None
+
+    t0 = time.perf_counter()
+    results = {}
+    seen: set[str] = set()
+    for wave in range(1, MAX_WAVES + 1):
+        targets = expand_targets(cfg.get("targets") or {}, variables)
+        if wanted_targets:
+            targets = [t for t in targets if t in wanted_targets]
+        tasks = build_tasks(stages, targets, variables)
+        if set(tasks) <= seen:
+            break
+        seen |= set(tasks)
+        print(f"[dag] wave {wave}: {len(targets)} targets, {len(tasks)} tasks")
+        graph = run_graph(
+            tasks, state, jobs=args.jobs, dry_run=args.dry_run, force=args.force, only=only or None, log_dir=log_dir
+        )
+        for r in graph:
+            results[r.id] = r
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps(state, indent=1, sort_keys=True))
+        global_stages = {s.name for s in stages if s.scope == "global"}
+        if args.dry_run or not any(r.status == RAN and r.stage in global_stages for r in graph):
+            break
+
+    per_stage = summarize(list(results.values()))
+    report = {
+        "config": str(cfg_path),
+        "seconds": round(time.perf_counter() - t0, 3),
+        "stages": per_stage,
+        "tasks": [vars(r) for r in results.values()],
+    }
+    report_path.write_text(json.dumps(report, indent=2))
+
+    for stage in stages:
+        counts = per_stage.get(stage.name, {})
+        print(f"  {stage.name:<24} " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    n = {k: sum(c.get(k, 0) for c in per_stage.values()) for k in (RAN, FRESH, FAILED, DRY, NOT_SELECTED)}
+    print(
+        f"[ok] {n[RAN]} ran, {n[FRESH]} fresh, {n[FAILED]} failed, {n[NOT_SELECTED]} not selected"
+        + (f", {n[DRY]} would run" if args.dry_run else "")
+        + f" in {report['seconds']:.1f}s; report -> {report_path}"
+    )
+    return 1 if any(r.status == FAILED for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,6 +8,11 @@ EXTRACT_SCRIPT="extract.py"
 DOCKER_IMAGE="registry.scicore.unibas.ch/schwede/openstructure:2.9.2"
 RADIUS=8.0   # Ångstrom cutoff for binding-site selection
 MASTER_OUTPUT="chai.csv"
+export MCS_CACHE_DB="$(pwd)/.mcs_cache.sqlite"   # extract.py ligand-matching cache, shared across runs
+DUP_CSV=""   # optional output of find_duplicate_models.py detect; duplicates reuse their representative's row
+EXTRACT_DIR="extract_pairs"   # extract.py output per model: $EXTRACT_DIR/<ID>/<model_idx>/{ref1,pred1}_*
+PAIRS_CSV="$EXTRACT_DIR/pairs.csv"
+EXTRACT_STATUS="$EXTRACT_DIR/extract_status.csv"
 
 # ─── Sanity checks ─────────────────────────────────────────────────────
 command -v docker >/dev/null 2>&1 || { echo "ERROR: Docker not found"; exit 1; }
@@ -17,6 +22,47 @@ command -v jq     >/dev/null 2>&1 || { echo "ERROR: jq not found";     exit 1; }
 # ─── CSV Header ───────────────────────────────────────────────────────
 echo "id,model_idx,pose_rmsd,pocket_rmsd,binding_site_rmsd,qs_score,lddt_pli" > "$MASTER_OUTPUT"
 
+# Metrics already computed in this run, keyed by "<pred_folder>/<model file>"
+declare -A ROW_CACHE=()
+QS_SKIPPED=0   # monomer vs monomer pairs whose QS-score was not computed
+
+# Number of distinct chains with ATOM (polymer) records in a PDB file
+polymer_chain_count() {
+  awk '/^ATOM  / { seen[substr($0, 22, 1)] = 1 } END { print length(seen) }' "$1"
+}
+
+# Representative model file of a model per $DUP_CSV (empty without one, or if the model is not listed)
+representative_of() {
+  [[ -n "$DUP_CSV" ]] || return 0
+  awk -F, -v t="$1" -v m="$2" '$1 == t && $2 == m { print $3 }' "$DUP_CSV"
+}
+
+# ─── Extract every pair in one PyMOL session ──────────────────────────
+rm -rf "$EXTRACT_DIR"
+mkdir -p "$EXTRACT_DIR"
+echo "ref_cif,pred_cif,ref_prefix,pred_prefix" > "$PAIRS_CSV"
+for pred_folder in "$PRED_DIR"/output_*; do
+  [[ -d "$pred_folder" ]] || continue
+  ID=${pred_folder##*/output_}
+  REF_CIF="$REF_DIR/${ID}.cif"
+  [[ -f "$REF_CIF" ]] || continue
+  for model_cif in "$pred_folder"/pred.model_idx_*.cif; do
+    [[ -f "$model_cif" ]] || continue
+    # Duplicates reuse their representative's metrics below, so they are not extracted
+    REP=$(representative_of "${pred_folder##*/}" "${model_cif##*/}")
+    [[ -z "$REP" || "$REP" == "${model_cif##*/}" ]] || continue
+    MODEL_IDX=$(basename "$model_cif" | sed 's/.*model_idx_\(.*\)\.cif/\1/')
+    PAIR_DIR="$EXTRACT_DIR/$ID/$MODEL_IDX"
+    echo "$REF_CIF,$model_cif,$PAIR_DIR/ref1,$PAIR_DIR/pred1" >> "$PAIRS_CSV"
+  done
+done
+
+# Writes ref1_prot.pdb, ref1_lig.sdf, pred1_prot.pdb, pred1_lig.sdf under each pair's folder;
+# a pair that fails is recorded in $EXTRACT_STATUS and the others still run
+if ! python3 "$EXTRACT_SCRIPT" --pairs-csv "$PAIRS_CSV" --status-csv "$EXTRACT_STATUS"; then
+  echo "  ⚠️  extract.py failed for some pairs, see $EXTRACT_STATUS" >&2
+fi
+
 # ─── Main Loop ────────────────────────────────────────────────────────
 for pred_folder in "$PRED_DIR"/output_*; do
   [[ -d "$pred_folder" ]] || continue
@@ -31,25 +77,29 @@ for pred_folder in "$PRED_DIR"/output_*; do
   for model_cif in "$pred_folder"/pred.model_idx_*.cif; do
     [[ -f "$model_cif" ]] || continue
     MODEL_IDX=$(basename "$model_cif" | sed 's/.*model_idx_\(.*\)\.cif/\1/')
+    PAIR_DIR="$EXTRACT_DIR/$ID/$MODEL_IDX"
 
-    ln -sf "$REF_CIF" ref.cif
-    ln -sf "$model_cif" pred.cif
+    # Duplicate models (exact or near) reuse the metrics of their representative, which
+    # sorts first and so has already been scored; if it got no metrics, neither does this one
+    REP=$(representative_of "${pred_folder##*/}" "${model_cif##*/}")
+    if [[ -n "$REP" && "$REP" != "${model_cif##*/}" ]]; then
+      echo "$ID,$MODEL_IDX,${ROW_CACHE["$pred_folder/$REP"]-,,,,}" >> "$MASTER_OUTPUT"
+      continue
+    fi
 
-    # Run extract.py to produce:
-    # - ref1_prot.pdb, ref1_lig.sdf
-    # - pred1_prot.pdb, pred1_lig.sdf
-    if ! python3 "$EXTRACT_SCRIPT"; then
+    EXTRACT_RESULT=$(awk -F, -v k="$model_cif" '$1 == k { print $2 }' "$EXTRACT_STATUS" 2>/dev/null || true)
+    if [[ "$EXTRACT_RESULT" == "error" ]]; then
       echo "  ⚠️  extract.py failed for $ID" >&2
       echo "$ID,$MODEL_IDX,,,,," >> "$MASTER_OUTPUT"
-      rm -f ref.cif pred.cif ref1_* pred1_* out.json qs_out.json
+      rm -rf "$PAIR_DIR"
       continue
     fi
 
     # Check that we have both protein and ligand outputs
-    if [[ ! -f pred1_prot.pdb || ! -f pred1_lig.sdf ]]; then
+    if [[ ! -f "$PAIR_DIR/pred1_prot.pdb" || ! -f "$PAIR_DIR/pred1_lig.sdf" ]]; then
       echo "  ℹ️  Missing pred1_prot.pdb or pred1_lig.sdf, skipping metrics" >&2
       echo "$ID,$MODEL_IDX,,,,," >> "$MASTER_OUTPUT"
-      rm -f ref.cif pred.cif ref1_* pred1_* out.json qs_out.json
+      rm -rf "$PAIR_DIR" out.json qs_out.json
       continue
     fi
 
@@ -61,10 +111,10 @@ for pred_folder in "$PRED_DIR"/output_*; do
       -v "$(pwd)":/data -w /data \
       "$DOCKER_IMAGE" \
         compare-ligand-structures \
-          -m pred1_prot.pdb \
-          -ml pred1_lig.sdf \
-          -r ref1_prot.pdb \
-          -rl ref1_lig.sdf \
+          -m "$PAIR_DIR/pred1_prot.pdb" \
+          -ml "$PAIR_DIR/pred1_lig.sdf" \
+          -r "$PAIR_DIR/ref1_prot.pdb" \
+          -rl "$PAIR_DIR/ref1_lig.sdf" \
           --rmsd \
           --full-results \
           -o out.json
@@ -79,10 +129,10 @@ for pred_folder in "$PRED_DIR"/output_*; do
       -v "$(pwd)":/data -w /data \
       "$DOCKER_IMAGE" \
         compare-ligand-structures \
-          -m pred1_prot.pdb \
-          -ml pred1_lig.sdf \
-          -r ref1_prot.pdb \
-          -rl ref1_lig.sdf \
+          -m "$PAIR_DIR/pred1_prot.pdb" \
+          -ml "$PAIR_DIR/pred1_lig.sdf" \
+          -r "$PAIR_DIR/ref1_prot.pdb" \
+          -rl "$PAIR_DIR/ref1_lig.sdf" \
           --rmsd \
           --radius "$RADIUS" \
           --full-results \
@@ -95,19 +145,25 @@ for pred_folder in "$PRED_DIR"/output_*; do
     BINDING_SITE_RMSD=$(jq -r '.rmsd.assigned_scores[0].score // empty' out.json)
 
     #### 4. Compute QS-score ####
-    docker run --rm \
-      --platform linux/amd64 \
-      --entrypoint ost \
-      -u "$(id -u):$(id -g)" \
-      -v "$(pwd)":/data -w /data \
-      "$DOCKER_IMAGE" \
-        compare-structures \
-          -m pred1_prot.pdb \
-          -r ref1_prot.pdb \
-          --qs-score \
-          -o qs_out.json
-
-    QS_SCORE=$(jq -r '.qs_global // empty' qs_out.json)
+    # Monomer vs monomer has no interface to compare: record 1.0 without starting OST
+    if (( $(polymer_chain_count "$PAIR_DIR/pred1_prot.pdb") <= 1 && $(polymer_chain_count "$PAIR_DIR/ref1_prot.pdb") <= 1 )); then
+      QS_SCORE=1.0
+      QS_SKIPPED=$((QS_SKIPPED + 1))
+    else
+      docker run --rm \
+        --platform linux/amd64 \
+        --entrypoint ost \
+        -u "$(id -u):$(id -g)" \
+        -v "$(pwd)":/data -w /data \
+        "$DOCKER_IMAGE" \
+          compare-structures \
+            -m "$PAIR_DIR/pred1_prot.pdb" \
+            -r "$PAIR_DIR/ref1_prot.pdb" \
+            --qs-score \
+            -o qs_out.json
+
+      QS_SCORE=$(jq -r '.qs_global // empty' qs_out.json)
+    fi
 
     #### 5. Compute lDDT-PLI ####
     docker run --rm \
@@ -117,10 +173,10 @@ for pred_folder in "$PRED_DIR"/output_*; do
       -v "$(pwd)":/data -w /data \
       "$DOCKER_IMAGE" \
         compare-ligand-structures \
-          -m pred1_prot.pdb \
-          -ml pred1_lig.sdf \
-          -r ref1_prot.pdb \
-          -rl ref1_lig.sdf \
+          -m "$PAIR_DIR/pred1_prot.pdb" \
+          -ml "$PAIR_DIR/pred1_lig.sdf" \
+          -r "$PAIR_DIR/ref1_prot.pdb" \
+          -rl "$PAIR_DIR/ref1_lig.sdf" \
           --lddt-pli \
           --full-results \
           -o out.json
@@ -129,10 +185,12 @@ for pred_folder in "$PRED_DIR"/output_*; do
 
     # Write to master CSV
     echo "$ID,$MODEL_IDX,$POSE_RMSD,$POCKET_RMSD,$BINDING_SITE_RMSD,$QS_SCORE,$LDDT_PLI" >> "$MASTER_OUTPUT"
+    ROW_CACHE["$pred_folder/${model_cif##*/}"]="$POSE_RMSD,$POCKET_RMSD,$BINDING_SITE_RMSD,$QS_SCORE,$LDDT_PLI"
 
     # Clean up
-    rm -f ref.cif pred.cif ref1_* pred1_* out.json qs_out.json
+    rm -rf "$PAIR_DIR" out.json qs_out.json
   done
 done
 
+echo "QS-score skipped for $QS_SKIPPED monomer vs monomer pairs"
 echo "✅ All done. Results written to $MASTER_OUTPUT"
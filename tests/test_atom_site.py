@@ -0,0 +1,85 @@
+import gzip
+
+import numpy as np
+
+from utils.atom_site import read_atom_site
+
+CIF = """data_test
+loop_
+_atom_site.group_PDB
+_atom_site.id
+_atom_site.type_symbol
+_atom_site.label_atom_id
+_atom_site.label_alt_id
+_atom_site.label_comp_id
+_atom_site.label_asym_id
+_atom_site.label_seq_id
+_atom_site.pdbx_PDB_ins_code
+_atom_site.Cartn_x
+_atom_site.Cartn_y
+_atom_site.Cartn_z
+_atom_site.auth_seq_id
+_atom_site.auth_comp_id
+_atom_site.auth_asym_id
+_atom_site.auth_atom_id
+_atom_site.pdbx_PDB_model_num
+ATOM   1 N N  . ALA A 1 ? 1.000 2.000 3.000 10 ALA X N  1
+ATOM   2 C CA . ALA A 1 ? 2.000 2.000 3.000 10 ALA X CA 1
+ATOM   3 H H  . ALA A 1 ? 0.500 2.000 3.000 10 ALA X H  1
+HETATM 4 C C1 . LIG B . ? 5.000 5.000 5.000 201 LIG Y C1 1
+ATOM   5 N N  . ALA A 1 ? 9.000 9.000 9.000 10 ALA X N  2
+#
+"""
+
+PDB = (
+    "ATOM      1  N   GLY A   5A      1.000   1.000   1.000  1.00  0.00           N\n"
+    "ATOM      2  CA  GLY A   5A      2.000   1.000   1.000  1.00  0.00           C\n"
+    "HETATM    3  O   HOH A 301       3.000   3.000   3.000  1.00  0.00           O\n"
+    "END\n"
+)
+
+
+def test_read_cif_first_model_heavy_atoms(tmp_path):
+    path = tmp_path / "model.cif"
+    path.write_text(CIF)
+    t = read_atom_site(path)
+    assert t["name"].tolist() == [b"N", b"CA", b"C1"]
+    assert t["chain"].tolist() == [b"X", b"X", b"Y"]
+    assert t["resnum"].tolist() == [10, 10, 201]
+    assert t["hetatm"].tolist() == [False, False, True]
+    np.testing.assert_allclose(t["xyz"][1], [2.0, 2.0, 3.0])
+
+    label = read_atom_site(path, chain_source="label")
+    assert label["chain"].tolist() == [b"A", b"A", b"B"]
+
+
+def test_read_gzipped_pdb(tmp_path):
+    path = tmp_path / "ref.pdb.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(PDB)
+    t = read_atom_site(path)
+    assert t["resname"].tolist() == [b"GLY", b"GLY", b"HOH"]
+    assert t["ins"].tolist() == [b"A", b"A", b""]
+    assert t["element"].tolist() == [b"N", b"C", b"O"]
+
+
+ALTLOC_PDB = (
+    "ATOM      1  CA  SER A   1       1.000   0.000   0.000  1.00  0.00           C\n"
+    "ATOM      2  OG ASER A   1       2.000   0.000   0.000  0.40  0.00           O\n"
+    "ATOM      3  OG BSER A   1       3.000   0.000   0.000  0.60  0.00           O\n"
+    "ATOM      4  CA BLEU A   2       4.000   0.000   0.000  0.50  0.00           C\n"
+    "ATOM      5  CB BLEU A   2       5.000   0.000   0.000  0.50  0.00           C\n"
+    "ATOM      6  CA CLEU A   2       6.000   0.000   0.000  0.50  0.00           C\n"
+    "ATOM      7  CB CLEU A   2       7.000   0.000   0.000  0.50  0.00           C\n"
+    "ATOM      8  CA AGLY A   3       8.000   0.000   0.000  1.00  0.00           C\n"
+    "END\n"
+)
+
+
+def test_altloc_chosen_per_residue(tmp_path):
+    path = tmp_path / "alt.pdb"
+    path.write_text(ALTLOC_PDB)
+    t = read_atom_site(path)
+    # Residue 1: B has the higher occupancy; residue 2 has only B/C (tie: first seen); residue 3 only A
+    np.testing.assert_allclose(t["xyz"][:, 0], [1.0, 3.0, 4.0, 5.0, 8.0])
+    assert t["resnum"].tolist() == [1, 1, 2, 2, 3]
@@ -0,0 +1,83 @@
+import argparse
+import csv
+import os
+import signal
+
+import pytest
+
+from utils.batch import WORKER_DIED, run_batch, run_batch_cli
+
+
+def work(name: str, mode: str = "ok") -> None:
+    if mode == "error":
+        raise ValueError(f"bad input {name}")
+    if mode == "timeout":
+        raise TimeoutError("over the limit")
+    if mode == "crash":
+        os.kill(os.getpid(), signal.SIGKILL)
+
+
+def tasks() -> list[dict]:
+    return [
+        {"name": "a.cif", "mode": "ok"},
+        {"name": "b.cif", "mode": "error"},
+        {"name": "c.cif", "mode": "timeout"},
+    ]
+
+
+def read_status(path) -> list[dict]:
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_statuses_in_task_order():
+    got = run_batch(work, tasks(), key_col="name")
+    assert [(s.key, s.status) for s in got] == [("a.cif", "ok"), ("b.cif", "error"), ("c.cif", "timeout")]
+    assert got[1].message == "ValueError: bad input b.cif"
+    assert got[2].message == "over the limit"
+
+
+def test_workers_keep_task_order():
+    many = [{"name": f"{i}.cif", "mode": "error" if i % 3 == 0 else "ok"} for i in range(12)]
+    got = run_batch(work, many, key_col="name", workers=2)
+    assert [s.key for s in got] == [t["name"] for t in many]
+    assert [s.status for s in got] == ["error" if i % 3 == 0 else "ok" for i in range(12)]
+
+
+@pytest.mark.parametrize("hooks", [False, True])
+def test_dead_worker_fails_only_tasks_in_flight(hooks):
+    many = [{"name": f"{i}.cif", "mode": "crash" if i == 2 else "ok"} for i in range(20)]
+    finished = []
+    kw = dict(prepare=lambda t: {}, finish=lambda t: finished.append(t["name"])) if hooks else {}
+    got = run_batch(work, many, key_col="name", workers=2, chunksize=1, **kw)
+    assert [s.key for s in got] == [t["name"] for t in many]
+    assert got[2].status == "error" and got[2].message.startswith(WORKER_DIED)
+    # Only the tasks in flight when the pool broke (at most 2 * workers) are lost; a new pool runs the rest
+    assert sum(s.status == "error" for s in got) <= 4
+    assert all(s.message.startswith(WORKER_DIED) for s in got if s.status == "error")
+    assert sorted(finished) == (sorted(t["name"] for t in many) if hooks else [])
+
+
+def test_prepare_and_finish_hooks():
+    finished = []
+
+    def prepare(task: dict) -> dict:
+        if task["name"] == "b.cif":
+            raise KeyError("no reference")
+        return {"mode": "ok"}
+
+    got = run_batch(work, tasks(), key_col="name", prepare=prepare, finish=lambda t: finished.append(t["name"]))
+    assert [s.status for s in got] == ["ok", "error", "ok"]
+    assert got[1].message.startswith("prepare: KeyError")
+    assert finished == ["a.cif", "b.cif", "c.cif"]
+
+
+def test_cli_writes_status_csv_and_exit_code(tmp_path, capsys):
+    args = argparse.Namespace(workers=1, status_csv=str(tmp_path / "logs" / "status.csv"))
+    assert run_batch_cli(work, tasks(), args, key_col="name") == 2
+    rows = read_status(args.status_csv)
+    assert [(r["key"], r["status"]) for r in rows] == [("a.cif", "ok"), ("b.cif", "error"), ("c.cif", "timeout")]
+    assert "ok=1 failed=2 (timeout=1)" in capsys.readouterr().out
+
+    assert run_batch_cli(work, tasks()[:1], args, key_col="name") == 0
+    assert [r["status"] for r in read_status(args.status_csv)] == ["ok"]
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.best_of_n import MetricSpec, best_of_n, parse_metric_specs
+
+METRICS = [MetricSpec("pose_rmsd", "min", 2.0), MetricSpec("lddt_pli", "max", None)]
+
+
+def scores() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": ["2B", "1A", "1A", "1A", "2B", "3C"],
+            "model_idx": [1, 2, 0, 1, 0, np.nan],
+            "pose_rmsd": [1.5, 0.8, 3.0, np.nan, 2.5, 4.0],
+            "lddt_pli": [0.7, 0.9, 0.5, 0.6, np.nan, "n/a"],
+        }
+    )
+
+
+def test_best_of_n_matches_groupby():
+    got = best_of_n(scores(), METRICS).set_index("id")
+    df = scores().assign(lddt_pli=lambda d: pd.to_numeric(d["lddt_pli"], errors="coerce"))
+    g = df.groupby("id")
+    assert got.index.tolist() == ["1A", "2B", "3C"]
+    assert got["n_models"].tolist() == [3, 2, 1]
+    np.testing.assert_allclose(got["pose_rmsd_oracle"], g["pose_rmsd"].min())
+    np.testing.assert_allclose(got["lddt_pli_oracle"], g["lddt_pli"].max())
+    np.testing.assert_allclose(got["pose_rmsd_mean"], g["pose_rmsd"].mean())
+    np.testing.assert_allclose(got["pose_rmsd_success"], [1 / 3, 1 / 2, 0.0])
+    # Top-1 is model_idx 0; a model without a rank is only used when it is the only one
+    np.testing.assert_allclose(got["pose_rmsd_top1"], [3.0, 2.5, 4.0])
+    assert "lddt_pli_success" not in got.columns
+
+
+def test_top1_by_confidence():
+    df = scores().assign(confidence=[0.2, 0.1, 0.3, 0.9, 0.8, 0.5])
+    got = best_of_n(df, METRICS, rank_col="confidence", rank_direction="max").set_index("id")
+    # The most confident model's own values, even when missing
+    assert np.isnan(got.loc["1A", "pose_rmsd_top1"])
+    assert np.isnan(got.loc["2B", "lddt_pli_top1"])
+    assert got.loc["2B", "pose_rmsd_top1"] == 2.5
+
+
+def test_missing_metrics():
+    assert list(best_of_n(scores().iloc[:0], METRICS).columns) == ["id", "n_models"]
+    with pytest.raises(ValueError):
+        best_of_n(scores(), [MetricSpec("qs_score", "max")])
+
+
+def test_parse_metric_specs():
+    assert parse_metric_specs("pose_rmsd:min:2, qs_score:max,") == [
+        MetricSpec("pose_rmsd", "min", 2.0),
+        MetricSpec("qs_score", "max", None),
+    ]
+    with pytest.raises(ValueError):
+        parse_metric_specs("pose_rmsd:lowest")
@@ -0,0 +1,54 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from utils.bootstrap import bootstrap_ci, paired_compare, statistic
+
+
+def sample(n: int = 40, seed: int = 1) -> np.ndarray:
+    x = np.random.default_rng(seed).gamma(2.0, 1.0, n)
+    x[::7] = np.nan
+    return x
+
+
+def test_results_do_not_depend_on_workers():
+    kw = dict(stats=("rate", "median", "mean"), threshold=2.0, reps=3000, seed=7, chunk_reps=500)
+    assert bootstrap_ci(sample(), workers=1, **kw) == bootstrap_ci(sample(), workers=3, **kw)
+    a, b = sample(seed=1), sample(seed=2)
+    assert paired_compare(a, b, workers=1, **kw) == paired_compare(a, b, workers=3, **kw)
+
+
+def test_interval_brackets_estimate():
+    ci = bootstrap_ci(sample(), ("median",), reps=2000, workers=1)["median"]
+    assert ci.lo <= ci.estimate <= ci.hi
+    assert ci.estimate == pytest.approx(np.nanmedian(sample()))
+
+
+def test_empty_input_gives_nan():
+    ci = bootstrap_ci(np.array([]), threshold=2.0, reps=100, workers=1)
+    assert all(np.isnan([i.estimate, i.lo, i.hi]).all() for i in ci.values())
+    res = paired_compare([], [], threshold=2.0, reps=100, workers=1)["rate"]
+    assert np.isnan(res.diff.estimate) and res.p_value == 1.0
+
+
+def test_paired_lengths_must_match():
+    with pytest.raises(ValueError):
+        paired_compare([1.0, 2.0], [1.0], workers=1)
+
+
+def test_permutation_p_value_matches_exhaustive_swaps():
+    rng = np.random.default_rng(3)
+    a = rng.normal(1.0, 1.0, 10)
+    b = a + rng.normal(0.3, 0.8, 10)
+    obs = np.mean(a) - np.mean(b)
+    diffs = []
+    for swap in itertools.product([False, True], repeat=len(a)):
+        s = np.array(swap)
+        diffs.append(statistic(np.where(s, b, a), "mean") - statistic(np.where(s, a, b), "mean"))
+    exact = np.mean(np.abs(diffs) >= abs(obs) - 1e-12)
+
+    reps = 20_000
+    got = paired_compare(a, b, ("mean",), reps=reps, seed=5, workers=1)["mean"].p_value
+    se = np.sqrt(exact * (1 - exact) / reps)
+    assert abs(got - exact) < 4 * se + 1 / reps
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+
+from utils.atom_site import read_atom_site
+from utils.coord_store import CoordStore, ingest
+
+PDB = (
+    "ATOM      1  N   GLY A   5A      1.000   1.000   1.000  1.00  0.00           N\n"
+    "ATOM      2  CA  GLY A   5A      2.000   1.000   1.000  1.00  0.00           C\n"
+    "HETATM    3  O   HOH A 301       3.000   3.000   3.000  1.00  0.00           O\n"
+    "END\n"
+)
+
+
+def write_pdbs(tmp_path, n: int) -> list:
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"m{i}.pdb"
+        path.write_text(PDB.replace("GLY", ["ALA", "SER", "LEU"][i % 3]))
+        paths.append(path)
+    return paths
+
+
+def assert_tables_equal(a: dict, b: dict) -> None:
+    assert a.keys() == b.keys()
+    for k in a:
+        np.testing.assert_array_equal(a[k], b[k])
+
+
+def test_store_round_trip_and_append(tmp_path):
+    store = tmp_path / "coords"
+    paths = write_pdbs(tmp_path, 3)
+    report = ingest(paths[:2], store, read_atom_site)
+    assert (report.added, report.rewritten) == (2, True)
+
+    report = ingest(paths, store, read_atom_site)
+    assert (report.added, report.unchanged, report.rewritten) == (1, 2, False)
+
+    s = CoordStore(store)
+    assert len(s) == 3 and all(p in s for p in paths)
+    for p in paths:
+        assert s.is_current(p)
+        assert_tables_equal(s.table(p), read_atom_site(p))
+
+
+def test_store_updates_changed_prunes_missing_and_records_failures(tmp_path):
+    store = tmp_path / "coords"
+    paths = write_pdbs(tmp_path, 3)
+    ingest(paths, store, read_atom_site)
+
+    paths[0].write_text(PDB.replace("1.000   1.000   1.000", "7.000   7.000   7.000"))
+    os.utime(paths[0], ns=(1, 1))
+    bad = tmp_path / "bad.cif"
+    bad.write_text("data_bad\n")
+    report = ingest([paths[0], paths[1], bad], store, read_atom_site, prune=True)
+    assert (report.updated, report.unchanged, report.removed, report.rewritten) == (1, 1, 1, True)
+    assert [p for p, _ in report.failed] == [str(bad)]
+
+    s = CoordStore(store)
+    assert paths[2] not in s and bad not in s
+    np.testing.assert_allclose(s.xyz(paths[0])[0], [7.0, 7.0, 7.0])
+    assert_tables_equal(s.table(paths[1]), read_atom_site(paths[1]))
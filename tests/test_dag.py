@@ -0,0 +1,111 @@
+import sys
+import textwrap
+
+from utils.dag import FAILED, FRESH, RAN, UPSTREAM_FAILED, Stage, build_tasks, run_graph
+
+STEP = textwrap.dedent(
+    """
+    import sys, time
+    src, dst = sys.argv[1], sys.argv[2]
+    text = open(src).read()
+    if "fail" in text:
+        sys.exit(1)
+    if len(sys.argv) > 3:  # interval log for the max_parallel test
+        t0 = time.time()
+        time.sleep(0.2)
+        open(sys.argv[3], "w").write(f"{t0} {time.time()}")
+    open(dst, "w").write(text + "+")
+    """
+)
+
+
+def chain_stages(step: str) -> list:
+    return [
+        Stage.from_dict(
+            {
+                "name": "prep",
+                "cmd": f"{sys.executable} {step} {{root}}/{{target}}.in {{root}}/work/{{target}}.a",
+                "inputs": ["{root}/{target}.in"],
+                "outputs": ["{root}/work/{target}.a"],
+            }
+        ),
+        Stage.from_dict(
+            {
+                "name": "score",
+                "cmd": f"{sys.executable} {step} {{root}}/work/{{target}}.a {{root}}/work/{{target}}.b",
+                "inputs": ["{root}/work/{target}.a"],
+                "outputs": ["{root}/work/{target}.b"],
+            }
+        ),
+    ]
+
+
+def setup(tmp_path, targets=("t1", "t2")) -> tuple[dict, dict]:
+    step = tmp_path / "step.py"
+    step.write_text(STEP)
+    for t in targets:
+        (tmp_path / f"{t}.in").write_text(t)
+    tasks = build_tasks(chain_stages(str(step)), list(targets), {"root": str(tmp_path)})
+    return tasks, {}
+
+
+def statuses(results) -> dict:
+    return {r.id: r.status for r in results}
+
+
+def test_edit_reruns_only_that_targets_chain(tmp_path):
+    tasks, state = setup(tmp_path)
+    assert tasks["score/t1"].deps == {"prep/t1"}
+    assert set(statuses(run_graph(tasks, state, jobs=2)).values()) == {RAN}
+    assert set(statuses(run_graph(tasks, state, jobs=2)).values()) == {FRESH}
+
+    (tmp_path / "t1.in").write_text("t1 edited")
+    got = statuses(run_graph(tasks, state, jobs=2))
+    assert got == {"prep/t1": RAN, "score/t1": RAN, "prep/t2": FRESH, "score/t2": FRESH}
+    assert (tmp_path / "work" / "t1.b").read_text() == "t1 edited++"
+
+
+def test_failure_marks_downstream(tmp_path):
+    tasks, state = setup(tmp_path)
+    (tmp_path / "t1.in").write_text("fail")
+    got = statuses(run_graph(tasks, state, jobs=2))
+    assert got == {"prep/t1": FAILED, "score/t1": UPSTREAM_FAILED, "prep/t2": RAN, "score/t2": RAN}
+    assert "prep/t1" not in state["tasks"]
+
+
+def test_max_parallel_caps_one_stage(tmp_path):
+    step = tmp_path / "step.py"
+    step.write_text(STEP)
+    targets = [f"t{i}" for i in range(4)]
+    for t in targets:
+        (tmp_path / f"{t}.in").write_text(t)
+    stage = Stage.from_dict(
+        {
+            "name": "docker",
+            "cmd": f"{sys.executable} {step} {{root}}/{{target}}.in {{root}}/{{target}}.out {{root}}/{{target}}.log",
+            "inputs": ["{root}/{target}.in"],
+            "outputs": ["{root}/{target}.out"],
+            "max_parallel": 2,
+        }
+    )
+    tasks = build_tasks([stage], targets, {"root": str(tmp_path)})
+    assert set(statuses(run_graph(tasks, {}, jobs=4)).values()) == {RAN}
+
+    spans = [tuple(map(float, (tmp_path / f"{t}.log").read_text().split())) for t in targets]
+    events = sorted([(s, 1) for s, _ in spans] + [(e, -1) for _, e in spans])
+    running, peak = 0, 0
+    for _, d in events:
+        running += d
+        peak = max(peak, running)
+    assert peak <= 2
+
+
+def test_dependency_cycle_fails_its_tasks(tmp_path):
+    stages = [
+        Stage.from_dict({"name": "a", "cmd": "true", "deps": ["b"]}),
+        Stage.from_dict({"name": "b", "cmd": "true", "deps": ["a"]}),
+        Stage.from_dict({"name": "c", "cmd": f"{sys.executable} -c pass", "scope": "global"}),
+    ]
+    results = run_graph(build_tasks(stages, ["t1"], {}), {}, jobs=2)
+    assert statuses(results) == {"a/t1": FAILED, "b/t1": FAILED, "c": RAN}
+    assert {r.error for r in results if r.status == FAILED} == {"dependency cycle"}
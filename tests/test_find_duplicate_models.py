@@ -0,0 +1,73 @@
+import csv
+
+import numpy as np
+import pytest
+
+from fullanalysis.stages import load
+
+fdm = load("find-duplicates")
+
+CA = np.array([[0.0, 0.0, 0.0], [3.8, 0.0, 0.0], [5.0, 3.5, 0.0], [8.0, 4.0, 2.0], [10.0, 1.0, 3.0]])
+LIG = np.array([[4.0, 2.0, 5.0], [5.2, 2.4, 5.6], [4.4, 1.0, 6.4]])
+
+
+def pdb(ca: np.ndarray, lig: np.ndarray) -> str:
+    lines = []
+    for i, (x, y, z) in enumerate(ca):
+        lines.append(f"ATOM  {i + 1:5d}  CA  ALA A{i + 1:4d}    {x:8.3f}{y:8.3f}{z:8.3f}  1.00  0.00           C")
+    for i, (x, y, z) in enumerate(lig):
+        lines.append(f"HETATM{len(ca) + i + 1:5d}  C{i + 1}  LIG B 201    {x:8.3f}{y:8.3f}{z:8.3f}  1.00  0.00           C")
+    lines.append(f"HETATM{len(ca) + len(lig) + 1:5d}  O   HOH C 301    {20.0:8.3f}{20.0:8.3f}{20.0:8.3f}  1.00  0.00           O")
+    return "\n".join(lines) + "\nEND\n"
+
+
+def moved(x: np.ndarray) -> np.ndarray:
+    """Rigidly rotated (90 degrees about z) and translated copy."""
+    rot = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+    return x @ rot.T + [1.0, 2.0, 3.0]
+
+
+@pytest.fixture
+def pred_root(tmp_path):
+    target = tmp_path / "preds" / "output_1ABC"
+    target.mkdir(parents=True)
+    (target / "m0.pdb").write_text(pdb(CA, LIG))
+    (target / "m1.pdb").write_text(pdb(CA, LIG))  # exact copy
+    (target / "m2.pdb").write_text(pdb(moved(CA), moved(LIG)))  # same model, other frame
+    (target / "m3.pdb").write_text(pdb(CA, LIG + [3.0, 0.0, 0.0]))  # ligand elsewhere
+    (target / "notes.txt").write_text("not a structure")
+    return tmp_path / "preds"
+
+
+def read_csv(path) -> list[dict]:
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_detect(pred_root, tmp_path):
+    out = tmp_path / "dups.csv"
+    assert fdm.main(["detect", "--pred-root", str(pred_root), "--out-csv", str(out)]) == 0
+    rows = {r["model"]: r for r in read_csv(out)}
+    assert set(rows) == {"m0.pdb", "m1.pdb", "m2.pdb", "m3.pdb"}
+    assert [(rows[m]["representative"], rows[m]["status"]) for m in sorted(rows)] == [
+        ("m0.pdb", "unique"),
+        ("m0.pdb", "exact"),
+        ("m0.pdb", "near"),
+        ("m3.pdb", "unique"),
+    ]
+    assert float(rows["m2.pdb"]["ca_rmsd"]) < 1e-3
+    assert rows["m0.pdb"]["fingerprint"] == rows["m1.pdb"]["fingerprint"] != rows["m2.pdb"]["fingerprint"]
+
+
+def test_expand_copies_representative_rows(pred_root, tmp_path):
+    dups, results, out = tmp_path / "dups.csv", tmp_path / "results.csv", tmp_path / "expanded.csv"
+    fdm.main(["detect", "--pred-root", str(pred_root), "--out-csv", str(dups)])
+    results.write_text("target,model,rmsd\noutput_1ABC,m0.pdb,1.5\noutput_1ABC,m3.pdb,4.0\n")
+    assert fdm.main(["expand", "--dup-csv", str(dups), "--results-csv", str(results), "--out-csv", str(out)]) == 0
+    got = [(r["model"], r["rmsd"], r["duplicate_of"]) for r in read_csv(out)]
+    assert got == [
+        ("m0.pdb", "1.5", ""),
+        ("m3.pdb", "4.0", ""),
+        ("m1.pdb", "1.5", "m0.pdb"),
+        ("m2.pdb", "1.5", "m0.pdb"),
+    ]
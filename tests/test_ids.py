@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.ids import (
+    extract_prefix,
+    extract_prefix_series,
+    normalize_join_key_series,
+    normalize_join_key_upper_no_underscore,
+    normalize_pdb_id,
+    normalize_pdb_id_series,
+    parse_source_and_dataset,
+    parse_source_and_dataset_series,
+)
+
+RAW = ["1ABC_seed1", "2_def", "2_def", "", None, np.nan, "nan", "AF3_allo", "boltz_main", pd.NA]
+
+
+@pytest.mark.parametrize(
+    "series_fn, scalar_fn",
+    [
+        (normalize_pdb_id_series, normalize_pdb_id),
+        (normalize_join_key_series, normalize_join_key_upper_no_underscore),
+        (extract_prefix_series, extract_prefix),
+    ],
+)
+@pytest.mark.parametrize("categorical", [False, True])
+def test_series_matches_scalar(series_fn, scalar_fn, categorical):
+    got = series_fn(pd.Series(RAW, dtype=object), categorical=categorical)
+    expected = [scalar_fn(x) for x in RAW]
+    assert [None if pd.isna(v) else v for v in got] == expected
+
+
+def test_source_dataset_series_matches_scalar():
+    source, dataset = parse_source_and_dataset_series(pd.Series(RAW, dtype=object))
+    expected = [parse_source_and_dataset(x) for x in RAW]
+    assert source.tolist() == [e.source for e in expected]
+    assert dataset.tolist() == [e.dataset for e in expected]
+    assert source[4] == "none" and source[5] == "nan"
@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+from utils.limits import run_limited
+
+pytestmark = pytest.mark.skipif(not hasattr(__import__("os"), "fork"), reason="needs os.fork")
+
+
+def test_result_comes_back_from_the_child():
+    got = run_limited(lambda: {"rmsd": 1.5}, timeout=10)
+    assert (got.status, got.value) == ("ok", {"rmsd": 1.5})
+
+
+def test_timeout_kills_the_child():
+    t0 = time.perf_counter()
+    got = run_limited(lambda: time.sleep(30), timeout=0.2)
+    assert got.status == "timeout"
+    assert time.perf_counter() - t0 < 5
+
+
+def test_memory_limit():
+    got = run_limited(lambda: bytearray(512 * 2**20), mem_mb=64)
+    assert got.status == "memory"
+
+
+def test_errors_are_reported():
+    def fail():
+        raise ValueError("no ligand")
+
+    got = run_limited(fail, timeout=10)
+    assert (got.status, got.message) == ("error", "ValueError: no ligand")
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from utils.master_store import STORE_MARKER, read_table, write_table
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Source": ["af3", "af3", "chai1", None],
+            "dataset": ["allo", "ortho", "allo", "allo"],
+            "PDB_ID": ["1ABC", "2DEF", "1ABC", "3GHI"],
+            "RMSD": [1.5, None, 2.25, 0.5],
+            "note": ["a", "b", None, "d"],
+        }
+    )
+
+
+def plain(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype(object).where(df.notna(), None)
+
+
+def test_store_round_trip(tmp_path):
+    path = tmp_path / "master.parquet"
+    write_table(frame(), path)
+    assert (path / STORE_MARKER).is_file()
+    pd.testing.assert_frame_equal(plain(read_table(path)), plain(frame()))
+
+
+def test_store_partition_pruning(tmp_path):
+    path = tmp_path / "master.parquet"
+    write_table(frame(), path)
+    got = read_table(path, sources=["af3"], datasets=["allo"])
+    assert got["PDB_ID"].tolist() == ["1ABC"]
+
+
+def test_rewrite_replaces_existing_store(tmp_path):
+    path = tmp_path / "master.parquet"
+    write_table(frame(), path)
+    write_table(frame().head(1), path)
+    assert len(read_table(path)) == 1
+
+
+def test_csv_round_trip(tmp_path):
+    path = tmp_path / "master.csv"
+    write_table(frame(), path)
+    pd.testing.assert_frame_equal(read_table(path), frame())
+
+
+@pytest.mark.parametrize("name", ["results.tsv", "results"])
+def test_refuses_paths_that_are_not_stores(tmp_path, name):
+    path = tmp_path / name
+    path.mkdir()
+    (path / "keep.txt").write_text("data")
+    with pytest.raises(ValueError):
+        write_table(frame(), path)
+    assert (path / "keep.txt").read_text() == "data"
+
+
+def test_refuses_to_replace_a_file_or_foreign_directory(tmp_path):
+    single = tmp_path / "scores.parquet"
+    single.write_bytes(b"not a store")
+    with pytest.raises(ValueError):
+        write_table(frame(), single)
+    assert single.read_bytes() == b"not a store"
+
+    folder = tmp_path / "other.parquet"
+    folder.mkdir()
+    (folder / "keep.txt").write_text("data")
+    with pytest.raises(ValueError):
+        write_table(frame(), folder)
+    assert (folder / "keep.txt").exists()
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pytest
+
+import utils.res_map as res_map_mod
+from utils.coords import atom_index, make_table
+from utils.res_map import align, chain_sequences, map_residues, residue_map
+
+ALA, GLY, SER, LEU = "ALA", "GLY", "SER", "LEU"
+
+
+def chain(chain_id: str, start: int, resnames: list[str]) -> dict:
+    n = len(resnames)
+    return dict(
+        xyz=np.arange(3 * n, dtype=float).reshape(n, 3),
+        chain=[chain_id] * n,
+        resnum=range(start, start + n),
+        ins=[""] * n,
+        resname=resnames,
+        name=["CA"] * n,
+        element=["C"] * n,
+        hetatm=[False] * n,
+    )
+
+
+def table(*chains: dict) -> dict:
+    return make_table(**{k: np.concatenate([np.asarray(list(c[k])) for c in chains]) for k in chains[0]})
+
+
+REF = table(chain("A", 1, [ALA, GLY, SER, LEU, ALA]))
+# Renumbered and renamed, with an extra leading residue
+PRED = table(chain("B", 101, [GLY, ALA, GLY, SER, LEU, ALA]))
+
+
+def test_align_free_pred_ends():
+    assert align("AGSLA", "GAGSLA") == [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)]
+
+
+def test_map_residues_follows_alignment():
+    got = map_residues(REF, PRED)
+    assert got.chains == {"A": "B"}
+    assert got.pairs[("A", 1, "")] == ("B", 102, "")
+    assert got.pairs[("A", 5, "")] == ("B", 106, "")
+
+
+def test_cache_is_written_and_reused(tmp_path, monkeypatch):
+    first = residue_map(REF, PRED, tmp_path, "af3", "1ABC")
+    path = tmp_path / "af3" / "1ABC.json"
+    assert len(json.loads(path.read_text())) == 1
+
+    def fail(*_):
+        raise AssertionError("mapping recomputed")
+
+    monkeypatch.setattr(res_map_mod, "map_residues", fail)
+    assert residue_map(REF, PRED, tmp_path, "af3", "1ABC") == first
+    with pytest.raises(AssertionError):
+        residue_map(REF, table(chain("B", 1, [ALA, GLY, SER, LEU, ALA])), tmp_path, "af3", "1ABC")
+
+
+def test_new_sequence_adds_a_key(tmp_path):
+    residue_map(REF, PRED, tmp_path, "af3", "1ABC")
+    other = table(chain("A", 1, [ALA, GLY, SER, LEU, ALA]))
+    assert residue_map(REF, other, tmp_path, "af3", "1ABC").pairs[("A", 3, "")] == ("A", 3, "")
+    assert len(json.loads((tmp_path / "af3" / "1ABC.json").read_text())) == 2
+
+
+def test_calcium_ions_are_not_residues():
+    calcium = dict(chain("A", 301, ["CA"]), element=["CA"], hetatm=[True])
+    mse = dict(chain("A", 6, ["MSE"]), hetatm=[True])
+    protein = chain("A", 1, [ALA, GLY, SER, LEU, ALA])
+    t = table(protein, mse, calcium)
+    keys, seq = chain_sequences(t)["A"]
+    assert keys[-1] == ("A", 6, "") and seq == "AGSLAM"
+    assert ("A", 301, "") not in atom_index(t)
+    assert atom_index(t)[("A", 6, "")] == 5
@@ -0,0 +1,53 @@
+import csv
+
+import pytest
+
+from utils.schedule import (
+    PairFeatures,
+    estimate_costs,
+    fit_cost_model,
+    heuristic_cost,
+    longest_first,
+    read_timings,
+    simulated_makespan,
+)
+
+
+def write_status(path, rows) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["key", "status", "seconds", "message"])
+        w.writerows(rows)
+
+
+def test_read_timings_later_files_win_and_timeouts_count_double(tmp_path):
+    old, new = tmp_path / "old.csv", tmp_path / "new.csv"
+    write_status(old, [["a", "ok", "5", ""], ["b", "ok", "3", ""], ["c", "error", "1", "boom"]])
+    write_status(new, [["a", "ok", "4", ""], ["b", "timeout", "10", ""]])
+    assert read_timings([old, new, tmp_path / "missing.csv"]) == {"a": 4.0, "b": 20.0}
+
+
+def test_estimate_costs_uses_history_then_scaled_heuristic():
+    small, large = PairFeatures(1000, 10, 1), PairFeatures(4000, 10, 1)
+    got = estimate_costs(["seen", "new"], [small, large], {"seen": 2.0})
+    assert got[0] == 2.0
+    assert got[1] == pytest.approx(2.0 * heuristic_cost(large) / heuristic_cost(small))
+
+
+def test_fitted_model_recovers_size_exponent():
+    timed = [(PairFeatures(size, atoms, 1), 1e-3 * size) for size in (1000, 2000, 4000, 8000) for atoms in (10, 30)]
+    model = fit_cost_model(timed)
+    assert model(PairFeatures(16000, 20, 1)) == pytest.approx(16.0, rel=1e-6)
+
+
+def test_longest_first_and_groups():
+    tasks = [{"id": i, "target": t} for i, t in enumerate("aabbc")]
+    costs = [1.0, 5.0, 3.0, 4.0, 6.0]
+    assert [t["id"] for t in longest_first(tasks, costs)] == [4, 1, 3, 2, 0]
+    assert [t["id"] for t in longest_first(tasks, costs, group=lambda t: t["target"])] == [3, 2, 1, 0, 4]
+
+
+def test_longest_first_shortens_makespan():
+    costs = [1.0] * 8 + [8.0]
+    assert simulated_makespan(costs, 2) == 12.0
+    assert simulated_makespan(sorted(costs, reverse=True), 2) == 8.0
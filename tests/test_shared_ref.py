@@ -0,0 +1,47 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from utils.shared_ref import SharedRefs, attach, publish
+
+
+def arrays() -> dict:
+    return {
+        "xyz": np.arange(12, dtype=np.float32).reshape(4, 3),
+        "name": np.array([b"N", b"CA", b"C", b"O"], dtype="S4"),
+        "hetatm": np.array([False, False, False, True]),
+    }
+
+
+def test_publish_attach_round_trip():
+    shm, handle = publish(arrays())
+    try:
+        got = attach(handle)
+        for k, a in arrays().items():
+            np.testing.assert_array_equal(got[k], a)
+            assert got[k].dtype == a.dtype
+        assert not got["xyz"].flags.writeable
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_blocks_are_unlinked_after_last_use():
+    loaded = []
+
+    def loader(key):
+        loaded.append(key)
+        return arrays()
+
+    with SharedRefs(loader, {"a": 2, "b": 1}) as refs:
+        name = refs.acquire("a").shm_name
+        refs.acquire("a")
+        refs.release("a")
+        assert "a" in refs.blocks
+        refs.release("a")
+        assert "a" not in refs.blocks
+        refs.acquire("b")
+    assert loaded == ["a", "b"] and not refs.blocks
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from utils.stream_merge import stream_merge
+
+
+def write_scores(root):
+    (root / "af3" / "1ABC").mkdir(parents=True)
+    (root / "chai1" / "2DEF").mkdir(parents=True)
+    (root / "af3" / "1ABC" / "model_0.csv").write_text(
+        "target_resname,model_resname,n_atoms,LDDT_PLI\nATP,ATP,31,0.875\n"
+    )
+    (root / "chai1" / "2DEF" / "model_0.csv").write_text(
+        "target_resname,model_resname,n_atoms,LDDT_PLI,extra\nHEM,,43,1,x\n"
+    )
+    (root / "chai1" / "2DEF" / "broken.csv").write_text("a,b\n1\n")
+
+
+def test_parquet_keeps_strings_and_ints(tmp_path):
+    write_scores(tmp_path / "scores")
+    out = tmp_path / "merged.parquet"
+    report = stream_merge(tmp_path / "scores", out, workers=2)
+
+    assert report.merged == 2 and report.rows == 2
+    assert [p.endswith("broken.csv") for p, _ in report.malformed] == [True]
+    df = pd.read_parquet(out)
+    assert df["target_resname"].tolist() == ["ATP", "HEM"]
+    assert df["model_resname"].tolist()[0] == "ATP" and pd.isna(df["model_resname"][1])
+    assert df["n_atoms"].dtype == "int64" and df["n_atoms"].tolist() == [31, 43]
+    assert df["LDDT_PLI"].dtype == "float64" and df["LDDT_PLI"].tolist() == [0.875, 1.0]
+    assert df["Source"].tolist() == ["af3", "chai1"]
+    assert not list(tmp_path.glob(".merged.parquet.*"))
+
+
+def test_csv_matches_parquet(tmp_path):
+    write_scores(tmp_path / "scores")
+    stream_merge(tmp_path / "scores", tmp_path / "merged.csv", workers=1, chunk_files=1)
+    stream_merge(tmp_path / "scores", tmp_path / "merged.parquet", workers=1, chunk_files=1)
+    from_csv = pd.read_csv(tmp_path / "merged.csv")
+    from_parquet = pd.read_parquet(tmp_path / "merged.parquet")
+    assert from_csv.columns.tolist() == from_parquet.columns.tolist()
+    assert from_csv["target_resname"].tolist() == from_parquet["target_resname"].tolist()
+    assert from_csv["n_atoms"].tolist() == from_parquet["n_atoms"].tolist()
@@ -0,0 +1,246 @@
+"""Read mmCIF ``_atom_site`` loops and PDB ATOM/HETATM records into atom tables.
+
+A lightweight alternative to OST / Biopython / PyMOL for stages that only need
+coordinates and residue identities. The file is streamed until the atom records end,
+and the collected lines are tokenized in one pass into NumPy columns, giving a
+``utils.coords`` atom table. ``.gz`` files are decompressed on the fly.
+
+Only the first model is read. For alternate locations, each residue keeps the one with
+the highest mean occupancy (the first one seen on ties) along with atoms that have none. Chains and residue numbers are the
+author ones (``auth_asym_id`` / ``auth_seq_id``) by default, as in PDB files.
+"""
+
+from __future__ import annotations
+
+import gzip
+import re
+from itertools import chain
+from pathlib import Path
+from typing import IO, Iterator
+
+import numpy as np
+
+from .coords import ATOM_DTYPES
+
+HYDROGENS = (b"H", b"D")
+MISSING = (b".", b"?")
+# mmCIF tokens: quoted strings (no embedded quote + whitespace) or bare words
+_CIF_TOKEN = re.compile(rb"""'(.*?)'(?=\s|$)|"(.*?)"(?=\s|$)|(\S+)""")
+
+
+def open_structure(path: str | Path) -> IO[bytes]:
+    path = Path(path)
+    return gzip.open(path, "rb") if path.suffix.lower() == ".gz" else path.open("rb")
+
+
+def structure_format(path: str | Path) -> str:
+    """``"cif"`` or ``"pdb"`` from the file name (ignoring a trailing ``.gz``)."""
+    name = Path(path).name.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return "pdb" if name.endswith((".pdb", ".ent")) else "cif"
+
+
+# --------------------------------------------------------------------------- mmCIF
+
+
+def _atom_site_loop(f: IO[bytes]) -> tuple[list[bytes], list[bytes]]:
+    """Field names and data lines of the ``_atom_site`` loop (stops reading after it)."""
+    fields: list[bytes] = []
+    for line in f:
+        s = line.strip()
+        if s.startswith(b"_atom_site."):
+            fields.append(s.split(None, 1)[0][len(b"_atom_site."):])
+        elif fields:
+            break
+        elif s == b"loop_":
+            fields.clear()
+    else:
+        return fields, []
+
+    rows: list[bytes] = []
+    for line in chain([line], f):
+        if line.startswith((b"#", b"_", b"loop_", b"data_")):
+            break
+        rows.append(line)
+    return fields, rows
+
+
+def _tokenize(rows: list[bytes], ncols: int) -> list[bytes]:
+    """Loop values in row-major order (column ``i`` is ``tokens[i::ncols]``)."""
+    blob = b"".join(rows)
+    tokens = blob.split()
+    if b"'" in blob or b'"' in blob:
+        quoted = [t for t in tokens if t[:1] in (b"'", b'"')]
+        if any(len(t) < 2 or t[-1:] != t[:1] for t in quoted):
+            # A quoted value contains whitespace: fall back to the regex tokenizer
+            tokens = [a or b or c for a, b, c in _CIF_TOKEN.findall(blob)]
+        else:
+            tokens = [t[1:-1] if t[:1] in (b"'", b'"') else t for t in tokens]
+    if len(tokens) % ncols:
+        raise ValueError(f"_atom_site loop has {len(tokens)} values for {ncols} columns")
+    return tokens
+
+
+def _column(tokens: list[bytes], fields: list[bytes], *names: str) -> np.ndarray | None:
+    for name in names:
+        key = name.encode()
+        if key in fields:
+            return np.array(tokens[fields.index(key) :: len(fields)], dtype=bytes)
+    return None
+
+
+def _cif_columns(f: IO[bytes], chain_source: str) -> dict[str, np.ndarray]:
+    fields, rows = _atom_site_loop(f)
+    if not fields:
+        raise ValueError("no _atom_site loop")
+    tokens = _tokenize(rows, len(fields))
+    n = len(tokens) // len(fields)
+    first, second = ("auth", "label") if chain_source == "auth" else ("label", "auth")
+
+    def col(*names: str) -> np.ndarray:
+        c = _column(tokens, fields, *names)
+        if c is None:
+            raise ValueError(f"_atom_site has none of {names}")
+        return c
+
+    def optional(name: str, default: bytes) -> np.ndarray:
+        c = _column(tokens, fields, name)
+        return np.full(n, default) if c is None else c
+
+    resnum = col(f"{first}_seq_id", f"{second}_seq_id")
+    resnum = np.where(np.isin(resnum, MISSING), b"0", resnum)
+    return {
+        "group": optional("group_PDB", b"ATOM"),
+        "model": optional("pdbx_PDB_model_num", b"1"),
+        "altloc": optional("label_alt_id", b"."),
+        "chain": col(f"{first}_asym_id", f"{second}_asym_id"),
+        "resnum": resnum,
+        "ins": optional("pdbx_PDB_ins_code", b"?"),
+        "resname": col(f"{first}_comp_id", f"{second}_comp_id"),
+        "name": col(f"{first}_atom_id", f"{second}_atom_id"),
+        "element": optional("type_symbol", b""),
+        "x": col("Cartn_x"),
+        "y": col("Cartn_y"),
+        "z": col("Cartn_z"),
+        "occupancy": optional("occupancy", b"1"),
+    }
+
+
+# --------------------------------------------------------------------------- PDB
+
+# (column, start, stop) of the fixed-width ATOM/HETATM record
+_PDB_FIELDS = (
+    ("group", 0, 6),
+    ("name", 12, 16),
+    ("altloc", 16, 17),
+    ("resname", 17, 20),
+    ("chain", 21, 22),
+    ("resnum", 22, 26),
+    ("ins", 26, 27),
+    ("x", 30, 38),
+    ("y", 38, 46),
+    ("z", 46, 54),
+    ("occupancy", 54, 60),
+    ("element", 76, 78),
+)
+
+
+def _pdb_records(f: IO[bytes]) -> Iterator[bytes]:
+    for line in f:
+        if line.startswith((b"ATOM  ", b"HETATM")):
+            yield line.rstrip(b"\r\n").ljust(80)[:80]
+        elif line.startswith((b"ENDMDL", b"END")):
+            return
+
+
+def _pdb_columns(f: IO[bytes]) -> dict[str, np.ndarray]:
+    records = list(_pdb_records(f))
+    buf = np.frombuffer(b"".join(records), dtype="S1").reshape(len(records), 80)
+    cols = {
+        key: np.char.strip(np.ascontiguousarray(buf[:, a:b]).view(f"S{b - a}").ravel())
+        for key, a, b in _PDB_FIELDS
+    }
+    # Old files leave the element columns blank: take it from the atom name
+    blank = cols["element"] == b""
+    if blank.any():
+        cols["element"][blank] = np.char.strip(
+            np.array([n.lstrip(b"0123456789")[:1] for n in cols["name"][blank]], dtype="S2")
+        )
+    cols["model"] = np.full(len(records), b"1")
+    return cols
+
+
+# --------------------------------------------------------------------------- tables
+
+
+def _occupancy(raw: np.ndarray) -> np.ndarray:
+    out = np.ones(len(raw))
+    given = ~np.isin(raw, (b"", *MISSING))
+    out[given] = raw[given].astype(np.float64)
+    return out
+
+
+def _kept_altlocs(raw: dict[str, np.ndarray], rows: np.ndarray) -> np.ndarray:
+    """Of ``rows`` (atoms with an altloc), those in the altloc kept for their residue.
+
+    Per (chain, resnum, ins) the altloc with the highest mean occupancy wins; ties go
+    to the one seen first. Choosing per residue keeps side chains in one conformer.
+    """
+    sep = np.full(len(rows), b"|")
+    res = raw["chain"][rows]
+    for part in (raw["resnum"][rows], raw["ins"][rows]):
+        res = np.char.add(np.char.add(res, sep), part)
+    _, res_code = np.unique(res, return_inverse=True)
+    pair_key = np.char.add(np.char.add(res, sep), raw["altloc"][rows])
+    _, first, pair_code = np.unique(pair_key, return_index=True, return_inverse=True)
+    occ = _occupancy(raw["occupancy"][rows])
+    mean_occ = np.bincount(pair_code, weights=occ) / np.bincount(pair_code)
+    pair_res = res_code[first]
+    # Best pair per residue: sort by residue, then occupancy (high first), then first row
+    order = np.lexsort((first, -mean_occ, pair_res))
+    best = np.zeros(len(first), dtype=bool)
+    best[order[np.r_[True, pair_res[order][1:] != pair_res[order][:-1]]]] = True
+    return rows[best[pair_code]]
+
+
+def read_atom_site(
+    path: str | Path,
+    *,
+    heavy_only: bool = True,
+    chain_source: str = "auth",
+) -> dict[str, np.ndarray]:
+    """Atom table (``utils.coords`` layout) of an mmCIF / PDB file, optionally gzipped.
+
+    ``chain_source`` selects ``auth`` or ``label`` chain, residue and atom ids for
+    mmCIF input (PDB files only have author ids).
+    """
+    if chain_source not in ("auth", "label"):
+        raise ValueError(f"chain_source must be 'auth' or 'label', not {chain_source!r}")
+    with open_structure(path) as f:
+        raw = _pdb_columns(f) if structure_format(path) == "pdb" else _cif_columns(f, chain_source)
+
+    keep = raw["model"] == raw["model"][0] if len(raw["model"]) else np.ones(0, dtype=bool)
+    has_alt = keep & ~np.isin(raw["altloc"], (b"", *MISSING))
+    if has_alt.any():
+        alt_rows = np.flatnonzero(has_alt)
+        keep[alt_rows] = False
+        keep[_kept_altlocs(raw, alt_rows)] = True
+    element = np.char.upper(raw["element"])
+    if heavy_only:
+        keep &= ~np.isin(element, HYDROGENS)
+
+    ins = raw["ins"][keep]
+    xyz = np.empty((int(keep.sum()), 3), dtype=ATOM_DTYPES["xyz"])
+    for i, axis in enumerate("xyz"):
+        xyz[:, i] = raw[axis][keep].astype(np.float64)
+    return {
+        "xyz": xyz,
+        "chain": raw["chain"][keep].astype(ATOM_DTYPES["chain"]),
+        "resnum": raw["resnum"][keep].astype(np.int64).astype(ATOM_DTYPES["resnum"]),
+        "ins": np.where(np.isin(ins, MISSING), b"", ins).astype(ATOM_DTYPES["ins"]),
+        "resname": raw["resname"][keep].astype(ATOM_DTYPES["resname"]),
+        "name": raw["name"][keep].astype(ATOM_DTYPES["name"]),
+        "element": element[keep].astype(ATOM_DTYPES["element"]),
+        "hetatm": raw["group"][keep] == b"HETATM",
+    }
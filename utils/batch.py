@@ -0,0 +1,304 @@
+"""Batch execution helpers for the per-file pipeline scripts.
+
+A batch is a list of task dicts whose keys are the keyword arguments of a script's per-file
+function. Tasks run in a process pool whose workers are forked from a ``forkserver`` that
+has already imported the ``preload`` modules (OST, the compound library), so each worker
+starts in milliseconds and shares those pages copy-on-write instead of paying the heavy
+imports itself. Failures are recorded per task in a status CSV instead of aborting the batch;
+a task that raises ``TimeoutError`` (e.g. a metric over its time limit) is recorded as
+``timeout``. A worker process that dies (a crash in native code, the OOM killer) takes
+only the tasks in flight on its pool with it: they are recorded as errors and a new pool
+runs the rest. Status CSVs double as timing logs for ``utils.schedule``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import multiprocessing as mp
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+STATUS_FIELDS = ["key", "status", "seconds", "message"]
+WORKER_DIED = "worker died"  # message of tasks lost with a crashed worker process
+
+
+@dataclass(frozen=True)
+class TaskStatus:
+    key: str
+    status: str
+    seconds: float
+    message: str = ""
+
+
+def add_batch_args(p: argparse.ArgumentParser, default_pattern: str = "*.cif") -> None:
+    """Add the shared --manifest / --in-dir batch options to a script's parser."""
+    g = p.add_argument_group("batch mode")
+    g.add_argument("--manifest", default="", help="CSV with one row per file; columns named like the single-file options")
+    g.add_argument("--in-dir", default="", help="Process every file matching --pattern in this directory")
+    g.add_argument("--pattern", default=default_pattern)
+    g.add_argument("--workers", type=int, default=1)
+    g.add_argument("--status-csv", default="batch_status.csv")
+
+
+def is_batch(args: argparse.Namespace) -> bool:
+    return bool(args.manifest or args.in_dir)
+
+
+def read_manifest(path: str | Path, required: Iterable[str]) -> List[dict[str, str]]:
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in required if c not in (reader.fieldnames or [])]
+        if missing:
+            raise SystemExit(f"Manifest {path} is missing columns: {missing}")
+        return [dict(r) for r in reader]
+
+
+def build_tasks(
+    args: argparse.Namespace,
+    required: List[str],
+    from_path: Callable[[Path], dict[str, Any]],
+    extra: Optional[dict[str, Any]] = None,
+    optional: Sequence[str] = (),
+) -> List[dict[str, Any]]:
+    """Tasks from --manifest rows or from the files matching --pattern under --in-dir.
+
+    ``optional`` manifest columns are passed through when present and non-empty.
+    """
+    if args.manifest:
+        tasks: List[dict[str, Any]] = [
+            {**{k: r[k] for k in required}, **{k: r[k] for k in optional if r.get(k)}}
+            for r in read_manifest(args.manifest, required)
+        ]
+    else:
+        tasks = [from_path(f) for f in sorted(Path(args.in_dir).glob(args.pattern)) if f.is_file()]
+    return [{**t, **(extra or {})} for t in tasks]
+
+
+def _run_one(fn: Callable[..., Any], key_col: str, task: dict[str, Any]) -> TaskStatus:
+    t0 = time.perf_counter()
+    try:
+        fn(**task)
+    except TimeoutError as e:
+        return TaskStatus(str(task.get(key_col, "")), "timeout", time.perf_counter() - t0, str(e).replace("\n", " "))
+    except Exception as e:
+        msg = f"{type(e).__name__}: {e}".replace("\n", " ")
+        traceback.print_exc()
+        return TaskStatus(str(task.get(key_col, "")), "error", time.perf_counter() - t0, msg)
+    return TaskStatus(str(task.get(key_col, "")), "ok", time.perf_counter() - t0)
+
+
+def worker_context(preload: Sequence[str] = ()) -> Optional[Any]:
+    """``forkserver`` context whose server imports ``__main__`` and ``preload`` once.
+
+    Every worker is then forked from the warm server. Modules that fail to import
+    are skipped by the server, so listing OST modules is harmless without OST.
+    Returns None (platform default) where forkserver is unavailable.
+    """
+    if "forkserver" not in mp.get_all_start_methods():
+        return None
+    ctx = mp.get_context("forkserver")
+    ctx.set_forkserver_preload(["__main__", *preload])
+    return ctx
+
+
+def _run_chunk(run: Callable[[dict[str, Any]], TaskStatus], tasks: List[dict[str, Any]]) -> List[TaskStatus]:
+    return [run(t) for t in tasks]
+
+
+def _pooled(
+    call: Callable[[Any], Any],
+    items: Iterable[tuple[int, Any]],
+    *,
+    workers: int,
+    initializer: Optional[Callable[[], None]],
+    preload: Sequence[str],
+    on_result: Callable[[int, Any], None],
+    on_died: Callable[[int, BaseException], None],
+) -> None:
+    """``call(item)`` for ``(index, item)`` pairs in a pool with at most ``2 * workers`` in flight.
+
+    Items are pulled from ``items`` only when they are submitted. If a worker dies
+    (a segfault in native code, the OOM killer) the pool is broken: every item in
+    flight on it goes to ``on_died`` and a new pool takes the remaining items.
+    """
+    items = iter(items)
+    back: List[tuple[int, Any]] = []  # pulled, but refused by a pool that had just broken
+
+    def pull() -> Optional[tuple[int, Any]]:
+        return back.pop() if back else next(items, None)
+
+    while True:
+        nxt = pull()
+        if nxt is None:
+            return
+        back.append(nxt)
+        broken = False
+        with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context(preload), initializer=initializer) as ex:
+            running: dict = {}
+
+            def submit_next() -> None:
+                nonlocal broken
+                nxt = pull()
+                if nxt is None:
+                    return
+                try:
+                    running[ex.submit(call, nxt[1])] = nxt[0]
+                except BrokenProcessPool:
+                    broken = True
+                    back.append(nxt)
+
+            for _ in range(2 * workers):
+                submit_next()
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i = running.pop(fut)
+                    try:
+                        result = fut.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        on_died(i, e)
+                        continue
+                    on_result(i, result)
+                    if not broken:
+                        submit_next()
+
+
+def run_batch(
+    fn: Callable[..., Any],
+    tasks: List[dict[str, Any]],
+    *,
+    key_col: str,
+    workers: int = 1,
+    initializer: Optional[Callable[[], None]] = None,
+    preload: Sequence[str] = (),
+    prepare: Optional[Callable[[dict[str, Any]], dict[str, Any]]] = None,
+    finish: Optional[Callable[[dict[str, Any]], None]] = None,
+    chunksize: Optional[int] = None,
+) -> List[TaskStatus]:
+    """Run ``fn(**task)`` for every task; exceptions become ``status="error"`` rows.
+
+    Tasks are started in list order. Pass ``chunksize=1`` when that order matters
+    (e.g. longest first); by default tasks go to workers in chunks.
+    ``prepare(task)`` runs in the parent just before a task is submitted and returns
+    extra keyword arguments (e.g. a shared-memory handle); ``finish(task)`` runs once it
+    is done. At most ``2 * workers`` tasks (or chunks) are in flight, so per-target
+    resources only live while their tasks run. If a worker process dies, the tasks in
+    flight on its pool are recorded as errors and the batch goes on in a new pool.
+    """
+    run = partial(_run_one, fn, key_col)
+    statuses: List[Optional[TaskStatus]] = [None] * len(tasks)
+
+    def died(task: dict[str, Any], e: BaseException) -> TaskStatus:
+        return TaskStatus(str(task.get(key_col, "")), "error", 0.0, f"{WORKER_DIED} ({type(e).__name__})")
+
+    if prepare is None and finish is None:
+        if workers <= 1 or len(tasks) <= 1:
+            if initializer is not None:
+                initializer()
+            return [run(t) for t in tasks]
+        chunksize = chunksize or max(1, len(tasks) // (workers * 4))
+        starts = range(0, len(tasks), chunksize)
+
+        def chunk_done(i: int, result: List[TaskStatus]) -> None:
+            statuses[i : i + len(result)] = result
+
+        def chunk_died(i: int, e: BaseException) -> None:
+            statuses[i : i + chunksize] = [died(t, e) for t in tasks[i : i + chunksize]]
+
+        _pooled(
+            partial(_run_chunk, run),
+            ((i, tasks[i : i + chunksize]) for i in starts),
+            workers=workers,
+            initializer=initializer,
+            preload=preload,
+            on_result=chunk_done,
+            on_died=chunk_died,
+        )
+        return statuses  # type: ignore[return-value]
+
+    def start(task: dict[str, Any]) -> dict[str, Any] | TaskStatus:
+        try:
+            return {**task, **(prepare(task) if prepare else {})}
+        except Exception as e:
+            return TaskStatus(str(task.get(key_col, "")), "error", 0.0, f"prepare: {type(e).__name__}: {e}")
+
+    def done(i: int, status: TaskStatus) -> None:
+        statuses[i] = status
+        if finish:
+            finish(tasks[i])
+
+    if workers <= 1:
+        if initializer is not None:
+            initializer()
+        for i, task in enumerate(tasks):
+            kw = start(task)
+            done(i, kw if isinstance(kw, TaskStatus) else run(kw))
+        return statuses  # type: ignore[return-value]
+
+    def submitted() -> Iterator[tuple[int, dict[str, Any]]]:
+        for i, task in enumerate(tasks):
+            kw = start(task)
+            if isinstance(kw, TaskStatus):
+                done(i, kw)
+            else:
+                yield i, kw
+
+    _pooled(
+        run,
+        submitted(),
+        workers=workers,
+        initializer=initializer,
+        preload=preload,
+        on_result=done,
+        on_died=lambda i, e: done(i, died(tasks[i], e)),
+    )
+    return statuses  # type: ignore[return-value]
+
+
+def write_status_csv(statuses: Iterable[TaskStatus], path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=STATUS_FIELDS)
+        w.writeheader()
+        w.writerows(asdict(s) for s in statuses)
+
+
+def run_batch_cli(
+    fn: Callable[..., Any],
+    tasks: List[dict[str, Any]],
+    args: argparse.Namespace,
+    *,
+    key_col: str,
+    initializer: Optional[Callable[[], None]] = None,
+    preload: Sequence[str] = (),
+    prepare: Optional[Callable[[dict[str, Any]], dict[str, Any]]] = None,
+    finish: Optional[Callable[[dict[str, Any]], None]] = None,
+    chunksize: Optional[int] = None,
+) -> int:
+    """Run a batch from parsed CLI args, write the status CSV and return the exit code."""
+    statuses = run_batch(
+        fn,
+        tasks,
+        key_col=key_col,
+        workers=args.workers,
+        initializer=initializer,
+        preload=preload,
+        prepare=prepare,
+        finish=finish,
+        chunksize=chunksize,
+    )
+    write_status_csv(statuses, args.status_csv)
+    bad = sum(s.status != "ok" for s in statuses)
+    timeouts = sum(s.status == "timeout" for s in statuses)
+    extra = f" (timeout={timeouts})" if timeouts else ""
+    print(f"Done. ok={len(statuses) - bad} failed={bad}{extra} status -> {args.status_csv}")
+    return 0 if bad == 0 else 2
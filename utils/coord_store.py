@@ -0,0 +1,247 @@
+"""Memory-mapped columnar store of atom tables for many structure files.
+
+Each structure is parsed once at ingestion and its ``utils.coords`` atom table is
+appended to flat column files; readers memory-map the columns and slice one file's
+rows without touching the text again. A store directory holds::
+
+    meta.json    columns, vocabularies, and one entry per file: [key, size, mtime_ns]
+    offsets.bin  int64 (n_files + 1) first row of each file; rows of a file are contiguous
+    xyz.bin      float32 (n_atoms, 3)
+    resnum.bin   int32      ins.bin  S1      hetatm.bin  bool
+    chain.bin, resname.bin, name.bin, element.bin
+                 uint16 codes into the per-column vocabularies in meta.json
+
+Keys are resolved absolute paths, so any script can look a file up by its path and
+the recorded size/mtime tell whether the stored copy is still current. Adding files
+appends to the column files (``meta.json`` is replaced last, so an interrupted run
+leaves the previous store readable); changed or pruned files trigger a full rewrite.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+
+import numpy as np
+
+from .coords import ATOM_DTYPES
+
+FORMAT_VERSION = 1
+CODED = ("chain", "resname", "name", "element")
+CODE_DTYPE = np.dtype("<u2")
+COLUMNS = ("xyz", "resnum", "ins", "hetatm", *CODED)
+
+
+def _col_dtype(col: str) -> np.dtype:
+    return CODE_DTYPE if col in CODED else np.dtype(ATOM_DTYPES[col])
+
+
+def file_key(path: str | Path) -> str:
+    return Path(path).resolve().as_posix()
+
+
+def file_stamp(path: str | Path) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class CoordStore:
+    """Read-only view of a store directory."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        meta = json.loads((self.path / "meta.json").read_text())
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported coordinate store version {meta.get('version')}")
+        self.entries: list[list] = meta["files"]
+        self.index = {e[0]: i for i, e in enumerate(self.entries)}
+        self.vocab = {c: np.asarray(meta["vocab"][c], dtype=ATOM_DTYPES[c]) for c in CODED}
+        self.offsets = np.fromfile(self.path / "offsets.bin", dtype="<i8", count=len(self.entries) + 1)
+        n = int(self.offsets[-1])
+        self.columns: dict[str, np.ndarray] = {}
+        for col in COLUMNS:
+            shape = (n, 3) if col == "xyz" else (n,)
+            dtype = _col_dtype(col)
+            # Files may be longer than the recorded rows after an interrupted append
+            self.columns[col] = (
+                np.memmap(self.path / f"{col}.bin", dtype=dtype, mode="r", shape=shape) if n else np.empty(shape, dtype)
+            )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, path: str | Path) -> bool:
+        return file_key(path) in self.index
+
+    def keys(self) -> list[str]:
+        return [e[0] for e in self.entries]
+
+    def is_current(self, path: str | Path) -> bool:
+        """True if ``path`` is stored and unchanged on disk since ingestion."""
+        i = self.index.get(file_key(path))
+        return i is not None and os.path.exists(path) and list(file_stamp(path)) == self.entries[i][1:3]
+
+    def rows(self, path: str | Path) -> slice:
+        i = self.index[file_key(path)]
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def xyz(self, path: str | Path) -> np.ndarray:
+        """(n, 3) float32 view into the mapped coordinates."""
+        return self.columns["xyz"][self.rows(path)]
+
+    def table(self, path: str | Path) -> dict[str, np.ndarray]:
+        """Atom table of one file; coordinates are a view, coded columns are decoded."""
+        sl = self.rows(path)
+        out = {col: self.columns[col][sl] for col in ("xyz", "resnum", "ins", "hetatm")}
+        for col in CODED:
+            out[col] = self.vocab[col][self.columns[col][sl]]
+        return out
+
+
+@dataclass
+class IngestReport:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    failed: list[tuple[str, str]] = field(default_factory=list)
+    rewritten: bool = False
+
+
+def _parse(parse: Callable[[str], dict], path: str) -> tuple[str, Optional[dict], str]:
+    try:
+        return path, parse(path), ""
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+class _Writer:
+    """Appends tables to the column files and tracks vocabularies / offsets."""
+
+    def __init__(self, path: Path, entries: list[list], offsets: list[int], vocab: dict[str, list[str]]) -> None:
+        self.path = path
+        self.entries = entries
+        self.offsets = offsets
+        self.vocab = vocab
+        self.codes = {c: {v: i for i, v in enumerate(vocab[c])} for c in CODED}
+        path.mkdir(parents=True, exist_ok=True)
+        self.handles = {col: open(path / f"{col}.bin", "ab") for col in COLUMNS}
+
+    def truncate_to(self, n_rows: int) -> None:
+        """Drop rows past ``n_rows`` left behind by an interrupted append."""
+        for col, f in self.handles.items():
+            f.truncate(n_rows * _col_dtype(col).itemsize * (3 if col == "xyz" else 1))
+
+    def _encode(self, col: str, values: np.ndarray) -> np.ndarray:
+        uniq, inv = np.unique(values, return_inverse=True)
+        lookup = self.codes[col]
+        mapped = np.empty(len(uniq), dtype=CODE_DTYPE)
+        for i, u in enumerate(uniq):
+            s = u.decode() if isinstance(u, bytes) else str(u)
+            code = lookup.get(s)
+            if code is None:
+                code = lookup[s] = len(self.vocab[col])
+                if code > np.iinfo(CODE_DTYPE).max:
+                    raise ValueError(f"too many distinct {col} values for the store")
+                self.vocab[col].append(s)
+            mapped[i] = code
+        return mapped[inv.reshape(-1)]
+
+    def add(self, key: str, stamp: Sequence[int], table: dict[str, np.ndarray]) -> None:
+        n = len(table["xyz"])
+        for col in COLUMNS:
+            if col in CODED:
+                data = self._encode(col, np.asarray(table[col], dtype=ATOM_DTYPES[col]))
+            else:
+                data = np.ascontiguousarray(table[col], dtype=_col_dtype(col))
+            self.handles[col].write(data.tobytes())
+        self.entries.append([key, *stamp])
+        self.offsets.append(self.offsets[-1] + n)
+
+    def commit(self) -> None:
+        for f in self.handles.values():
+            f.close()
+        tmp = self.path / "offsets.bin.tmp"
+        np.asarray(self.offsets, dtype="<i8").tofile(tmp)
+        tmp.replace(self.path / "offsets.bin")
+        meta = {"version": FORMAT_VERSION, "vocab": self.vocab, "files": self.entries}
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        tmp.replace(self.path / "meta.json")
+
+
+def ingest(
+    paths: Iterable[str | Path],
+    store: str | Path,
+    parse: Callable[[str], dict],
+    *,
+    workers: int = 1,
+    prune: bool = False,
+    mp_context=None,
+) -> IngestReport:
+    """Parse new/changed ``paths`` with ``parse(path) -> atom table`` and add them to ``store``.
+
+    Unchanged files (same size and mtime) are skipped. With ``prune``, stored files
+    that are not in ``paths`` are dropped.
+    """
+    store = Path(store)
+    files = {file_key(p): str(p) for p in paths}
+    old = CoordStore(store) if (store / "meta.json").exists() else None
+    report = IngestReport()
+
+    stored = set(old.index) if old is not None else set()
+    todo = [p for p in files.values() if not (old is not None and old.is_current(p))]
+    report.unchanged = len(files) - len(todo)
+    stale_keys = {file_key(p) for p in todo} & stored
+    dropped = {k for k in old.index if k not in files} if (old is not None and prune) else set()
+    report.removed = len(dropped)
+
+    if workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as ex:
+            parsed = ex.map(_parse, [parse] * len(todo), todo, chunksize=max(1, len(todo) // (workers * 4)))
+            results = list(parsed)
+    else:
+        results = [_parse(parse, p) for p in todo]
+
+    if old is not None and not stale_keys and not dropped:
+        # Append-only: existing codes and rows stay valid
+        w = _Writer(store, list(old.entries), [int(x) for x in old.offsets], {c: old.vocab[c].astype(str).tolist() for c in CODED})
+        w.truncate_to(int(old.offsets[-1]))
+        rewritten = False
+    else:
+        tmp_dir = store.with_name(store.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        w = _Writer(tmp_dir, [], [0], {c: [] for c in CODED})
+        if old is not None:
+            for key, *stamp in old.entries:
+                if key not in stale_keys and key not in dropped:
+                    w.add(key, stamp, old.table(key))
+        rewritten = True
+
+    for p, table, err in results:
+        if table is None:
+            report.failed.append((p, err))
+            continue
+        key = file_key(p)
+        w.add(key, file_stamp(p), table)
+        if key in stored:
+            report.updated += 1
+        else:
+            report.added += 1
+    w.commit()
+
+    if rewritten:
+        del old  # release the maps before replacing the directory
+        backup = store.with_name(store.name + ".old")
+        shutil.rmtree(backup, ignore_errors=True)
+        if store.exists():
+            store.rename(backup)
+        w.path.rename(store)
+        shutil.rmtree(backup, ignore_errors=True)
+    report.rewritten = rewritten
+    return report
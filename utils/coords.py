@@ -0,0 +1,129 @@
+"""Per-structure atom tables and NumPy selections on them.
+
+An atom table is a dict of equal-length arrays with one row per heavy atom, in file
+order. The fixed-width columns in ``ATOM_DTYPES`` can live in shared memory or a
+memory map as-is; nothing in here needs OpenStructure.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+ATOM_DTYPES: dict[str, object] = {
+    "xyz": np.float32,  # (n, 3)
+    "chain": "S8",
+    "resnum": np.int32,
+    "ins": "S1",
+    "resname": "S5",
+    "name": "S4",
+    "element": "S2",
+    "hetatm": np.bool_,
+}
+
+ResKey = Tuple[str, int, str]
+
+
+def make_table(**columns: Iterable) -> dict[str, np.ndarray]:
+    """Build an atom table from per-atom sequences (``xyz`` as rows of 3; ``hetatm`` defaults to False)."""
+    n = len(np.asarray(columns["xyz"]).reshape(-1, 3))
+    columns.setdefault("hetatm", np.zeros(n, dtype=bool))
+    table = {k: np.asarray(columns[k], dtype=dt) for k, dt in ATOM_DTYPES.items()}
+    table["xyz"] = table["xyz"].reshape(-1, 3)
+    bad = [k for k, v in table.items() if len(v) != n]
+    if bad:
+        raise ValueError(f"atom table columns {bad} do not have {n} rows")
+    return table
+
+
+def atom_rows(table: Mapping[str, np.ndarray], name: str = "CA") -> np.ndarray:
+    """Rows of the atoms called ``name``, without ions of that name (calcium is atom ``CA``, element ``CA``).
+
+    The element is checked rather than the record type, so modified residues written as
+    HETATM (MSE, ...) keep their CA.
+    """
+    key = name.encode()
+    return np.flatnonzero((table["name"] == key) & (np.char.upper(table["element"]) != key))
+
+
+def atom_index(table: Mapping[str, np.ndarray], name: str = "CA") -> dict[ResKey, int]:
+    """(chain, resnum, ins) -> row of the atom called ``name`` in that residue."""
+    rows = atom_rows(table, name)
+    chains = np.char.decode(table["chain"][rows])
+    ins = np.char.decode(table["ins"][rows])
+    return {(c, int(r), i): int(row) for c, r, i, row in zip(chains, table["resnum"][rows], ins, rows)}
+
+
+def res_key(res: Mapping) -> ResKey:
+    """Key of a residue dict from the pocket / binding-site JSONs (OST writes a missing insertion code as NUL)."""
+    return (str(res["chain"]), int(res["resnum"]), str(res.get("ins", res.get("ins_code", "")) or "").strip("\0 "))
+
+
+def paired_atoms(
+    mobile: dict[ResKey, int],
+    target: dict[ResKey, int],
+    residues: Iterable[Mapping],
+    mapping: Optional[Mapping[ResKey, ResKey]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows of the residues' atoms present in both indices, in ``residues`` order.
+
+    ``residues`` are target keys; ``mapping`` (target key -> mobile key, e.g. from
+    ``utils.res_map``) translates them for the mobile structure, else keys are shared.
+    """
+    keys = [res_key(r) for r in residues]
+    pairs = [(k, mapping.get(k) if mapping is not None else k) for k in keys]
+    pairs = [(t, m) for t, m in pairs if m in mobile and t in target]
+    return (
+        np.fromiter((mobile[m] for _, m in pairs), dtype=np.int64, count=len(pairs)),
+        np.fromiter((target[t] for t, _ in pairs), dtype=np.int64, count=len(pairs)),
+    )
+
+
+THREE_TO_ONE = {
+    "ALA": "A", "ARG": "R", "ASN": "N", "ASP": "D", "CYS": "C", "GLN": "Q", "GLU": "E", "GLY": "G", "HIS": "H", "ILE": "I",
+    "LEU": "L", "LYS": "K", "MET": "M", "PHE": "F", "PRO": "P", "SER": "S", "THR": "T", "TRP": "W", "TYR": "Y", "VAL": "V",
+    "MSE": "M",
+}
+
+
+def peptide_sequence(table: Mapping[str, np.ndarray], max_bond: float = 1.8) -> str:
+    """One-letter sequence of the peptides in ``table``, chains concatenated in file order.
+
+    Mirrors Biopython's ``PPBuilder``: only standard amino acids (and MSE) count, a
+    peptide breaks where C(i)-N(i+1) is longer than ``max_bond``, and residues that
+    are not bonded to a neighbour are dropped.
+    """
+    keys = list(zip(table["chain"].tolist(), table["resnum"].tolist(), table["ins"].tolist()))
+    residues: dict[tuple, dict] = {}
+    for key, resname, name, xyz in zip(keys, table["resname"].tolist(), table["name"].tolist(), table["xyz"]):
+        res = residues.setdefault(key, {"code": THREE_TO_ONE.get(resname.decode().upper())})
+        if name in (b"N", b"C") and name not in res:
+            res[name] = xyz
+
+    seq: list[str] = []
+    prev_key, prev, in_pep = None, None, False
+    for key, res in residues.items():
+        bonded = (
+            prev is not None
+            and prev_key[0] == key[0]
+            and prev["code"] is not None
+            and res["code"] is not None
+            and b"C" in prev
+            and b"N" in res
+            and float(np.linalg.norm(prev[b"C"] - res[b"N"])) <= max_bond
+        )
+        if bonded:
+            if not in_pep:
+                seq.append(prev["code"])
+            seq.append(res["code"])
+        in_pep = bonded
+        prev_key, prev = key, res
+    return "".join(seq)
+
+
+def polymer_chains(table: Mapping[str, np.ndarray]) -> list[str]:
+    """Chains with ATOM (non-HETATM) records, in file order: the polymer chain inventory."""
+    chains = table["chain"][~table["hetatm"]]
+    _, first = np.unique(chains, return_index=True)
+    return [c.decode() for c in chains[np.sort(first)]]
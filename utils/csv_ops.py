@@ -36,10 +36,10 @@ def best_row_per_group(df: pd.DataFrame, group_col: str, score_col: str, keep: s
         return df
     if keep not in {"min", "max"}:
         raise ValueError("keep must be 'min' or 'max'")
-    df2 = df.copy()
-    df2[score_col] = pd.to_numeric(df2[score_col], errors="coerce")
-    if keep == "min":
-        idx = df2.groupby(group_col)[score_col].idxmin()
-    else:
-        idx = df2.groupby(group_col)[score_col].idxmax()
-    return df2.loc[idx].copy()
+    # Coerce only the score column; the rest of the frame is copied for the kept rows only.
+    scores = pd.to_numeric(df[score_col], errors="coerce")
+    grouped = scores.groupby(df[group_col])
+    idx = grouped.idxmin() if keep == "min" else grouped.idxmax()
+    out = df.loc[idx].copy()
+    out[score_col] = scores.loc[idx].to_numpy()
+    return out
@@ -0,0 +1,308 @@
+"""Make-like task graph for running the pipeline stages per target.
+
+A pipeline config declares stages; each stage expands into tasks (one global task, one
+per target, or one per predicted model of a target) with a command, input files and
+output files. A task is *fresh* when its outputs exist and the hash of its command,
+parameters and input file contents matches the one recorded in the state file from
+its last successful run; otherwise it is *stale* and re-run. Because inputs are hashed
+by content, changing one reference CIF only invalidates that target's tasks, and a
+re-run upstream task that writes identical bytes does not invalidate anything further.
+
+Dependencies are the explicit ``deps`` stages (matched by target/model) plus any task
+whose declared output is one of this task's inputs. Tasks run in a thread pool of
+subprocesses; ``max_parallel`` caps the concurrent tasks of a single stage (e.g. GPU or
+Docker-bound stages) without blocking other stages' tasks.
+
+Placeholders ``{target}``, ``{model}`` and any ``vars`` are substituted with
+``str.format`` in commands, inputs and outputs.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+# Task statuses in the run report
+RAN, FRESH, FAILED, UPSTREAM_FAILED, DRY = "ran", "fresh", "failed", "upstream_failed", "would_run"
+NOT_SELECTED = "not_selected"  # stale, but its stage was excluded with ``only``
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    cmd: str
+    scope: str = "target"  # "global" | "target" | "model"
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    deps: tuple[str, ...] = ()
+    models: str = ""  # glob of a target's model files when scope == "model"
+    params: dict = field(default_factory=dict)
+    max_parallel: int = 0  # 0 = only limited by the global --jobs
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Stage":
+        scope = d.get("scope", "target")
+        if scope not in {"global", "target", "model"}:
+            raise ValueError(f"stage {d.get('name')}: scope must be global, target or model")
+        if scope == "model" and not d.get("models"):
+            raise ValueError(f"stage {d.get('name')}: scope 'model' needs a 'models' glob")
+        return cls(
+            name=d["name"],
+            cmd=d["cmd"],
+            scope=scope,
+            inputs=tuple(d.get("inputs", ())),
+            outputs=tuple(d.get("outputs", ())),
+            deps=tuple(d.get("deps", ())),
+            models=d.get("models", ""),
+            params=dict(d.get("params", {})),
+            max_parallel=int(d.get("max_parallel", 0)),
+        )
+
+
+@dataclass
+class Task:
+    stage: Stage
+    target: str = ""
+    model: str = ""
+    cmd: str = ""
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+    deps: set[str] = field(default_factory=set)
+
+    @property
+    def id(self) -> str:
+        return "/".join(p for p in (self.stage.name, self.target, self.model) if p)
+
+
+def _fmt(text: str, values: dict[str, str]) -> str:
+    return text.format(**values)
+
+
+def expand_targets(spec: dict, variables: dict[str, str]) -> list[str]:
+    """``targets: {glob: ...}`` (target = file stem) or ``targets: {list: [...]}`` / ``{file: ids.txt}``."""
+    if "list" in spec:
+        return [str(t) for t in spec["list"]]
+    if "file" in spec:
+        lines = Path(_fmt(spec["file"], variables)).read_text().splitlines()
+        return [ln.strip() for ln in lines if ln.strip() and not ln.startswith("#")]
+    if "glob" in spec:
+        return sorted(Path(p).stem for p in glob.glob(_fmt(spec["glob"], variables)))
+    raise ValueError("targets needs one of: glob, list, file")
+
+
+def build_tasks(stages: list[Stage], targets: list[str], variables: dict[str, str]) -> dict[str, Task]:
+    tasks: dict[str, Task] = {}
+    by_stage: dict[str, list[Task]] = {}
+    names = {s.name for s in stages}
+    for st in stages:
+        for d in st.deps:
+            if d not in names:
+                raise ValueError(f"stage {st.name}: unknown dep {d!r}")
+        if st.scope == "global":
+            keys = [{}]
+        elif st.scope == "target":
+            keys = [{"target": t} for t in targets]
+        else:
+            keys = [
+                {"target": t, "model": Path(m).stem}
+                for t in targets
+                for m in sorted(glob.glob(_fmt(st.models, {**variables, "target": t})))
+            ]
+        for k in keys:
+            values = {**variables, "target": "", "model": "", **k}
+            task = Task(
+                stage=st,
+                target=k.get("target", ""),
+                model=k.get("model", ""),
+                cmd=_fmt(st.cmd, values),
+                inputs=[_fmt(x, values) for x in st.inputs],
+                outputs=[_fmt(x, values) for x in st.outputs],
+            )
+            tasks[task.id] = task
+            by_stage.setdefault(st.name, []).append(task)
+
+    producer = {os.path.normpath(o): t.id for t in tasks.values() for o in t.outputs}
+    for task in tasks.values():
+        for d in task.stage.deps:
+            for up in by_stage.get(d, []):
+                # Global tasks on either side connect to everything; otherwise match keys.
+                if task.stage.scope == "global" or up.stage.scope == "global":
+                    task.deps.add(up.id)
+                elif up.target == task.target and (not up.model or not task.model or up.model == task.model):
+                    task.deps.add(up.id)
+        for x in task.inputs:
+            up_id = producer.get(os.path.normpath(x))
+            if up_id and up_id != task.id:
+                task.deps.add(up_id)
+    return tasks
+
+
+class HashCache:
+    """Content hashes keyed by (path, size, mtime) so unchanged files are not re-read."""
+
+    def __init__(self, memo: Optional[dict] = None) -> None:
+        self.memo: dict[str, list] = memo if memo is not None else {}
+        self.lock = threading.Lock()
+
+    def file(self, path: str) -> str:
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        with self.lock:
+            hit = self.memo.get(path)
+            if hit and hit[:2] == stamp:
+                return hit[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with self.lock:
+            self.memo[path] = [*stamp, digest]
+        return digest
+
+
+def task_key(task: Task, hashes: HashCache) -> Optional[str]:
+    """Hash of command, params and input contents; None if an input is missing."""
+    h = hashlib.sha256(json.dumps({"cmd": task.cmd, "params": task.stage.params}, sort_keys=True).encode())
+    for pattern in task.inputs:
+        paths = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for p in paths:
+            if not os.path.exists(p):
+                return None
+            h.update(f"{p}\0{hashes.file(p)}\n".encode())
+    return h.hexdigest()
+
+
+@dataclass
+class TaskResult:
+    id: str
+    stage: str
+    status: str
+    seconds: float = 0.0
+    returncode: Optional[int] = None
+    error: str = ""
+
+
+def _run_task(task: Task, log_dir: Optional[Path]) -> tuple[int, str]:
+    for o in task.outputs:
+        Path(o).parent.mkdir(parents=True, exist_ok=True)
+    if log_dir is None:
+        proc = subprocess.run(shlex.split(task.cmd), capture_output=True, text=True)
+        tail = (proc.stderr or proc.stdout or "").strip().splitlines()[-1:] if proc.returncode else []
+        return proc.returncode, tail[0] if tail else ""
+    log = log_dir / f"{task.id.replace('/', '__')}.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+    with log.open("w") as f:
+        proc = subprocess.run(shlex.split(task.cmd), stdout=f, stderr=subprocess.STDOUT, text=True)
+    return proc.returncode, f"see {log}" if proc.returncode else ""
+
+
+def run_graph(
+    tasks: dict[str, Task],
+    state: dict[str, Any],
+    *,
+    jobs: int = 0,
+    dry_run: bool = False,
+    force: bool = False,
+    only: Optional[set[str]] = None,
+    log_dir: Optional[Path] = None,
+) -> list[TaskResult]:
+    """Run stale tasks in dependency order; updates ``state`` in place.
+
+    With ``only``, stale tasks of other stages are not run; their downstream tasks still
+    run if the inputs they need are already on disk.
+    """
+    hashes = HashCache(state.setdefault("files", {}))
+    done_keys: dict[str, str] = state.setdefault("tasks", {})
+    results: dict[str, TaskResult] = {}
+    pending = dict(tasks)
+    ready: list[tuple[Task, str]] = []
+    active: dict[str, int] = {}
+    running: dict[Future, tuple[Task, str, float]] = {}
+    jobs = jobs or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or ready or running:
+            progressed = False
+            for tid, task in list(pending.items()):
+                dep_status = [results[d].status for d in task.deps if d in results]
+                if len(dep_status) < len(task.deps):
+                    continue  # an upstream task is still pending or running
+                del pending[tid]
+                progressed = True
+                if any(s in (FAILED, UPSTREAM_FAILED) for s in dep_status):
+                    results[tid] = TaskResult(tid, task.stage.name, UPSTREAM_FAILED)
+                    continue
+                key = None if DRY in dep_status else task_key(task, hashes)
+                fresh = (
+                    not force
+                    and key is not None
+                    and done_keys.get(tid) == key
+                    and all(os.path.exists(o) for o in task.outputs)
+                )
+                if fresh:
+                    results[tid] = TaskResult(tid, task.stage.name, FRESH)
+                elif only is not None and task.stage.name not in only:
+                    results[tid] = TaskResult(tid, task.stage.name, NOT_SELECTED)
+                elif dry_run:
+                    results[tid] = TaskResult(tid, task.stage.name, DRY)
+                elif key is None:
+                    results[tid] = TaskResult(tid, task.stage.name, FAILED, error="missing input")
+                else:
+                    ready.append((task, key))
+
+            # Start ready tasks while the global pool and the stage's own limit allow it.
+            for item in list(ready):
+                task, key = item
+                limit = task.stage.max_parallel
+                if len(running) >= jobs:
+                    break
+                if limit and active.get(task.stage.name, 0) >= limit:
+                    continue
+                ready.remove(item)
+                active[task.stage.name] = active.get(task.stage.name, 0) + 1
+                running[pool.submit(_run_task, task, log_dir)] = (task, key, time.perf_counter())
+
+            if not running:
+                if pending and not progressed:
+                    for tid, task in pending.items():
+                        results[tid] = TaskResult(tid, task.stage.name, FAILED, error="dependency cycle")
+                    pending.clear()
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                task, key, t0 = running.pop(fut)
+                active[task.stage.name] -= 1
+                secs = time.perf_counter() - t0
+                try:
+                    rc, err = fut.result()
+                except OSError as e:
+                    rc, err = -1, f"{type(e).__name__}: {e}"
+                missing = [o for o in task.outputs if not os.path.exists(o)]
+                if rc == 0 and not missing:
+                    done_keys[task.id] = key
+                    results[task.id] = TaskResult(task.id, task.stage.name, RAN, secs, rc)
+                else:
+                    done_keys.pop(task.id, None)
+                    err = err or f"missing outputs: {', '.join(missing)}"
+                    results[task.id] = TaskResult(task.id, task.stage.name, FAILED, secs, rc, err)
+                print(f"[{results[task.id].status}] {task.id} ({secs:.1f}s)")
+    return [results[tid] for tid in tasks]
+
+
+def summarize(results: list[TaskResult]) -> dict[str, dict[str, int]]:
+    per_stage: dict[str, dict[str, int]] = {}
+    for r in results:
+        counts = per_stage.setdefault(r.stage, {})
+        counts[r.status] = counts.get(r.status, 0) + 1
+    return per_stage
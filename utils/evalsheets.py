@@ -0,0 +1,159 @@
+"""Loader for the per-model ligand evaluation sheets under ``evalspreadsheets/``.
+
+The sheets are laid out as ``evalspreadsheets/{main,allo}/{model}{main|allo}ligand.csv``
+and disagree on headers (``id``/``pdb_id``/``PDB_ID``, ``qs score`` vs ``qs_score``,
+extra ``model_name``/``Index``/``Rank``/``lDDT`` columns). ``load_evalsheets`` maps
+every file onto one canonical schema via ``HEADER_ALIASES``:
+
+- ``Source``/``dataset`` come from the path, ``PDB_ID`` is normalized with
+  ``normalize_pdb_id`` (``raw_id`` keeps the original spelling)
+- metric columns are float64, ``Source``/``dataset``/``PDB_ID`` are categorical
+- files are read concurrently with explicit dtypes
+
+The combined table is cached as a Parquet snapshot next to a small JSON manifest; the
+cache is reused only while the SHA-256 of every sheet is unchanged.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from .ids import normalize_pdb_id_series
+
+# Raw header (compared case-sensitively, after stripping) -> canonical column.
+# Note 'qs score' is the per-interface QS-score and 'qs_score'/'QS_Score' the global one.
+HEADER_ALIASES = {
+    "id": "raw_id",
+    "pdb_id": "raw_id",
+    "PDB_ID": "raw_id",
+    "pose rmsd": "pose_rmsd",
+    "pocket rmsd": "pocket_rmsd",
+    "qs score": "qs_score",
+    "qs_score": "qs_global",
+    "QS_Score": "qs_global",
+    "lddt-pli": "lddt_pli",
+    "lDDT": "lddt",
+    "model_name": "model_name",
+    "Index": "model_index",
+    "Rank": "model_rank",
+}
+
+CANONICAL_DTYPES = {
+    "raw_id": "string",
+    "model_name": "string",
+    "model_index": "float64",
+    "model_rank": "float64",
+    "pose_rmsd": "float64",
+    "pocket_rmsd": "float64",
+    "qs_score": "float64",
+    "qs_global": "float64",
+    "lddt_pli": "float64",
+    "lddt": "float64",
+}
+
+COLUMNS = ["Source", "dataset", "PDB_ID", *CANONICAL_DTYPES]
+CATEGORICAL = ["Source", "dataset", "PDB_ID"]
+
+_SHEET_RE = re.compile(r"^(?P<source>.+?)(?P<dataset>main|allo)ligand$", re.IGNORECASE)
+_CACHE_VERSION = 1
+
+
+def sheet_source_dataset(path: str | Path) -> tuple[str, str]:
+    """``evalspreadsheets/allo/chaialloligand.csv`` -> ``("chai", "allo")``."""
+    path = Path(path)
+    m = _SHEET_RE.match(path.stem)
+    if not m:
+        raise ValueError(f"Unrecognized evaluation sheet name: {path.name}")
+    return m.group("source").lower(), m.group("dataset").lower()
+
+
+def sheet_paths(root: str | Path = "evalspreadsheets") -> list[Path]:
+    return sorted(p for p in Path(root).glob("*/*ligand.csv") if p.is_file())
+
+
+def _canonical_header(raw: list[str], path: Path) -> list[str]:
+    names = []
+    for h in raw:
+        name = HEADER_ALIASES.get(h.strip())
+        if name is None:
+            raise ValueError(f"{path}: unknown column {h!r}; add it to HEADER_ALIASES")
+        names.append(name)
+    return names
+
+
+def parse_sheet(data: bytes, path: str | Path) -> pd.DataFrame:
+    """Parse one sheet's bytes into the canonical schema (without categoricals)."""
+    path = Path(path)
+    header = next(csv.reader(io.StringIO(data.decode("utf-8-sig").partition("\n")[0])))
+    names = _canonical_header(header, path)
+    df = pd.read_csv(
+        io.BytesIO(data),
+        header=0,
+        names=names,
+        dtype={n: CANONICAL_DTYPES[n] for n in names},
+        encoding="utf-8-sig",
+        float_precision="round_trip",
+    )
+    source, dataset = sheet_source_dataset(path)
+    df["Source"] = source
+    df["dataset"] = dataset
+    df["PDB_ID"] = normalize_pdb_id_series(df["raw_id"])
+    return df.reindex(columns=COLUMNS).astype({c: t for c, t in CANONICAL_DTYPES.items()})
+
+
+def _read_bytes(path: Path) -> tuple[Path, bytes, str]:
+    data = path.read_bytes()
+    return path, data, hashlib.sha256(data).hexdigest()
+
+
+def _fingerprint(hashes: dict[str, str]) -> str:
+    h = hashlib.sha256(f"v{_CACHE_VERSION}".encode())
+    for name in sorted(hashes):
+        h.update(f"{name}\0{hashes[name]}\n".encode())
+    return h.hexdigest()
+
+
+def load_evalsheets(
+    root: str | Path = "evalspreadsheets",
+    *,
+    cache_dir: str | Path | bool | None = None,
+    workers: int = 8,
+) -> pd.DataFrame:
+    """Load every sheet under ``root`` into one table (see module docstring).
+
+    ``cache_dir`` defaults to ``<root>/.cache``; pass ``cache_dir=False`` to skip caching.
+    """
+    root = Path(root)
+    paths = sheet_paths(root)
+    if not paths:
+        raise FileNotFoundError(f"No *ligand.csv sheets under {root}")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        blobs = list(pool.map(_read_bytes, paths))
+    key = _fingerprint({p.relative_to(root).as_posix(): digest for p, _, digest in blobs})
+
+    cache = None if cache_dir is False else Path(cache_dir or root / ".cache")
+    if cache is not None:
+        snap, manifest = cache / "evalsheets.parquet", cache / "evalsheets.json"
+        if snap.exists() and manifest.exists() and json.loads(manifest.read_text()).get("key") == key:
+            return pd.read_parquet(snap)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        frames = list(pool.map(lambda b: parse_sheet(b[1], b[0]), blobs))
+    df = pd.concat(frames, ignore_index=True)
+    for col in CATEGORICAL:
+        df[col] = df[col].astype("category")
+
+    if cache is not None:
+        cache.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(snap, index=False)
+        manifest.write_text(json.dumps({"key": key, "files": [p.relative_to(root).as_posix() for p in paths]}, indent=2))
+    return df
@@ -0,0 +1,44 @@
+"""NumPy coordinate helpers shared by the non-OST metrics.
+
+All functions take plain ``(n, 3)`` arrays so they can be fed from any parser.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def centroid(coords: np.ndarray) -> np.ndarray:
+    return np.asarray(coords, dtype=np.float64).reshape(-1, 3).mean(axis=0)
+
+
+def kabsch(mobile: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (R, t) such that ``mobile @ R.T + t`` is optimally superposed onto target."""
+    a = np.asarray(mobile, dtype=np.float64).reshape(-1, 3)
+    b = np.asarray(target, dtype=np.float64).reshape(-1, 3)
+    if a.shape != b.shape or a.shape[0] == 0:
+        raise ValueError(f"Cannot superpose coordinate sets of shape {a.shape} and {b.shape}")
+    ca = a.mean(axis=0)
+    cb = b.mean(axis=0)
+    h = (a - ca).T @ (b - cb)
+    u, _, vt = np.linalg.svd(h)
+    d = np.sign(np.linalg.det(vt.T @ u.T))
+    rot = vt.T @ np.diag([1.0, 1.0, d]) @ u.T
+    return rot, cb - ca @ rot.T
+
+
+def apply_transform(coords: np.ndarray, rot: np.ndarray, trans: np.ndarray) -> np.ndarray:
+    return np.asarray(coords, dtype=np.float64).reshape(-1, 3) @ rot.T + trans
+
+
+def rmsd(a: np.ndarray, b: np.ndarray) -> float:
+    diff = np.asarray(a, dtype=np.float64).reshape(-1, 3) - np.asarray(b, dtype=np.float64).reshape(-1, 3)
+    return float(np.sqrt((diff * diff).sum(axis=1).mean()))
+
+
+def superposed_rmsd(mobile: np.ndarray, target: np.ndarray) -> float:
+    """RMSD after optimal superposition (same quantity as OST ``SuperposeSVD(...).rmsd``)."""
+    rot, trans = kabsch(mobile, target)
+    return rmsd(apply_transform(mobile, rot, trans), target)
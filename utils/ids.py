@@ -3,13 +3,22 @@
 These functions centralize the ad-hoc ID rules that were scattered throughout conc.ipynb.
 They are intentionally conservative: they only apply transformations that appeared in the
 notebook (remove underscores, case-normalize, handle '*seed*' style strings, etc.).
+
+Each scalar normalizer has a ``*_series`` counterpart with the same semantics. These
+factorize the column, normalize each distinct raw ID once (memoized across calls) and
+broadcast the result back through the integer codes. Pass ``categorical=True`` to keep
+the result as a Categorical so later joins/groupbys work on compact codes.
 """
 
 from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 
 
 _SEED_RE = re.compile(r"seed", re.IGNORECASE)
@@ -87,3 +96,74 @@ def parse_source_and_dataset(source_cell: str) -> SourceDataset:
         dataset = ""
 
     return SourceDataset(source=source, dataset=dataset)
+
+
+# --- Series-level versions -------------------------------------------------------------
+
+_CACHE_SIZE = 1 << 16  # distinct raw IDs remembered per normalizer
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _cached_pdb_id(raw) -> Optional[str]:
+    return normalize_pdb_id(raw)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _cached_join_key(raw) -> Optional[str]:
+    return normalize_join_key_upper_no_underscore(raw)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _cached_prefix(raw, n: int) -> Optional[str]:
+    return extract_prefix(raw, n)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _cached_source_dataset(raw) -> SourceDataset:
+    return parse_source_and_dataset(raw)
+
+
+def _map_unique(series: pd.Series, fn: Callable[[object], Optional[str]], categorical: bool) -> pd.Series:
+    """Apply ``fn`` once per distinct value of ``series``, matching ``fn`` applied row by row."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # None, NaN and pd.NA all factorize to -1, but a scalar normalizer may tell them apart
+    # (str(None) is "None"), so each kind of missing value gets its own slot.
+    raw = np.asarray(series, dtype=object)
+    na_slots: dict[type, int] = {}
+    na_values: list = []
+    for row in np.flatnonzero(codes == -1):
+        kind = type(raw[row])
+        if kind not in na_slots:
+            na_slots[kind] = len(uniques) + len(na_values)
+            na_values.append(fn(raw[row]))
+        codes[row] = na_slots[kind]
+    mapped = pd.Series([*(fn(u) for u in uniques), *na_values], dtype=object)
+    # Different raw IDs may normalize to the same key; re-factorize so categories stay unique.
+    key_codes, keys = pd.factorize(mapped, use_na_sentinel=True)
+    out_codes = key_codes[codes]
+    if categorical:
+        return pd.Series(pd.Categorical.from_codes(out_codes, categories=keys), index=series.index, name=series.name)
+    values = np.append(np.asarray(keys, dtype=object), None)[out_codes]
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
+def normalize_pdb_id_series(series: pd.Series, categorical: bool = False) -> pd.Series:
+    """Vectorized :func:`normalize_pdb_id`."""
+    return _map_unique(series, _cached_pdb_id, categorical)
+
+
+def normalize_join_key_series(series: pd.Series, categorical: bool = False) -> pd.Series:
+    """Vectorized :func:`normalize_join_key_upper_no_underscore`."""
+    return _map_unique(series, _cached_join_key, categorical)
+
+
+def extract_prefix_series(series: pd.Series, n: int = 5, categorical: bool = False) -> pd.Series:
+    """Vectorized :func:`extract_prefix`."""
+    return _map_unique(series, lambda raw: _cached_prefix(raw, n), categorical)
+
+
+def parse_source_and_dataset_series(series: pd.Series, categorical: bool = False) -> Tuple[pd.Series, pd.Series]:
+    """Vectorized :func:`parse_source_and_dataset`; returns ``(source, dataset)`` Series."""
+    source = _map_unique(series, lambda raw: _cached_source_dataset(raw).source, categorical)
+    dataset = _map_unique(series, lambda raw: _cached_source_dataset(raw).dataset, categorical)
+    return source.rename("Source"), dataset.rename("dataset")
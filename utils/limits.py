@@ -0,0 +1,111 @@
+"""Run one computation in a forked child under a wall-clock and memory limit.
+
+The child is a plain ``os.fork`` of the caller, so structures the caller has already
+loaded (OST entities, ligand catalogs) are shared copy-on-write and nothing is
+re-parsed. The result comes back pickled through a pipe. If the deadline passes, the
+child is killed and the caller gets a ``timeout`` result instead of hanging. The memory
+limit caps how much address space the child may add on top of what it inherits.
+Where ``fork`` is unavailable the function runs inline without limits.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import select
+import signal
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+@dataclass(frozen=True)
+class Limited:
+    status: str  # ok | timeout | memory | error
+    value: Any = None
+    seconds: float = 0.0
+    message: str = ""
+
+
+def _address_space_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmSize:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _child(fn: Callable[[], Any], mem_mb: float, w: int) -> None:
+    try:
+        if mem_mb and resource is not None:
+            base = _address_space_bytes() or 0
+            limit = base + int(mem_mb * 2**20)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        payload: tuple = ("ok", fn(), "")
+    except MemoryError:
+        payload = ("memory", None, f"exceeded {mem_mb:g} MB")
+    except BaseException as e:  # noqa: BLE001 - everything must reach the parent
+        payload = ("error", None, f"{type(e).__name__}: {e}")
+    try:
+        data = pickle.dumps(payload)
+    except Exception as e:
+        data = pickle.dumps(("error", None, f"unpicklable result: {e}"))
+    with os.fdopen(w, "wb") as f:
+        f.write(data)
+
+
+def run_limited(fn: Callable[[], Any], timeout: float = 0.0, mem_mb: float = 0.0) -> Limited:
+    """``fn()`` in a forked child; ``timeout`` seconds / ``mem_mb`` extra MB (0 = no limit)."""
+    t0 = time.perf_counter()
+    if not (timeout or mem_mb) or not hasattr(os, "fork"):
+        try:
+            return Limited("ok", fn(), time.perf_counter() - t0)
+        except MemoryError:
+            return Limited("memory", None, time.perf_counter() - t0, "MemoryError")
+
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child
+        os.close(r)
+        try:
+            _child(fn, mem_mb, w)
+        finally:
+            os._exit(0)
+
+    os.close(w)
+    deadline = time.monotonic() + timeout if timeout else None
+    chunks: list[bytes] = []
+    try:
+        while True:
+            wait = None if deadline is None else deadline - time.monotonic()
+            if wait is not None and wait <= 0:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                return Limited("timeout", None, time.perf_counter() - t0, f"exceeded {timeout:g} s")
+            ready, _, _ = select.select([r], [], [], wait)
+            if not ready:
+                continue
+            chunk = os.read(r, 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(r)
+
+    _, code = os.waitpid(pid, 0)
+    seconds = time.perf_counter() - t0
+    if not chunks:
+        # Killed before reporting (e.g. by the OOM killer or a crash in native code)
+        sig = os.WTERMSIG(code) if os.WIFSIGNALED(code) else 0
+        status = "memory" if sig == signal.SIGKILL and mem_mb else "error"
+        return Limited(status, None, seconds, f"child exited with status {code}")
+    status, value, message = pickle.loads(b"".join(chunks))
+    return Limited(status, value, seconds, message)
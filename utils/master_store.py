@@ -0,0 +1,147 @@
+"""Parquet-backed master results store used by the aggregation steps.
+
+A store is a directory with one Parquet file per (Source, dataset) partition::
+
+    master.parquet/Source=af3/dataset=allo/part-0.parquet
+
+Each file keeps every column (including Source/dataset) with typed numeric columns and
+categorical key columns, plus a hidden row-order column so a round trip preserves the
+table exactly. Paths ending in ``.csv`` are read and written as plain CSV, so every
+aggregate step accepts either form and CSV is only needed for the final paper table.
+
+A store is written only to a ``.parquet`` path or over an existing store, which is
+recognised by its ``_master_store.json`` marker; anything else is refused rather than
+deleted.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import quote
+
+import pandas as pd
+
+from .csv_ops import write_csv
+
+PARTITION_COLS = ["Source", "dataset"]
+CATEGORICAL_COLS = ["Source", "dataset", "PDB_ID"]
+_ORDER_COL = "__row"
+_NULL_PART = "__null__"
+STORE_MARKER = "_master_store.json"
+
+
+def is_csv_path(path: str | Path) -> bool:
+    return Path(path).suffix.lower() == ".csv"
+
+
+def is_store(path: str | Path) -> bool:
+    """True for a directory written by :func:`write_table` (it holds the marker file)."""
+    return (Path(path) / STORE_MARKER).is_file()
+
+
+def _part_dir(col: str, value) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return f"{col}={_NULL_PART}"
+    return f"{col}={quote(str(value), safe='')}"
+
+
+def to_typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorical key columns; object columns holding only numbers become float."""
+    out = df.copy()
+    for col in out.columns:
+        if col in CATEGORICAL_COLS:
+            out[col] = out[col].astype("category")
+            continue
+        s = out[col]
+        if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            continue
+        num = pd.to_numeric(s, errors="coerce")
+        if num.notna().sum() == s.notna().sum():
+            out[col] = num.astype("float64")
+    return out
+
+
+def _uncategorize(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return df
+
+
+def write_table(df: pd.DataFrame, path: str | Path) -> None:
+    """Write ``df`` as CSV (``*.csv``) or as a partitioned Parquet store (``*.parquet``).
+
+    An existing store at ``path`` is replaced; any other existing file or non-empty
+    directory raises ``ValueError`` and is left untouched.
+    """
+    if is_csv_path(path):
+        write_csv(df, path)
+        return
+
+    root = Path(path)
+    if root.suffix.lower() != ".parquet" and not is_store(root):
+        raise ValueError(f"{root}: expected a .csv file or a .parquet master store")
+    if root.is_file() or (root.is_dir() and any(root.iterdir()) and not is_store(root)):
+        raise ValueError(f"{root} exists and is not a master store; refusing to overwrite it")
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    typed = to_typed(df.reset_index(drop=True))
+    typed[_ORDER_COL] = range(len(typed))
+    keys = [c for c in PARTITION_COLS if c in typed.columns]
+    groups = typed.groupby(keys, dropna=False, observed=True, sort=False) if keys else [((), typed)]
+    for key, part in groups:
+        key = key if isinstance(key, tuple) else (key,)
+        part_dir = root.joinpath(*[_part_dir(c, v) for c, v in zip(keys, key)])
+        part_dir.mkdir(parents=True, exist_ok=True)
+        part.to_parquet(part_dir / "part-0.parquet", index=False)
+    (root / STORE_MARKER).write_text(json.dumps({"partitions": keys, "rows": len(typed)}))
+
+
+def _matches(part_file: Path, col: str, values: Optional[set[str]]) -> bool:
+    if values is None:
+        return True
+    wanted = {_part_dir(col, v) for v in values}
+    return any(p in wanted for p in part_file.parts)
+
+
+def read_table(
+    path: str | Path,
+    *,
+    categorical: bool = False,
+    sources: Optional[Iterable[str]] = None,
+    datasets: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Read a CSV or a Parquet store; ``sources``/``datasets`` prune partitions before reading."""
+    if is_csv_path(path):
+        # round_trip keeps CSV -> frame -> CSV byte-stable across chained steps
+        df = pd.read_csv(path, float_precision="round_trip")
+        return to_typed(df) if categorical else df
+
+    if Path(path).is_file():
+        # A single Parquet file (e.g. from utils.stream_merge) rather than a partitioned store
+        df = pd.read_parquet(path)
+        return to_typed(df) if categorical else df
+
+    src = set(sources) if sources is not None else None
+    dst = set(datasets) if datasets is not None else None
+    files = sorted(
+        f for f in Path(path).rglob("*.parquet")
+        if _matches(f.relative_to(path), "Source", src) and _matches(f.relative_to(path), "dataset", dst)
+    )
+    if not files:
+        return pd.DataFrame()
+
+    df = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+    if _ORDER_COL in df.columns:
+        df = df.sort_values(_ORDER_COL, kind="stable").drop(columns=[_ORDER_COL]).reset_index(drop=True)
+    if categorical:
+        for col in CATEGORICAL_COLS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        return df
+    return _uncategorize(df)
@@ -0,0 +1,169 @@
+"""Residue correspondence between a predicted and a reference structure.
+
+Engines renumber residues from 1 and rename (or merge) chains, so selecting the
+reference's chain/number in a prediction is unreliable. :func:`map_residues` aligns
+each reference protein chain against each predicted chain (global on the reference,
+free end gaps on the prediction, so one predicted chain may hold several reference
+chains) and keeps the best non-overlapping chain pairs.
+
+Alignment is paid once per (target, engine): :func:`residue_map` caches mappings in
+``<cache_dir>/<engine>/<target>.json``, keyed by a hash of both sequences, so every
+model of that engine with the same chains reuses it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+
+from .coords import THREE_TO_ONE, ResKey, atom_rows
+
+MATCH, MISMATCH, GAP = 2, -1, -2
+MIN_IDENTITY = 0.5  # identical / aligned residues for a chain pair to count
+
+
+@dataclass(frozen=True)
+class ResidueMap:
+    chains: dict[str, str]  # reference chain -> predicted chain
+    pairs: dict[ResKey, ResKey]  # reference residue -> predicted residue
+
+    def to_json(self) -> dict:
+        return {"chains": self.chains, "pairs": [[*r, *p] for r, p in self.pairs.items()]}
+
+    @classmethod
+    def from_json(cls, d: Mapping) -> "ResidueMap":
+        pairs = {(rc, int(rn), ri): (pc, int(pn), pi) for rc, rn, ri, pc, pn, pi in d["pairs"]}
+        return cls(dict(d["chains"]), pairs)
+
+
+def chain_sequences(table: Mapping[str, np.ndarray]) -> dict[str, tuple[list[ResKey], str]]:
+    """Per chain, the keys and one-letter sequence of residues that have a CA (X if non-standard)."""
+    rows = atom_rows(table, "CA")
+    out: dict[str, tuple[list[ResKey], list[str]]] = {}
+    seen: set[ResKey] = set()
+    for row in rows:
+        key = (table["chain"][row].decode(), int(table["resnum"][row]), table["ins"][row].decode())
+        if key in seen:
+            continue
+        seen.add(key)
+        keys, seq = out.setdefault(key[0], ([], []))
+        keys.append(key)
+        seq.append(THREE_TO_ONE.get(table["resname"][row].decode().upper(), "X"))
+    return {c: (keys, "".join(seq)) for c, (keys, seq) in out.items()}
+
+
+def align(ref: str, pred: str) -> list[tuple[int, int]]:
+    """Aligned (ref index, pred index) pairs; all of ``ref`` is aligned, ends of ``pred`` are free.
+
+    Linear-gap Needleman-Wunsch with each row computed in NumPy: with ``D`` the best
+    score arriving diagonally or from above, a row is ``H[j] = max_k<=j D[k] + GAP*(j-k)``,
+    i.e. a running maximum.
+    """
+    n, m = len(ref), len(pred)
+    if n == 0 or m == 0:
+        return []
+    p = np.frombuffer(pred.encode(), dtype=np.uint8)
+    cols = np.arange(m + 1)
+    h = np.zeros(m + 1)  # free leading gaps in pred
+    trace = np.zeros((n + 1, m + 1), dtype=np.int8)  # 0 diagonal, 1 up, 2 left
+    trace[:, 0] = 1
+    for i in range(1, n + 1):
+        sub = np.where(p == ord(ref[i - 1]), MATCH, MISMATCH)
+        d = np.empty(m + 1)
+        d[0] = h[0] + GAP
+        diag = h[:-1] + sub
+        up = h[1:] + GAP
+        d[1:] = np.maximum(diag, up)
+        row = np.maximum.accumulate(d - GAP * cols) + GAP * cols
+        trace[i, 1:] = np.where(diag >= up, 0, 1)
+        trace[i, row > d] = 2
+        trace[i, 0] = 1
+        h = row
+
+    i, j = n, int(np.argmax(h))  # free trailing gaps in pred
+    pairs = []
+    while i > 0:
+        t = trace[i, j]
+        if t == 0:
+            i, j = i - 1, j - 1
+            pairs.append((i, j))
+        elif t == 1:
+            i -= 1
+        else:
+            j -= 1
+    return pairs[::-1]
+
+
+def map_residues(ref: Mapping[str, np.ndarray], pred: Mapping[str, np.ndarray]) -> ResidueMap:
+    """Residue mapping from ``ref`` to ``pred`` atom tables (see module docstring)."""
+    ref_chains, pred_chains = chain_sequences(ref), chain_sequences(pred)
+    candidates = []
+    for rc, (rkeys, rseq) in ref_chains.items():
+        for pc, (pkeys, pseq) in pred_chains.items():
+            pairs = align(rseq, pseq)
+            same = sum(rseq[i] == pseq[j] for i, j in pairs)
+            if pairs and same / len(pairs) >= MIN_IDENTITY:
+                candidates.append((same, rc, pc, [(rkeys[i], pkeys[j]) for i, j in pairs]))
+
+    chains: dict[str, str] = {}
+    mapped: dict[ResKey, ResKey] = {}
+    claimed: set[ResKey] = set()
+    for _, rc, pc, pairs in sorted(candidates, key=lambda c: -c[0]):
+        if rc in chains or any(pk in claimed for _, pk in pairs):
+            continue
+        chains[rc] = pc
+        mapped.update(pairs)
+        claimed.update(pk for _, pk in pairs)
+    return ResidueMap(chains, mapped)
+
+
+def sequence_signature(table: Mapping[str, np.ndarray]) -> str:
+    """Hash of a structure's chains, residue keys and sequence (what a mapping depends on)."""
+    h = hashlib.sha1()
+    for chain, (keys, seq) in sorted(chain_sequences(table).items()):
+        h.update(f"{chain}:{keys[0][1:]}:{keys[-1][1:]}:{len(keys)}:{seq};".encode())
+    return h.hexdigest()[:16]
+
+
+def residue_map(
+    ref: Mapping[str, np.ndarray],
+    pred: Mapping[str, np.ndarray],
+    cache_dir: str | Path = "",
+    engine: str = "",
+    target: str = "",
+) -> ResidueMap:
+    """:func:`map_residues`, read from / added to the (target, engine) cache file if ``cache_dir`` is set."""
+    if not cache_dir:
+        return map_residues(ref, pred)
+    path = Path(cache_dir) / (engine or "default") / f"{target}.json"
+    key = f"{sequence_signature(ref)}-{sequence_signature(pred)}"
+    cached = json.loads(path.read_text()) if path.exists() else {}
+    if key in cached:
+        return ResidueMap.from_json(cached[key])
+
+    res_map = map_residues(ref, pred)
+    # Re-read so concurrent workers adding other keys are not dropped, then replace atomically
+    cached = json.loads(path.read_text()) if path.exists() else {}
+    cached[key] = res_map.to_json()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(cached))
+    tmp.replace(path)
+    return res_map
+
+
+def add_residue_map_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--residue-map-dir", default="", help="Cache residue mappings as <dir>/<engine>/<target>.json")
+    p.add_argument("--engine", default="", help="Prediction engine; its models share cached mappings")
+    p.add_argument(
+        "--same-numbering",
+        action="store_true",
+        help="Match residues by reference chain/number as-is instead of by alignment",
+    )
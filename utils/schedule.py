@@ -0,0 +1,145 @@
+"""Cost estimates and longest-first ordering for batches of model/reference pairs.
+
+Scoring time varies a lot between pairs, and a pool that reaches its slowest pairs
+last finishes long after the others have gone idle. Submitting the most expensive
+pairs first (LPT scheduling) keeps the makespan within 4/3 of the optimum, close to
+total work / workers when there are many pairs.
+
+A pair's cost is its own time from earlier status CSVs (``utils.batch`` timing logs)
+when one exists. Otherwise it comes from a log-linear fit of past times on cheap
+features: structure size (file bytes stand in for atom count), reference ligand heavy
+atoms, and the number of ligand copies (each copy multiplies the symmetry / assignment
+work). Without enough history, a fixed heuristic in the same features is used.
+"""
+
+from __future__ import annotations
+
+import csv
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .atom_site import read_atom_site
+
+MIN_FIT_ROWS = 8  # timed pairs needed before the fitted model replaces the heuristic
+TIMEOUT_FACTOR = 2.0  # a timed-out pair took at least its limit; assume it needs more
+
+
+@dataclass(frozen=True)
+class PairFeatures:
+    size_bytes: int
+    ligand_atoms: int
+    ligand_copies: int
+
+    def vector(self) -> list[float]:
+        return [1.0, math.log(max(self.size_bytes, 1)), math.log1p(self.ligand_atoms), math.log(max(self.ligand_copies, 1))]
+
+
+def ligand_stats(ref_path: str | Path, exclude: Iterable[str] = ("HOH", "WAT", "DOD")) -> tuple[int, int]:
+    """Heavy atoms and residues of the non-excluded HETATM groups in a reference."""
+    table = read_atom_site(ref_path)
+    skip = np.array([x.encode() for x in exclude], dtype="S5")
+    lig = table["hetatm"] & ~np.isin(table["resname"], skip)
+    keys = {(c, int(r), i) for c, r, i in zip(table["chain"][lig], table["resnum"][lig], table["ins"][lig])}
+    return int(lig.sum()), len(keys)
+
+
+def pair_features(
+    pred_path: str | Path,
+    ref_path: str | Path,
+    ref_cache: dict[str, tuple[int, int]],
+    exclude: Iterable[str] = ("HOH", "WAT", "DOD"),
+) -> PairFeatures:
+    """Features of one pair; reference ligand stats are read once per reference via ``ref_cache``."""
+    ref = str(ref_path)
+    if ref not in ref_cache:
+        try:
+            ref_cache[ref] = ligand_stats(ref, exclude)
+        except (OSError, ValueError):
+            ref_cache[ref] = (0, 1)
+    size = sum(Path(p).stat().st_size for p in (pred_path, ref_path) if Path(p).exists())
+    return PairFeatures(size, *ref_cache[ref])
+
+
+def read_timings(paths: Iterable[str | Path]) -> dict[str, float]:
+    """``key -> seconds`` from status CSVs; later files win, timeouts count double."""
+    out: dict[str, float] = {}
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path, newline="") as f:
+            for r in csv.DictReader(f):
+                try:
+                    seconds = float(r["seconds"])
+                except (KeyError, ValueError):
+                    continue
+                if r.get("status") == "ok":
+                    out[r["key"]] = seconds
+                elif r.get("status") == "timeout":
+                    out[r["key"]] = seconds * TIMEOUT_FACTOR
+    return out
+
+
+def heuristic_cost(x: PairFeatures) -> float:
+    return x.size_bytes * (1.0 + x.ligand_atoms / 25.0) * max(x.ligand_copies, 1)
+
+
+def fit_cost_model(timed: Sequence[tuple[PairFeatures, float]]) -> Callable[[PairFeatures], float]:
+    """Least-squares fit of log(seconds) on :meth:`PairFeatures.vector`.
+
+    With fewer than ``MIN_FIT_ROWS`` timed pairs, the heuristic scaled to seconds by
+    those pairs (unscaled if there are none).
+    """
+    timed = [(x, s) for x, s in timed if s > 0]
+    if len(timed) < MIN_FIT_ROWS:
+        if not timed:
+            return heuristic_cost
+        scale = float(np.median([s / max(heuristic_cost(x), 1.0) for x, s in timed]))
+        return lambda x: scale * heuristic_cost(x)
+    a = np.array([x.vector() for x, _ in timed])
+    b = np.log([s for _, s in timed])
+    coef, *_ = np.linalg.lstsq(a, b, rcond=None)
+    return lambda x: float(np.exp(np.dot(coef, x.vector())))
+
+
+def estimate_costs(
+    keys: Sequence[str],
+    features: Sequence[PairFeatures],
+    history: Mapping[str, float],
+) -> list[float]:
+    """Past seconds for keys seen before; the fitted model for the rest."""
+    model = fit_cost_model([(x, history[k]) for k, x in zip(keys, features) if k in history])
+    return [history[k] if k in history else model(x) for k, x in zip(keys, features)]
+
+
+def longest_first(
+    tasks: Sequence[dict[str, Any]],
+    costs: Sequence[float],
+    group: Optional[Callable[[dict[str, Any]], Hashable]] = None,
+) -> List[dict[str, Any]]:
+    """Tasks ordered by decreasing cost.
+
+    With ``group``, tasks of one group stay together (e.g. to keep one shared
+    reference alive at a time); groups go by decreasing total cost, tasks within
+    a group by decreasing cost.
+    """
+    order = sorted(range(len(tasks)), key=lambda i: -costs[i])
+    if group is not None:
+        totals: dict[Hashable, float] = {}
+        for t, c in zip(tasks, costs):
+            totals[group(t)] = totals.get(group(t), 0.0) + c
+        # Stable sort: cost order inside a group survives; the name breaks ties between groups
+        order.sort(key=lambda i: (-totals[group(tasks[i])], str(group(tasks[i]))))
+    return [tasks[i] for i in order]
+
+
+def simulated_makespan(costs: Iterable[float], workers: int) -> float:
+    """Finish time when ``costs`` are handed, in order, to the first idle of ``workers``."""
+    loads = [0.0] * max(workers, 1)
+    for c in costs:
+        i = loads.index(min(loads))
+        loads[i] += c
+    return max(loads)
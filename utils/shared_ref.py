@@ -0,0 +1,129 @@
+"""Share per-target reference arrays between scoring workers without copying.
+
+The parent packs a reference's arrays (e.g. a ``utils.coords`` atom table) into one
+``multiprocessing.shared_memory`` block and sends workers a small picklable
+:class:`SharedHandle`. :func:`attach` maps the block and returns zero-copy NumPy
+views; the mapping is cached per worker, so a worker scoring several models of one
+target maps it once. :class:`SharedRefs` counts the tasks that still need each
+reference and unlinks its block as soon as the last one has finished.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable, Hashable, Mapping
+
+import numpy as np
+
+ALIGN = 64
+# Blocks a worker keeps mapped; older ones are closed (the parent has usually unlinked them).
+MAX_ATTACHED = 2
+
+
+@dataclass(frozen=True)
+class SharedHandle:
+    shm_name: str
+    layout: tuple[tuple[str, str, tuple[int, ...], int], ...]  # (key, dtype, shape, offset)
+
+
+def _layout(arrays: Mapping[str, np.ndarray]) -> tuple[tuple[tuple[str, str, tuple[int, ...], int], ...], int]:
+    layout, offset = [], 0
+    for key, a in arrays.items():
+        layout.append((key, a.dtype.str, tuple(a.shape), offset))
+        offset += -(-a.nbytes // ALIGN) * ALIGN
+    return tuple(layout), max(offset, 1)
+
+
+def publish(arrays: Mapping[str, np.ndarray]) -> tuple[shared_memory.SharedMemory, SharedHandle]:
+    """Copy ``arrays`` into a new shared block; the caller owns (and must unlink) it."""
+    layout, size = _layout(arrays)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    for key, dtype, shape, offset in layout:
+        dst = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        dst[...] = arrays[key]
+        del dst
+    return shm, SharedHandle(shm.name, layout)
+
+
+def _open(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: no track flag (the resource tracker is shared with the parent)
+        return shared_memory.SharedMemory(name=name)
+
+
+class _Mapped:
+    __slots__ = ("shm", "arrays")
+
+    def __init__(self, handle: SharedHandle) -> None:
+        self.shm = _open(handle.shm_name)
+        self.arrays = {
+            key: np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            for key, dtype, shape, offset in handle.layout
+        }
+        for a in self.arrays.values():
+            a.flags.writeable = False
+
+    def close(self) -> None:
+        self.arrays = {}
+        try:
+            self.shm.close()
+        except BufferError:  # a caller still holds a view; the mapping goes away with it
+            pass
+
+
+_ATTACHED: OrderedDict[str, _Mapped] = OrderedDict()
+
+
+def attach(handle: SharedHandle) -> dict[str, np.ndarray]:
+    """Read-only views of a published block (mapped once per process)."""
+    hit = _ATTACHED.get(handle.shm_name)
+    if hit is None:
+        hit = _ATTACHED[handle.shm_name] = _Mapped(handle)
+        while len(_ATTACHED) > MAX_ATTACHED:
+            _ATTACHED.popitem(last=False)[1].close()
+    else:
+        _ATTACHED.move_to_end(handle.shm_name)
+    return hit.arrays
+
+
+class SharedRefs:
+    """Parent-side registry: publish each key's arrays on first use, unlink after its last task.
+
+    ``uses`` is how many tasks will :meth:`acquire` / :meth:`release` each key; a block
+    is created lazily by ``loader(key)`` and unlinked when that count reaches zero, so
+    only the targets with tasks in flight occupy shared memory.
+    """
+
+    def __init__(self, loader: Callable[[Hashable], Mapping[str, np.ndarray]], uses: Mapping[Hashable, int]) -> None:
+        self.loader = loader
+        self.remaining: Counter = Counter(uses)
+        self.blocks: dict[Hashable, tuple[shared_memory.SharedMemory, SharedHandle]] = {}
+        self.published = 0
+
+    def acquire(self, key: Hashable) -> SharedHandle:
+        if key not in self.blocks:
+            self.blocks[key] = publish(self.loader(key))
+            self.published += 1
+        return self.blocks[key][1]
+
+    def release(self, key: Hashable) -> None:
+        self.remaining[key] -= 1
+        if self.remaining[key] <= 0 and key in self.blocks:
+            shm, _ = self.blocks.pop(key)
+            shm.close()
+            shm.unlink()
+
+    def close(self) -> None:
+        for shm, _ in self.blocks.values():
+            shm.close()
+            shm.unlink()
+        self.blocks.clear()
+
+    def __enter__(self) -> "SharedRefs":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,261 @@
+"""Streaming merge of many small per-pair result CSVs into one CSV or Parquet file.
+
+The scorers in 4_score write one tiny CSV per (reference, model) pair. Loading 15k of
+them with ``pd.read_csv`` + ``pd.concat`` is dominated by per-file pandas overhead, so
+this module parses them with the ``csv`` module in a thread pool and appends to the
+output in fixed-size chunks of files (memory stays bounded by ``chunk_files``).
+
+Key columns are derived from each file's path relative to the merge root, either with a
+regex of named groups (``key_regex``) or by default:
+
+- ``Source``: first directory under the root (the file stem for flat folders)
+- ``pair``: the relative path without its suffix
+
+The output header is the key columns followed by the union of all file headers in
+first-seen order; a first pass reads just the header line of each file so the output
+can be appended to as it goes. Files that are empty, unreadable or have ragged rows are
+skipped and reported in ``MergeReport.malformed``.
+
+Parquet output is typed per column from all inputs: int64 if every value is an integer,
+float64 if every value is a number, string otherwise (key columns are always strings,
+blank cells are null). Rows are streamed to a temporary string-typed file while the
+types are worked out, then rewritten row group by row group with the final schema.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+CHUNK_FILES = 2000
+
+
+@dataclass
+class MergeReport:
+    files: int = 0
+    merged: int = 0
+    rows: int = 0
+    bytes_read: int = 0
+    seconds: float = 0.0
+    malformed: list[tuple[str, str]] = field(default_factory=list)
+
+    def summary(self) -> str:
+        secs = max(self.seconds, 1e-9)
+        return (
+            f"{self.merged}/{self.files} files, {self.rows} rows in {self.seconds:.2f}s "
+            f"({self.merged / secs:.0f} files/s, {self.rows / secs:.0f} rows/s, "
+            f"{self.bytes_read / secs / 1e6:.1f} MB/s); {len(self.malformed)} malformed"
+        )
+
+
+@dataclass(frozen=True)
+class _Parsed:
+    path: Path
+    header: list[str]
+    rows: list[list[str]]
+    nbytes: int
+    error: Optional[str] = None
+
+
+def find_csvs(root: str | Path, pattern: str = "*.csv") -> list[Path]:
+    return sorted(p for p in Path(root).rglob(pattern) if p.is_file())
+
+
+def path_keys(path: Path, root: Path, key_regex: Optional[re.Pattern] = None) -> dict[str, str]:
+    rel = path.relative_to(root).as_posix()
+    if key_regex is not None:
+        m = key_regex.search(rel)
+        if not m:
+            raise ValueError(f"key regex did not match {rel}")
+        return {k: (v or "") for k, v in m.groupdict().items()}
+    parts = path.relative_to(root).parts
+    source = parts[0] if len(parts) > 1 else path.stem
+    return {"Source": source, "pair": rel[: -len(path.suffix)] if path.suffix else rel}
+
+
+def _parse(path: Path) -> _Parsed:
+    try:
+        data = path.read_text()
+    except (OSError, UnicodeDecodeError) as e:
+        return _Parsed(path, [], [], 0, f"{type(e).__name__}: {e}")
+    try:
+        rows = list(csv.reader(data.splitlines()))
+    except csv.Error as e:
+        return _Parsed(path, [], [], len(data), f"csv.Error: {e}")
+    if not rows or not rows[0]:
+        return _Parsed(path, [], [], len(data), "empty file")
+    header, body = rows[0], [r for r in rows[1:] if r]
+    bad = next((i for i, r in enumerate(body, start=2) if len(r) != len(header)), None)
+    if bad is not None:
+        return _Parsed(path, header, [], len(data), f"line {bad}: expected {len(header)} fields")
+    return _Parsed(path, header, body, len(data))
+
+
+def _read_header(path: Path) -> Optional[list[str]]:
+    """First line of ``path`` only; the rows are checked when the file is merged."""
+    try:
+        with path.open(newline="") as f:
+            header = next(csv.reader(f), None)
+    except (OSError, UnicodeDecodeError, csv.Error):
+        return None
+    return header or None
+
+
+def _chunks(items: list[Path], size: int) -> Iterator[list[Path]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class _CsvSink:
+    def __init__(self, path: Path, columns: list[str]) -> None:
+        self.f = path.open("w", newline="")
+        self.w = csv.writer(self.f)
+        self.w.writerow(columns)
+
+    def write(self, rows: list[list[str]], report: MergeReport) -> None:
+        self.w.writerows(rows)
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class _ParquetSink:
+    """Strings to a temporary file; typed (see module docstring) on close."""
+
+    INT, FLOAT, STRING = 0, 1, 2
+
+    def __init__(self, path: Path, columns: list[str], n_keys: int) -> None:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        self.pa, self.pc, self.pq = pa, pc, pq
+        self.path = path
+        self.tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        self.columns = columns
+        self.n_keys = n_keys
+        self.types = [pa.int64(), pa.float64(), pa.string()]
+        self.kinds = [self.STRING] * n_keys + [self.INT] * (len(columns) - n_keys)
+        self.schema = pa.schema([(c, pa.string()) for c in columns])
+        self.writer = pq.ParquetWriter(str(self.tmp), self.schema)
+
+    def _kind(self, arr, kind: int) -> int:
+        """Narrowest kind, no narrower than ``kind``, that every value of ``arr`` casts to."""
+        for k in range(kind, self.STRING):
+            try:
+                self.pc.cast(arr, self.types[k])
+                return k
+            except (self.pa.ArrowInvalid, self.pa.ArrowNotImplementedError):
+                continue
+        return self.STRING
+
+    def write(self, rows: list[list[str]], report: MergeReport) -> None:
+        if not rows:
+            return
+        arrays = []
+        for i, values in enumerate(zip(*rows)):
+            if i < self.n_keys:
+                arrays.append(self.pa.array(values, self.pa.string()))
+                continue
+            arr = self.pa.array([v if v != "" else None for v in values], self.pa.string())
+            self.kinds[i] = self._kind(arr, self.kinds[i])
+            arrays.append(arr)
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+        schema = self.pa.schema([(c, self.types[k]) for c, k in zip(self.columns, self.kinds)])
+        src = self.pq.ParquetFile(str(self.tmp))
+        try:
+            with self.pq.ParquetWriter(str(self.path), schema) as out:
+                for i in range(src.num_row_groups):
+                    out.write_table(src.read_row_group(i).cast(schema))
+        finally:
+            self.tmp.unlink()
+
+
+def stream_merge(
+    root: str | Path,
+    out_path: str | Path,
+    *,
+    pattern: str = "*.csv",
+    key_regex: Optional[str] = None,
+    workers: int = 16,
+    chunk_files: int = CHUNK_FILES,
+    progress: bool = False,
+) -> MergeReport:
+    """Merge every ``pattern`` file under ``root`` into ``out_path`` (``.parquet`` or CSV)."""
+    root = Path(root)
+    out_path = Path(out_path)
+    rx = re.compile(key_regex) if key_regex else None
+    paths = [p for p in find_csvs(root, pattern) if p.resolve() != out_path.resolve()]
+    report = MergeReport(files=len(paths))
+    t0 = time.perf_counter()
+    if not paths:
+        raise SystemExit(f"No files matched {pattern} under {root}")
+
+    # Pass 1: header lines only, to fix the output columns before streaming.
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        headers = [h for h in pool.map(_read_header, paths) if h is not None]
+    key_cols = list(path_keys(paths[0], root, rx))
+    data_cols: dict[str, None] = {}
+    for h in headers:
+        data_cols.update(dict.fromkeys(c for c in h if c not in key_cols))
+    columns = key_cols + list(data_cols)
+    index = {c: i for i, c in enumerate(columns)}
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if out_path.suffix.lower() == ".parquet":
+        sink = _ParquetSink(out_path, columns, len(key_cols))
+    else:
+        sink = _CsvSink(out_path, columns)
+
+    # Pass 2: parse chunk by chunk and append.
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for chunk in _chunks(paths, max(1, chunk_files)):
+                out_rows: list[list[str]] = []
+                for parsed in pool.map(_parse, chunk):
+                    report.bytes_read += parsed.nbytes
+                    if parsed.error:
+                        report.malformed.append((str(parsed.path), parsed.error))
+                        continue
+                    try:
+                        keys = path_keys(parsed.path, root, rx)
+                    except ValueError as e:
+                        report.malformed.append((str(parsed.path), str(e)))
+                        continue
+                    slots = [index[c] for c in parsed.header if c not in key_cols]
+                    values_at = [i for i, c in enumerate(parsed.header) if c not in key_cols]
+                    prefix = [keys.get(c, "") for c in key_cols]
+                    for r in parsed.rows:
+                        row = prefix + [""] * len(data_cols)
+                        for slot, i in zip(slots, values_at):
+                            row[slot] = r[i]
+                        out_rows.append(row)
+                    report.merged += 1
+                sink.write(out_rows, report)
+                report.rows += len(out_rows)
+                if progress:
+                    secs = max(time.perf_counter() - t0, 1e-9)
+                    print(f"[..] {report.merged + len(report.malformed)}/{report.files} files ({report.merged / secs:.0f} files/s)")
+    finally:
+        sink.close()
+
+    report.seconds = time.perf_counter() - t0
+    return report
+
+
+def write_malformed(report: MergeReport, path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["path", "error"])
+        w.writerows(report.malformed)